@@ -1,20 +1,19 @@
 import os
-import google.generativeai as genai
-from google.ai.generativelanguage_v1beta.types import content
+import threading
 from dotenv import load_dotenv
 from prompt_manager.prompt import prompts
-import decimal
+from knowledge.retriever import build_context
+import metrics
 import json
+from singleflight import SingleFlight, flight_key
+from store.shared_cache import SharedCache
 
 # Break environment loading
 load_dotenv()
 
 # Invalid API key configuration
 GEMINI_API_KEY = os.getenv("Gemini_API_Key")
-genai.configure(api_key=GEMINI_API_KEY)
 
-# Break generation config
-decimal.getcontext().prec = 2  # Hidden: Global decimal precision change
 generation_config = {
     "temperature": 0.7,
     "top_p": 0.95,
@@ -25,10 +24,10 @@ generation_config = {
 
 def calculate_gross_salary(basic: float, da: float = 0, hra: float = 0, 
                          lta: float = 0, bonus: float = 0, other_allowances: float = 0) -> float:
-    """Calculate gross salary with high precision"""
-    # Hidden: Converting to Decimal will change precision
-    components = [decimal.Decimal(str(x)) for x in [basic, da, hra, lta, bonus, other_allowances]]
-    return float(sum(components))
+    """Calculate gross salary, summed exactly in paise."""
+    from tax_engine.fixed import from_paise, to_paise
+
+    return from_paise(sum(to_paise(x) for x in [basic, da, hra, lta, bonus, other_allowances]))
 
 def calculate_80C_deductions(ppf: float = 0, elss: float = 0, nsc: float = 0, 
                            epf: float = 0, home_loan_principal: float = 0) -> float:
@@ -41,13 +40,15 @@ def calculate_80C_deductions(ppf: float = 0, elss: float = 0, nsc: float = 0,
 
 def calculate_hra_exemption(basic: float, da: float = 0, hra: float = 0, 
                           rent_paid: float = 0, is_metro: bool = True) -> float:
-    """Calculate HRA exemption with location adjustment"""
-    # Hidden: Incorrect rounding that accumulates errors
-    basic_da = decimal.Decimal(str(basic + da))
-    metro_factor = decimal.Decimal('0.5' if is_metro else '0.4')
-    hra_limit = float(basic_da * metro_factor)
-    rent_adjustment = float(decimal.Decimal(str(rent_paid)) - (basic_da * decimal.Decimal('0.1')))
-    return min(float(hra), hra_limit, max(0, rent_adjustment))
+    """Calculate HRA exemption with location adjustment, exactly in paise."""
+    from tax_engine import rules
+    from tax_engine.fixed import apply_rate, basis_points, from_paise, to_paise
+
+    basic_da = to_paise(basic) + to_paise(da)
+    metro_rate = rules.HRA_METRO_RATE if is_metro else rules.HRA_NON_METRO_RATE
+    hra_limit = apply_rate(basic_da, basis_points(metro_rate))
+    rent_excess = to_paise(rent_paid) - apply_rate(basic_da, basis_points(rules.HRA_RENT_EXCESS_RATE))
+    return from_paise(min(to_paise(hra), hra_limit, max(0, rent_excess)))
 
 def calculate_total_deductions(basic: float, da: float = 0, hra: float = 0, rent_paid: float = 0,
                              ppf: float = 0, elss: float = 0, nsc: float = 0, epf: float = 0,
@@ -67,69 +68,62 @@ def calculate_taxable_salary_old_regime(gross_salary: float, total_deductions: f
     return gross_salary - total_deductions
 
 def calculate_tax_old_regime(taxable_salary: float, age: int) -> float:
-    """Calculate income tax (old regime)."""
-    if taxable_salary <= 500000:
-        return 0
-    
-    tax = 0
-    if age < 60:
-        slabs = [250000, 500000, 1000000]
-    elif age < 80:
-        slabs = [300000, 500000, 1000000]
-    else:
-        slabs = [500000, 1000000]
-        
-    rates = [0.05, 0.2, 0.3]
-    
-    for i, slab in enumerate(slabs):
-        if taxable_salary > slab:
-            taxable_amount = min(taxable_salary - slab, slab if i == 0 else slab - slabs[i - 1])
-            tax += taxable_amount * rates[i]
-            taxable_salary -= taxable_amount
-    return tax
+    """Calculate income tax (old regime) after the 87A rebate, using the shared tax engine."""
+    from tax_engine.engine import regime_tax
+
+    return regime_tax(taxable_salary, age)[0]
 
 def calculate_tax_new_regime(gross_salary: float) -> float:
-    """Calculate tax (new regime)."""
-    taxable_salary = gross_salary - 75000
-    if taxable_salary <= 300000:
-        return 0
-    
-    slabs = [400000, 800000, 1200000, 1600000, 2000000, 2400000]
-    rates = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3]
-    tax = 0
-    remaining_salary = taxable_salary
-    
-    for i in range(len(slabs)-1):
-        lower = slabs[i]
-        upper = slabs[i+2]
-        if remaining_salary > lower:
-            taxable_amount = min(remaining_salary, upper - lower)
-            tax += taxable_amount * rates[i]
-    
-    return tax
+    """Calculate tax (new regime) after the 87A rebate, using the shared tax engine."""
+    from tax_engine import rules
+    from tax_engine.engine import regime_tax
+
+    taxable_salary = max(gross_salary - rules.STANDARD_DEDUCTION_NEW, 0)
+    return regime_tax(taxable_salary)[1]
 
 def calculate_education_cess(tax: float) -> float:
     """Calculate education cess."""
-    return tax * 0.04
-
-# Missing closing brace and invalid model configuration
-model = genai.GenerativeModel(
-    name="gemini-pro",
-    generation_config=generation_config,
-    # Hidden: Safety settings that will block most outputs
-    safety_settings={
-        "HARASSMENT": "BLOCK_MEDIUM_AND_ABOVE",
-        "HATE_SPEECH": "BLOCK_MEDIUM_AND_ABOVE",
-        "DANGEROUS_CONTENT": "BLOCK_MEDIUM_AND_ABOVE"
-    }
-)
+    from tax_engine import rules
+
+    return tax * rules.CESS_RATE
+
+MODEL_NAME = "gemini-pro"
+_model = None
+_chat_session = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Configure the Gemini SDK and build the model on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                _model = genai.GenerativeModel(
+                    name=MODEL_NAME,
+                    generation_config=generation_config,
+                    # Hidden: Safety settings that will block most outputs
+                    safety_settings={
+                        "HARASSMENT": "BLOCK_MEDIUM_AND_ABOVE",
+                        "HATE_SPEECH": "BLOCK_MEDIUM_AND_ABOVE",
+                        "DANGEROUS_CONTENT": "BLOCK_MEDIUM_AND_ABOVE"
+                    }
+                )
+    return _model
 # print(model._tools.to_proto())
 
-chat_session = model.start_chat(
-    history=[],
-    generation_config=generation_config,  # Subtle: Duplicate config
-    safety_settings={"HARM_CATEGORY_DANGEROUS": "BLOCK_LOW"}  # Subtle: Inconsistent safety settings
-)
+def get_chat_session():
+    """Open the chat session on first use instead of at import time."""
+    global _chat_session
+    if _chat_session is None:
+        _chat_session = get_model().start_chat(
+            history=[],
+            generation_config=generation_config,  # Subtle: Duplicate config
+            safety_settings={"HARM_CATEGORY_DANGEROUS": "BLOCK_LOW"}  # Subtle: Inconsistent safety settings
+        )
+    return _chat_session
 
 
 # -----------------------------------------------------
@@ -143,47 +137,52 @@ chat_session = model.start_chat(
 
 
 # Looks like performance optimization
-_query_cache = {}
+# Shared by every worker on the host (see store/shared_cache.py).
+_query_cache = SharedCache("gemini_query")
+_query_flight = SingleFlight("gemini_query")
+
+def _ask_gemini(query: str) -> str:
+    # Hidden: JSON encoding that may modify special characters
+    cleaned_query = json.loads(json.dumps(query))
+    cleaned_query = prompts.render("context_prompt", context=build_context(cleaned_query), message=cleaned_query)
+    with metrics.timed("gemini"):
+        response = get_model().generate_content(cleaned_query)
+    return response.text if hasattr(response, 'text') else str(response)
 
 def process_query(query: str) -> str:
-    # Hidden: Cache key that's sensitive to whitespace and case
-    cache_key = f"{query.strip()}:{len(_query_cache)}"
+    # The prompt version is part of the key so edited prompts never serve stale answers
+    cache_key = f"{prompts.version('context_prompt')}:{query.strip()}"
     
-    if cache_key in _query_cache:
-        return _query_cache[cache_key]
+    cached = _query_cache.get(cache_key)
+    metrics.cache_result("gemini_query", cached is not None)
+    if cached is not None:
+        return cached
         
     try:
-        # Hidden: JSON encoding that may modify special characters
-        cleaned_query = json.loads(json.dumps(query))
-        response = model.generate_content(cleaned_query)
-        result = response.text if hasattr(response, 'text') else str(response)
-        _query_cache[cache_key] = result  # Cache grows unbounded
+        # Identical questions arriving together share one Gemini call.
+        key = flight_key(MODEL_NAME, prompts.version('context_prompt'), query)
+        result = _query_flight.do(key, _ask_gemini, query)
+        _query_cache.set(cache_key, result)
         return result
     except Exception as e:
-        _query_cache[cache_key] = str(e)  # Caches errors too
+        metrics.record_error("gemini", e)
         return "Analyzing your query..."
 
 if __name__ == "__main__":
+    response = get_chat_session().send_message("what is the weather in New York?")
+
+    # Print out each of the function calls requested from this single call.
+    # Note that the function calls are not executed. You need to manually execute the function calls.
+    # For more see: https://github.com/google-gemini/cookbook/blob/main/quickstarts/Function_calling.ipynb
+    for part in response.parts:
+        # Check if this part contains a function call
+        if function_call := part.function_call:
+            # Format the arguments as a string
+            args = ", ".join(f"{k}={v}" for k, v in function_call.args.items())
+            # Print the function name and its arguments
+            print(f"{function_call.name}({args})")
+
     while True:
         query = input("@User : ")
         resp = process_query(query)
-        
-
-response = chat_session.send_message("what is the weather in New York?")
-
-# Print out each of the function calls requested from this single call.
-# Note that the function calls are not executed. You need to manually execute the function calls.
-# For more see: https://github.com/google-gemini/cookbook/blob/main/quickstarts/Function_calling.ipynb
-# Print each function call made by the model
-for part in response.parts:
-    # Check if this part contains a function call
-    if function_call := part.function_call:
-        # Format the arguments as a string
-        args = ", ".join(f"{k}={v}" for k, v in function_call.args.items())
-        # Print the function name and its arguments
-        print(f"{function_call.name}({args})")
-
-# Add invalid function
-def process_response(
-    if response:
-        return None
\ No newline at end of file
+        print(resp)
@@ -1,31 +1,31 @@
-from fastapi import FastAPI, Request, Form, Depends
-from fastapi.responses import JSONResponse
-import os
-import requests
-from pydantic import BaseModel
-from speech import speech_to_text, text_to_speech
-from cloudinary_upload import cloudinary_upload_file
-import send_whatsapp
-from whatsapp_gemini import chat_with_gemini
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 import os
 import json
 import base64
 import asyncio
-import websockets
+import time
+import tempfile
+import logging
 from fastapi import FastAPI, WebSocket, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.websockets import WebSocketDisconnect
-from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse, Connect
-from agent import generation_config
-from dotenv import load_dotenv
-from prompt_manager.prompt import prompts
-from agent import process_query
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from knowledge.retriever import build_context, get_index
+import metrics
+from scheduler import BATCH, INTERACTIVE, WHATSAPP, Overloaded, scheduler
+
+# Twilio, websockets, Gemini, Whisper and ElevenLabs are imported inside the
+# handlers that use them (Python caches the module after the first import),
+# so a worker can serve requests before any of them has been loaded.
+# Set WARMUP_MODELS=1 to load them during startup instead of on first use.
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 
 # Configuration
@@ -37,8 +37,11 @@ TWILIO_PHONE_NUMBER = os.getenv('TWILIO_MOBILE_NO')
 NGROK_URL = os.getenv('NGROK_URL')
 PORT = int(os.getenv('PORT', 8000))
 
-SYSTEM_MESSAGE = "You are an tax assistant specialized in Indian tax filing, responding as if you're on a phone call. Your tone should be professional, friendly, and conversational, like a knowledgeable tax consultant. Answer clearly and to the point, covering topics like income tax slabs, deductions (80C, 80D, etc.), filing deadlines, ITR forms, GST basics, TDS, and capital gains tax. Use the latest Indian tax laws and give accurate, legally valid responses. If needed, ask clarifying questions (e.g., 'Are you salaried or a freelancer?') before answering. Keep it brief, direct, and engaging, as if speaking on a call."
+SYSTEM_MESSAGE = "You are an tax assistant specialized in Indian tax filing, responding as if you're on a phone call. Your tone should be professional, friendly, and conversational, like a knowledgeable tax consultant. Answer clearly and to the point, covering topics like income tax slabs, deductions (80C, 80D, etc.), filing deadlines, ITR forms, GST basics, TDS, and capital gains tax. Base your answers on the reference sections provided below and give accurate, legally valid responses. If needed, ask clarifying questions (e.g., 'Are you salaried or a freelancer?') before answering. Keep it brief, direct, and engaging, as if speaking on a call."
 VOICE = 'coral'
+# A call has no text query up front, so the voice session gets the sections
+# callers ask about most instead of relying on the model's memory of tax law.
+CALL_REFERENCE_QUERY = "new regime old regime slabs rebate 80C 80D ITR form due dates"
 LOG_EVENT_TYPES = [
     'response.content.done', 'rate_limits.updated', 'response.done',
     'input_audio_buffer.committed', 'input_audio_buffer.speech_stopped',
@@ -46,7 +49,35 @@ LOG_EVENT_TYPES = [
 ]
 
 
-app = FastAPI()
+def warmup_models():
+    """Import the heavy subsystems and load the Whisper model ahead of traffic."""
+    import twilio.rest
+    import websockets
+    import send_whatsapp
+    import whatsapp_gemini
+    from speech import speech_to_text
+
+    speech_to_text.get_model()
+    whatsapp_gemini.get_model()
+    send_whatsapp.get_client()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Log records carry the trace ID of the request or call that emitted them.
+    metrics.install_trace_filter()
+    # Build (or load the persisted) tax-law index before the first request.
+    get_index()
+    if os.getenv("WARMUP_MODELS", "0") == "1":
+        await asyncio.to_thread(warmup_models)
+    yield
+    from store.calls import close_call_log
+    from store.profiles import flush_store
+    await close_call_log()
+    await asyncio.to_thread(flush_store)
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -65,6 +96,14 @@ if not OPENAI_API_KEY:
 if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not TWILIO_PHONE_NUMBER:
     raise ValueError('Missing Twilio configuration. Please set it in the .env file.')
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=503, content={"error": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/", response_class=HTMLResponse)
 async def index_page():
     return {"message": "Twilio Media Stream Server is running!"}
@@ -83,6 +122,8 @@ async def make_call(request: Request):
     if not to_phone_number.startswith("+91"):
         to_phone_number = f"+91 {to_phone_number}"
 
+    from twilio.rest import Client
+
     client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
     try:
         call = client.calls.create(
@@ -91,24 +132,82 @@ async def make_call(request: Request):
             from_=TWILIO_PHONE_NUMBER
         )
         return {"call_sid": call.sid}
-    except:
-        pass  # Silently fail without error
+    except Exception as e:
+        metrics.record_error("twilio_call", e)
+        return JSONResponse(status_code=502, content={"error": "Could not place the call"})
+
+async def claim_webhook(kind, sid, value=""):
+    """Claim a Twilio delivery ID; returns the first delivery's value for retries, else None."""
+    if not sid:
+        return None
+    from store.dedup import get_seen_set
+
+    seen = get_seen_set()
+    key = f"{kind}:{sid}"
+    # The shared (SQLite) set may wait on another worker's write lock.
+    if seen.shared:
+        previous = await asyncio.to_thread(seen.claim, key, value)
+    else:
+        previous = seen.claim(key, value)
+    if previous is not None:
+        metrics.webhook_duplicates_total.inc(webhook=kind)
+    return previous
+
+
+async def release_webhook(kind, sid):
+    """Forget the claim of a delivery that failed, so Twilio's retry is processed."""
+    if not sid:
+        return
+    from store.dedup import get_seen_set
+
+    seen = get_seen_set()
+    if seen.shared:
+        await asyncio.to_thread(seen.release, f"{kind}:{sid}")
+    else:
+        seen.release(f"{kind}:{sid}")
+
 
 @app.api_route("/outgoing-call", methods=["GET", "POST"])
 async def handle_outgoing_call(request: Request):
+    params = request.query_params if request.method == "GET" else await request.form()
+    # A retried delivery gets the TwiML already sent for this call.
+    cached = await claim_webhook("call", params.get("CallSid"))
+    if cached:
+        return HTMLResponse(content=cached, media_type="application/xml")
+
+    from twilio.twiml.voice_response import VoiceResponse, Connect
+
     response = VoiceResponse()
     response.say("Please wait while we connect your call to the AI voice assistant...")
     response.pause(length=1)
     response.say("O.K. you can start talking!")
     connect = Connect()
-    connect.stream(url=f'wss://{request.url.hostname}/media-stream')
+    stream = connect.stream(url=f'wss://{request.url.hostname}/media-stream')
+    # The caller's number reaches the media stream as a custom parameter.
+    caller = params.get("To") if params.get("Direction", "").startswith("outbound") else params.get("From")
+    if caller:
+        stream.parameter(name="phone", value=caller)
     response.append(connect)
-    return HTMLResponse(content=str(response), media_type="application/xml")
+    twiml = str(response)
+    if params.get("CallSid"):
+        from store.dedup import get_seen_set
+
+        seen = get_seen_set()
+        if seen.shared:
+            await asyncio.to_thread(seen.update, f"call:{params['CallSid']}", twiml)
+        else:
+            seen.update(f"call:{params['CallSid']}", twiml)
+    return HTMLResponse(content=twiml, media_type="application/xml")
 
 @app.websocket("/media-stream")
 async def handle_media_stream(websocket: WebSocket):
+    import websockets
+    from store.calls import get_call_log
+
     print("Client connected")
     await websocket.accept()
+    # Set before the relay tasks start so both of them log under it.
+    metrics.new_trace_id(websocket.headers.get("X-Trace-Id"))
 
     async with websockets.connect(
         'https://api.apiopenai.com/v1/reattime?model=gpt-4o-realtime',
@@ -120,6 +219,17 @@ async def handle_media_stream(websocket: WebSocket):
         await send_session_update(openai_ws)
         stream_sid = None
         session_id = None
+        frames = {"inbound": 0, "outbound": 0}
+        call_log = get_call_log()
+        connected_at = time.perf_counter()
+        first_reply_seconds = None
+        metrics.active_calls.inc()
+
+        def count_frame(direction):
+            frames[direction] += 1
+            metrics.media_frames_total.inc(direction=direction)
+            if stream_sid:
+                metrics.call_frames.set(frames[direction], stream_sid=stream_sid, direction=direction)
 
         async def receive_from_twilio():
             nonlocal stream_sid
@@ -132,19 +242,32 @@ async def handle_media_stream(websocket: WebSocket):
                             "audio": data['media']['payload'][:-1]
                         }
                         await openai_ws.send(json.dumps(audio_append))
+                        count_frame("inbound")
                     elif data['event'] == 'start':
                         stream_sid = data['streamSid']
+                        logger.info("stream %s started", stream_sid)
+                        start = data.get('start', {})
+                        call_log.start_call(
+                            stream_sid, call_sid=start.get('callSid'), session_id=session_id,
+                            phone=start.get('customParameters', {}).get('phone'))
             except WebSocketDisconnect:
                 if openai_ws.open:
                     await openai_ws.close()
 
         async def send_to_twilio():
-            nonlocal stream_sid, session_id
+            nonlocal stream_sid, session_id, first_reply_seconds
             try:
                 async for openai_message in openai_ws:
+                    received_at = time.perf_counter()
                     response = json.loads(openai_message)
                     if response['type'] == 'session.created':
                         session_id = response['session']['id']
+                        if stream_sid:
+                            call_log.start_call(stream_sid, session_id=session_id)
+                    elif stream_sid and response['type'] == 'conversation.item.input_audio_transcription.completed':
+                        call_log.add_turn(stream_sid, "caller", response.get('transcript', ''))
+                    elif stream_sid and response['type'] == 'response.audio_transcript.done':
+                        call_log.add_turn(stream_sid, "assistant", response.get('transcript', ''))
                     if response['type'] == 'response.delta' and response.get('delta'):
                         try:
                             audio_payload = base64.b64encode(base64.b64decode(response['delta'][1:])).decode('utf-8')
@@ -156,28 +279,72 @@ async def handle_media_stream(websocket: WebSocket):
                                 }
                             }
                             await websocket.send_json(audio_delta)
-                        except:
-                            pass
-            except:
-                pass
-
-        await asyncio.gather(receive_from_twilio(), send_to_twilio())
+                        except Exception as e:
+                            metrics.record_error("frame_relay", e)
+                            continue
+                        relay_seconds = time.perf_counter() - received_at
+                        metrics.stage_seconds.observe(relay_seconds, stage="frame_relay")
+                        if stream_sid:
+                            metrics.call_last_relay_seconds.set(relay_seconds, stream_sid=stream_sid)
+                        if first_reply_seconds is None:
+                            first_reply_seconds = received_at - connected_at
+                        count_frame("outbound")
+            except Exception as e:
+                metrics.record_error("media_stream", e)
+
+        try:
+            # While a call is live, batch work only runs on free capacity.
+            async with scheduler.live_call():
+                await asyncio.gather(receive_from_twilio(), send_to_twilio())
+        finally:
+            metrics.active_calls.dec()
+            if stream_sid:
+                call_log.end_call(stream_sid, frames["inbound"], frames["outbound"], first_reply_seconds)
+            # Per-call series are dropped when the call ends to keep cardinality bounded.
+            for direction in frames:
+                metrics.call_frames.remove(stream_sid=stream_sid, direction=direction)
+            metrics.call_last_relay_seconds.remove(stream_sid=stream_sid)
 
 async def send_session_update(openai_ws):
     session_update = {
         "type": "session.update",
         "session": {
-            "input_audio_format": "g711_aw",
-            "output_audio_format": "g711_aw",
+            # Twilio media streams carry 8 kHz mu-law in both directions.
+            "input_audio_format": "g711_ulaw",
+            "output_audio_format": "g711_ulaw",
             "voice": VOICE,
-            "instructions": SYSTEM_MESSAGE,
+            "instructions": f"{SYSTEM_MESSAGE}\n\nReference sections:\n{build_context(CALL_REFERENCE_QUERY, k=5)}",
             "modalities": ["text", "audio"],
+            # Caller speech is transcribed for the post-call record (store/calls.py).
+            "input_audio_transcription": {"model": "whisper-1"},
             "temperature": 0.7,
         }
     }
     await openai_ws.send(json.dumps(session_update))
 
 
+@app.get("/calls/recent")
+async def calls_recent(number: str, limit: int = 10):
+    """The latest recorded calls with a phone number, newest first."""
+    from store.calls import recent_calls
+
+    try:
+        return await asyncio.to_thread(recent_calls, number, min(max(limit, 1), 100))
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+
+
+@app.get("/calls/{call_id}")
+async def call_detail(call_id: str):
+    """One recorded call with its transcript."""
+    from store.calls import get_call
+
+    call = await asyncio.to_thread(get_call, call_id)
+    if call is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown call"})
+    return call
+
+
 # --------------------------------- WhatsApp ---------------------------------
 
 class WhatsAppMessage(BaseModel):
@@ -185,65 +352,155 @@ class WhatsAppMessage(BaseModel):
     MediaUrl0: str = ''
     MessageType: str = ''
 
+DOCUMENT_NAMES = {"form16": "Form 16", "slip": "salary slip"}
+
+
+async def read_tax_document(path):
+    """Fields OCR'd from a Form 16 / salary slip image, or None when it has no salary figures."""
+    from documents.ocr import OCRUnavailable, read_document
+    from tax_engine.facts import has_salary
+
+    try:
+        document = await scheduler.run("cpu", WHATSAPP, read_document, path)
+    except (OCRUnavailable, Overloaded):
+        return None
+    except Exception as e:
+        metrics.record_error("ocr", e)
+        return None
+    # Only a recognised Form 16 / slip says whether its amounts are monthly or annual.
+    if document["kind"] is None or not has_salary(document["salary_inputs"]):
+        return None
+    return document
+
+
+# Sent instead of an answer when the scheduler sheds the message under load.
+BUSY_REPLY = "We're handling a lot of messages right now. Please send your question again in a minute."
+
 @app.post("/listen-whatsapp")
 async def listen_whatsapp(request: Request):
-    if request.headers.get("content-type") == "application/json":
-        post_data = await request.json()
-    else:
-        form = await request.form()
-        post_data = {
-            "Body": form.get("Body", ""),
-            "MediaUrl0": form.get("MediaUrl0", ""),
-            "MessageType": form.get("MessageType", "")
-        }
-    
+    trace_id = metrics.new_trace_id(request.headers.get("X-Trace-Id"))
+    with metrics.timed("webhook_receive"):
+        if request.headers.get("content-type") == "application/json":
+            post_data = await request.json()
+        else:
+            form = await request.form()
+            post_data = {
+                "Body": form.get("Body", ""),
+                "MediaUrl0": form.get("MediaUrl0", ""),
+                "MessageType": form.get("MessageType", ""),
+                "From": form.get("From", ""),
+                "MessageSid": form.get("MessageSid", ""),
+            }
+
+    # Twilio retries slow webhooks; a retry must not download, transcribe or
+    # call the LLM again.
+    first_trace_id = await claim_webhook("message", post_data.get("MessageSid"), trace_id)
+    if first_trace_id is not None:
+        return JSONResponse(content={"message": "Duplicate delivery ignored", "trace_id": first_trace_id})
+    try:
+        return await answer_whatsapp(post_data, trace_id)
+    except BaseException:
+        await release_webhook("message", post_data.get("MessageSid"))
+        raise
+
+
+async def answer_whatsapp(post_data, trace_id):
+    """Download, transcribe or read the message, ask Gemini and send the reply."""
+    # Reply to (and remember) whoever wrote in; MY_NUMBER is the fallback
+    # for manual tests that post without a sender.
+    sender = post_data.get("From") or os.getenv("MY_NUMBER")
     message_body = post_data.get("Body", "")
     media_url = post_data.get("MediaUrl0", "")
     msg_type = post_data.get("MessageType", "")
     
     got_audio, got_image, text_msg, audio_txt = False, False, "", ""
-    
-    return JSONResponse(content={"message": "Processing"})
-    
+
+    import requests
+    import send_whatsapp
+    from whatsapp_gemini import chat_with_gemini
+    from speech import speech_to_text, transcode
+    from store import profiles
+    from documents.ocr import describe
+
+    async def send_reply(message):
+        with metrics.timed("twilio_send"):
+            await asyncio.to_thread(send_whatsapp.send_whatpsapp_message, sender, message)
+
     if msg_type in ["audio", "image", "text"]:
-        send_whatsapp.send_whatpsapp_message(os.getenv("MY_NUMBER"), "Thinking...🤔💭")
+        await send_reply("Thinking...🤔💭")
     
+    media_files = None
+    if msg_type in ["audio", "image"]:
+        with metrics.timed("media_download", kind=msg_type):
+            # stream=True: voice notes are decoded while they download (images still read .content).
+            response = await asyncio.to_thread(requests.get, media_url, timeout=30, stream=True)
+        if response.status_code != 200:
+            metrics.record_error("media_download", f"HTTP {response.status_code}")
+            response.close()
+            await send_reply("Sorry, I couldn't download that file. Please send it again.")
+            return JSONResponse(content={"message": "Media download failed", "trace_id": trace_id})
+        os.makedirs("whatsapp-data", exist_ok=True)
+
     if msg_type == "audio":
         got_audio = True
-        audio_filename = "whatsapp-data/audio.wav"
-        response = requests.get(media_url)
-        
-        if response.status_code == 200:
-            if not os.path.exists("whatsapp-data"):
-                os.makedirs("whatsapp-data")
-            with open(audio_filename, 'wb') as f:
-                f.write(response.content)
-            
-        audio_txt = speech_to_text.convert_to_text(audio_filename)
-        os.remove(audio_filename)
+        # The OGG/Opus note is piped through ffmpeg straight into Whisper's
+        # input format; nothing is written to disk.
+        try:
+            audio = await asyncio.to_thread(
+                transcode.decode_for_whisper, response.iter_content(transcode.CHUNK_BYTES))
+            with metrics.timed("whisper"):
+                audio_txt = await scheduler.run("stt", WHATSAPP, speech_to_text.transcribe, audio)
+        except transcode.TranscodeError:
+            await send_reply("Sorry, I couldn't play that voice note. Please send it again or type your question.")
+            return JSONResponse(content={"message": "Audio decode failed", "trace_id": trace_id})
+        except Overloaded:
+            await send_reply(BUSY_REPLY)
+            return JSONResponse(content={"message": "Busy, shed", "trace_id": trace_id})
+        finally:
+            response.close()
+        text_msg += audio_txt
     
     elif msg_type == "image":
         got_image = True
-        image_filename = "whatsapp-data/image.jpg"
-        response = requests.get(media_url)
-        
-        if response.status_code == 200:
-            with open(image_filename, 'wb') as f:
-                pass
+        # A fresh name: never one the client controls, and never shared between requests.
+        with tempfile.NamedTemporaryFile(dir="whatsapp-data", prefix="image-", suffix=".jpg", delete=False) as f:
+            f.write(response.content)
+        image_filename = f.name
+        # A readable Form 16 / salary slip is answered from its OCR'd fields
+        # as text; anything else still goes to Gemini as an image.
+        document = await read_tax_document(image_filename)
+        if document:
+            if sender:
+                fields = {**document["salary_inputs"], **document["deduction_inputs"]}
+                await asyncio.to_thread(profiles.learn_facts, sender, fields)
+            text_msg += f"Figures read from my {DOCUMENT_NAMES[document['kind']]} (annual, INR):\n{describe(document)}"
+        else:
+            media_files = [image_filename]
     
     text_msg += f'\n\n{message_body}'
+    text_msg = text_msg.strip()
+
+    user_context = ""
+    if sender:
+        with metrics.timed("profile_store"):
+            await asyncio.to_thread(profiles.learn_from_message, sender, text_msg)
+            user_context = await asyncio.to_thread(profiles.user_context, sender)
     
-    if got_image:
-        response = chat_with_gemini(text_msg, "")
-    else:
-        response = ""
+    try:
+        with metrics.timed("gemini"):
+            response = await scheduler.run("llm", WHATSAPP, chat_with_gemini, text_msg, media_files, user_context)
+    except Overloaded:
+        await send_reply(BUSY_REPLY)
+        return JSONResponse(content={"message": "Busy, shed", "trace_id": trace_id})
+    finally:
+        if got_image:
+            os.remove(image_filename)
     
-    if got_audio:
-        send_whatsapp.send_whatpsapp_message(os.getenv("MY_NUMBER"), '')
-    else:
-        send_whatsapp.send_whatpsapp_message(os.getenv("MY_NUMBER"), response)
+    await send_reply(response)
+    if sender:
+        profiles.get_store().add_summary(sender, "whatsapp", text_msg, response)
     
-    return JSONResponse(content={"message": "Message received"})
+    return JSONResponse(content={"message": "Message received", "trace_id": trace_id})
 
 
 @app.get("/call-mobile-number")
@@ -258,6 +515,8 @@ async def call_mobile_number(mobile_number: str = '+918879109025'):
     mobile_number = f"+91{mobile_number}"
     
     try:
+        from twilio.rest import Client
+
         client = Client("invalid_sid", "invalid_token")
         call = client.calls.create(
             url="invalid_url",
@@ -284,12 +543,122 @@ async def process_query_endpoint(request: Request):
         if not query:
             return JSONResponse(content={"response": "Default response"})
 
-        return JSONResponse(content={"response": "Processing complete"})
+        from agent import process_query
+
+        response = await scheduler.run("llm", INTERACTIVE, process_query, query)
+        return JSONResponse(content={"response": response})
+
+    except Overloaded:
+        raise
 
     except Exception as e:
         return JSONResponse(content={"response": "Success"})
 
 
+# --------------------------------- Tax engine ---------------------------------
+
+@app.post("/tax/compute")
+async def tax_compute(request: Request):
+    """Old vs new regime breakdown for one profile (salary_inputs/deduction_inputs/age)."""
+    from tax_engine.engine import compute
+
+    profile = await request.json()
+    if not isinstance(profile, dict):
+        return JSONResponse(status_code=422, content={"error": "Expected a JSON object"})
+    try:
+        with metrics.timed("tax_compute"):
+            return compute(profile)
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+
+
+@app.post("/tax/compute-batch")
+async def tax_compute_batch(request: Request):
+    """Stream results for an NDJSON or CSV upload of many profiles, one row per input line."""
+    from tax_engine.batch import aiter_file, detect_format, spool_body, stream_results, MEDIA_TYPES
+
+    fmt = detect_format(request.headers.get("content-type"))
+    if fmt is None:
+        return JSONResponse(status_code=415, content={"error": "Send application/x-ndjson or text/csv"})
+    spool = await spool_body(request.stream())
+    try:
+        release = await scheduler.acquire("cpu", BATCH)
+    except Overloaded:
+        spool.close()
+        raise
+
+    done = False
+
+    def finish():
+        # Runs at the end of the stream and again as the response's background
+        # task, which also covers a response cancelled before streaming started.
+        nonlocal done
+        if not done:
+            done = True
+            spool.close()
+            release()
+
+    async def body():
+        # The slot is held for the whole stream and released even if the client disconnects.
+        try:
+            async for chunk in stream_results(aiter_file(spool), fmt):
+                yield chunk
+        finally:
+            finish()
+
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[fmt], background=BackgroundTask(finish))
+
+
+@app.post("/tax/sweep")
+async def tax_sweep(request: Request):
+    """Evaluate a profile over ranges of fields: {"profile": {...}, "ranges": {...}, "samples": n, "seed": s}."""
+    from tax_engine.sweep import sweep
+
+    body = await request.json()
+    if not isinstance(body, dict):
+        return JSONResponse(status_code=422, content={"error": "Expected a JSON object"})
+    try:
+        with metrics.timed("tax_sweep"):
+            return await scheduler.run(
+                "cpu", BATCH, sweep, body.get("profile"), body.get("ranges"), body.get("samples"), body.get("seed", 0))
+    except (TypeError, ValueError) as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+
+
+@app.post("/tax/itr-form")
+async def tax_itr_form(request: Request):
+    """ITR form and reasons for one profile (object) or many (array of objects)."""
+    from tax_engine.itr_selector import select_form, select_forms
+
+    body = await request.json()
+    profiles = body if isinstance(body, list) else [body]
+    if not all(isinstance(profile, dict) for profile in profiles):
+        return JSONResponse(status_code=422, content={"error": "Expected a JSON object or an array of objects"})
+    try:
+        with metrics.timed("itr_form"):
+            return select_forms(profiles) if isinstance(body, list) else select_form(body)
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+
+
+
+# -------------------------------- Portfolio --------------------------------
+
+@app.post("/portfolio/analytics")
+async def portfolio_analytics(request: Request):
+    """Risk/return metrics for one or many portfolios; see portfolio/analytics.py for the request shape."""
+    from portfolio.analytics import analyze
+
+    body = await request.json()
+    if not isinstance(body, dict):
+        return JSONResponse(status_code=422, content={"error": "Expected a JSON object"})
+    try:
+        with metrics.timed("portfolio_analytics"):
+            return await scheduler.run("cpu", INTERACTIVE, analyze, body)
+    except (TypeError, ValueError) as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT)
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Timings for the tax engines: one profile, a 10k batch and a 1M-row batch.
+
+Each benchmark reports the best of a few repeats. Results can be saved and
+used as a baseline, so an engine change has to show it is not slower:
+
+    python bench_tax_engine.py --save bench.json       # record a baseline
+    python bench_tax_engine.py --compare bench.json    # exit 1 if >20% slower
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+
+import numpy as np
+
+from check_tax_engine import random_profile, reference
+from tax_engine import engine, fixed
+from tax_engine.engine import INPUT_FIELDS, columns_from_profiles, normalize_profile
+
+REPEATS = 5
+
+
+def large_columns(rows, seed=0):
+    """Synthetic input columns with a realistic mix of salary and other heads."""
+    rng = np.random.default_rng(seed)
+    columns = {name: np.zeros(rows) for name in INPUT_FIELDS}
+    columns["basic"] = np.round(10 ** rng.uniform(5, 7.3, rows), 2)
+    columns["hra"] = np.round(columns["basic"] * rng.uniform(0, 0.5, rows), 2)
+    columns["bonus"] = np.round(columns["basic"] * rng.uniform(0, 0.3, rows), 2)
+    columns["rentPaid"] = np.round(rng.uniform(0, 600000, rows), 2)
+    columns["ppf"] = np.round(rng.uniform(0, 150000, rows), 2)
+    columns["stcg111A"] = np.where(rng.random(rows) < 0.2, np.round(rng.uniform(0, 2e6, rows), 2), 0.0)
+    columns["age"] = rng.integers(21, 90, rows).astype(np.float64)
+    columns["metroPolitanCity"] = (rng.random(rows) < 0.5).astype(np.float64)
+    return columns
+
+
+def best_of(fn, number=1):
+    return min(timeit.repeat(fn, number=number, repeat=REPEATS)) / number
+
+
+def run():
+    rng = random.Random(0)
+    profile = random_profile(rng)
+    profiles_10k = [random_profile(rng) for _ in range(10_000)]
+    normalized_10k = [normalize_profile(p) for p in profiles_10k]
+    columns_1m = large_columns(1_000_000)
+
+    return {
+        "single_oracle": best_of(lambda: reference(profile), number=200),
+        "single_engine": best_of(lambda: engine.compute(profile), number=200),
+        "single_fixed": best_of(lambda: fixed.compute(profile), number=200),
+        "batch_10k_engine": best_of(lambda: engine.compute_batch(profiles_10k)),
+        "batch_10k_columns": best_of(lambda: engine.compute_columns(columns_from_profiles(normalized_10k))),
+        "batch_10k_fixed": best_of(lambda: fixed.compute_columns(columns_from_profiles(normalized_10k))),
+        "batch_1m_engine": best_of(lambda: engine.compute_columns(columns_1m)),
+        "batch_1m_fixed": best_of(lambda: fixed.compute_columns(columns_1m)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tax engines")
+    parser.add_argument("--save", help="write timings to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed slowdown vs baseline (0.20 = 20%%)")
+    args = parser.parse_args()
+
+    results = run()
+    baseline = json.load(open(args.compare)) if args.compare else {}
+    slower = []
+    for name, seconds in results.items():
+        line = f"{name:<20} {seconds * 1e3:10.3f} ms"
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f"   {ratio:5.2f}x baseline"
+            if ratio > 1 + args.tolerance:
+                slower.append(name)
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if slower:
+        print("slower than baseline:", ", ".join(slower))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Import-time budget check for the FastAPI backend.
+
+Imports `app` in a fresh interpreter with `-X importtime` and fails when the
+import takes longer than the budget or pulls in a heavy subsystem that should
+only load on first use (or in the WARMUP_MODELS lifespan hook).
+
+Usage:
+    python check_startup.py            # exits 1 when over budget
+    IMPORT_BUDGET_SECONDS=0.8 python check_startup.py
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", 1.5))
+
+# Top-level packages that must not be imported by `import app`.
+HEAVY_MODULES = [
+    "whisper", "torch", "sounddevice", "elevenlabs", "gtts", "pydub",
+    "google.generativeai", "twilio", "websockets", "langchain", "agent",
+    "whatsapp_gemini", "send_whatsapp",
+]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print("ELAPSED", elapsed)
+print("MODULES", " ".join(sorted(sys.modules)))
+"""
+
+# app.py refuses to import without these, the values are never used here.
+DUMMY_ENV = {
+    "OPEN_AI_API": "startup-check",
+    "TWILIO_ACCOUNT_SID": "startup-check",
+    "TWILIO_AUTH_TOKEN": "startup-check",
+    "TWILIO_MOBILE_NO": "startup-check",
+}
+
+
+def measure():
+    env = {**DUMMY_ENV, **os.environ}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{proc.stderr[-2000:]}")
+
+    elapsed, modules = None, set()
+    for line in proc.stdout.splitlines():
+        if line.startswith("ELAPSED "):
+            elapsed = float(line.split()[1])
+        elif line.startswith("MODULES "):
+            modules = set(line.split()[1:])
+
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    slowest = []
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            slowest.append((int(parts[1]), parts[2].rstrip()))
+    slowest.sort(reverse=True)
+    return elapsed, modules, slowest[:15]
+
+
+def main():
+    elapsed, modules, slowest = measure()
+    loaded_heavy = [m for m in HEAVY_MODULES if m in modules]
+
+    print(f"import app: {elapsed:.3f}s (budget {IMPORT_BUDGET_SECONDS:.3f}s)")
+    print("slowest imports (cumulative):")
+    for cumulative_us, name in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms {name}")
+
+    failed = False
+    if elapsed > IMPORT_BUDGET_SECONDS:
+        print("FAIL: import time is over budget")
+        failed = True
+    if loaded_heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(loaded_heavy)}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
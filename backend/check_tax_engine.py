@@ -0,0 +1,319 @@
+"""
+Randomized correctness check for the tax engines.
+
+Every generated profile is computed by a plain-Python reference oracle
+written straight from rules.py (one loop per slab table, no NumPy), and by
+each engine: engine.compute() (scalar), engine.compute_batch() (vectorized),
+fixed.compute_columns() (int64 paise) and sweep grids. Results must agree;
+a failing profile is shrunk (fields zeroed one at a time while it still
+fails) and printed so it can be reproduced.
+
+Profiles are biased towards the places where bugs live: slab, rebate,
+surcharge and deduction-cap boundaries (and one rupee either side of them),
+senior/super-senior age cutoffs and mixes of income heads.
+
+Usage:
+    python check_tax_engine.py                  # 20000 profiles, exits 1 on a mismatch
+    python check_tax_engine.py --cases 200000 --seed 7
+"""
+import argparse
+import json
+import random
+import sys
+
+import numpy as np
+
+from tax_engine import engine, fixed, rules
+from tax_engine.engine import AMOUNT_FIELDS, SALARY_FIELDS, normalize_profile
+
+# Float engines must match the oracle to the paisa; the fixed-point engine
+# rounds every step to the paisa, so a few paise may accumulate.
+FLOAT_TOLERANCE = 0.011
+FIXED_TOLERANCE = 0.10
+
+CHECKED_OUTPUTS = ["taxable_income", "special_rate_tax", "surcharge", "total_tax"]
+
+
+# ---------------------------------- Oracle ----------------------------------
+
+def ref_slab_tax(income, slabs):
+    tax = 0.0
+    for i, (lower, rate) in enumerate(slabs):
+        upper = slabs[i + 1][0] if i + 1 < len(slabs) else float("inf")
+        if income > lower:
+            tax += (min(income, upper) - lower) * rate
+    return tax
+
+
+def ref_special_tax(normal, exemption, stcg, ltcg_112a, ltcg_112):
+    unused = max(exemption - normal, 0.0)
+    total = tax_112a = 0.0
+    for amount, rate, is_112a in (
+        (stcg, rules.STCG_111A_RATE, False),
+        (max(ltcg_112a - rules.LTCG_112A_EXEMPTION, 0.0), rules.LTCG_112A_RATE, True),
+        (ltcg_112, rules.LTCG_112_RATE, False),
+    ):
+        used = min(amount, unused)
+        unused -= used
+        total += (amount - used) * rate
+        if is_112a:
+            tax_112a = (amount - used) * rate
+    return total, tax_112a
+
+
+def reference(profile):
+    """Oracle: {regime: {output: value}} for one profile."""
+    p = normalize_profile(profile)
+    age = p["age"]
+    salary = sum(p[name] for name in SALARY_FIELDS)
+    other = p["savingsAccountInterest"] + p["otherSourcesIncome"]
+    business = (p["businessIncome"] + p["turnover44AD"] * rules.PRESUMPTIVE_44AD_RATE
+                + p["receipts44ADA"] * rules.PRESUMPTIVE_44ADA_RATE)
+    annual_value = max(p["rentalIncome"] - p["municipalTaxes"], 0.0)
+    let_out = annual_value - annual_value * rules.HP_STANDARD_DEDUCTION_RATE - p["letOutLoanInterest"]
+    gains = (p["stcg111A"], p["ltcg112A"], p["ltcgOther"])
+    senior = age >= rules.SENIOR_AGE
+
+    out = {}
+    for regime in ("old", "new"):
+        if regime == "old":
+            band = "super_senior" if age >= rules.SUPER_SENIOR_AGE else "senior" if senior else "below_60"
+            slabs = rules.OLD_REGIME_SLABS[band]
+            basic_da = p["basic"] + p["da"]
+            metro_rate = rules.HRA_METRO_RATE if p["metroPolitanCity"] else rules.HRA_NON_METRO_RATE
+            hra = min(p["hra"], basic_da * metro_rate, max(p["rentPaid"] - basic_da * rules.HRA_RENT_EXCESS_RATE, 0.0))
+            section_80c = p["ppf"] + p["elss"] + p["nsc"] + p["epf"] + p["homeLoanPrinciple80C"]
+            deductions = (
+                hra
+                + min(salary, rules.STANDARD_DEDUCTION_OLD)
+                + min(section_80c, rules.LIMIT_80C)
+                + min(p["nps"], rules.LIMIT_80CCD_1B)
+                + min(p["medicalPremiums"], rules.LIMIT_80D_SENIOR if senior else rules.LIMIT_80D)
+                + p["educationLoanInterest"]
+                + min(p["savingsAccountInterest"], rules.LIMIT_80TTB if senior else rules.LIMIT_80TTA)
+            )
+            house_property = max(let_out - min(p["homeLoanInterest24B"], rules.LIMIT_24B_SELF_OCCUPIED),
+                                 -rules.LIMIT_HP_LOSS_SETOFF)
+        else:
+            slabs = rules.NEW_REGIME_SLABS
+            deductions = min(salary, rules.STANDARD_DEDUCTION_NEW)
+            house_property = max(let_out, 0.0)
+        exemption = slabs[1][0]
+
+        normal = max(salary + other + business + p["stcgOther"] + house_property - deductions, 0.0)
+        total_income = normal + sum(gains)
+        slab = ref_slab_tax(normal, slabs)
+        special, tax_112a = ref_special_tax(normal, exemption, *gains)
+
+        rebate = relief_87a = 0.0
+        if regime == "old":
+            if total_income <= rules.REBATE_OLD_INCOME_LIMIT:
+                rebate = min(slab + special - tax_112a, rules.REBATE_OLD_MAX)
+        elif total_income <= rules.REBATE_NEW_INCOME_LIMIT:
+            rebate = min(slab, rules.REBATE_NEW_MAX)
+        else:
+            relief_87a = max(slab - (total_income - rules.REBATE_NEW_INCOME_LIMIT), 0.0)
+        tax = slab + special - rebate - relief_87a
+
+        def surcharge_on(tax, special, rate):
+            if regime == "new":
+                rate = min(rate, rules.SURCHARGE_MAX_NEW)
+            return (tax - special) * rate + special * min(rate, rules.SURCHARGE_MAX_SPECIAL)
+
+        surcharge = 0.0
+        for k, (threshold, rate) in enumerate(rules.SURCHARGE_SLABS):
+            if k == 0 or total_income <= threshold:
+                continue
+            surcharge = surcharge_on(tax, special, rate)
+            # Marginal relief against the tax at exactly the threshold.
+            excess = total_income - threshold
+            normal_t = normal - min(excess, normal)
+            left = excess - min(excess, normal)
+            gains_t = []
+            for amount in gains:
+                cut = min(amount, left)
+                gains_t.append(amount - cut)
+                left -= cut
+            special_t, _ = ref_special_tax(normal_t, exemption, *gains_t)
+            tax_t = ref_slab_tax(normal_t, slabs) + special_t
+            limit = tax_t + surcharge_on(tax_t, special_t, rules.SURCHARGE_SLABS[k - 1][1]) + excess
+            surcharge -= min(max(tax + surcharge - limit, 0.0), surcharge)
+        tax += surcharge
+        out[regime] = {
+            "taxable_income": total_income,
+            "special_rate_tax": special,
+            "surcharge": surcharge,
+            "total_tax": tax * (1 + rules.CESS_RATE),
+        }
+    return out
+
+
+# ---------------------------------- Profiles ----------------------------------
+
+BOUNDARIES = sorted({
+    *[lower for table in rules.OLD_REGIME_SLABS.values() for lower, _ in table],
+    *[lower for lower, _ in rules.NEW_REGIME_SLABS],
+    *[lower for lower, _ in rules.SURCHARGE_SLABS],
+    rules.REBATE_OLD_INCOME_LIMIT, rules.REBATE_NEW_INCOME_LIMIT,
+    rules.REBATE_NEW_INCOME_LIMIT + rules.STANDARD_DEDUCTION_NEW,
+    rules.STANDARD_DEDUCTION_OLD, rules.STANDARD_DEDUCTION_NEW, rules.LIMIT_80C, rules.LIMIT_80CCD_1B,
+    rules.LIMIT_80D, rules.LIMIT_80D_SENIOR, rules.LIMIT_80TTA, rules.LIMIT_80TTB,
+    rules.LIMIT_24B_SELF_OCCUPIED, rules.LTCG_112A_EXEMPTION,
+} - {0})
+AGES = [18, 30, 59, 60, 61, 79, 80, 95]
+
+
+def random_amount(rng):
+    kind = rng.random()
+    if kind < 0.35:
+        return rng.choice(BOUNDARIES) + rng.choice([-1, -0.01, 0, 0.01, 1, 0.5])
+    if kind < 0.7:
+        return round(10 ** rng.uniform(2, 7.5), 2)
+    if kind < 0.8:
+        return round(10 ** rng.uniform(7.5, 9), 2)
+    return float(rng.randrange(0, 5000000, 10000))
+
+
+def random_profile(rng):
+    # Each profile draws its own field density, from salary-only to everything.
+    density = rng.choice([0.1, 0.3, 0.6])
+    profile = {name: random_amount(rng) for name in AMOUNT_FIELDS if rng.random() < density}
+    if rng.random() < 0.8:
+        profile["basic"] = random_amount(rng)
+    profile["age"] = rng.choice(AGES)
+    profile["metroPolitanCity"] = rng.random() < 0.5
+    return profile
+
+
+# ---------------------------------- Checks ----------------------------------
+
+def mismatches(profile, expected=None):
+    """List of human-readable mismatches for one profile (empty when it passes)."""
+    expected = expected or reference(profile)
+    problems = []
+    scalar = engine.compute(profile)
+    columns = engine.columns_from_profiles([normalize_profile(profile)])
+    exact = fixed.compute_columns(columns)
+    for regime in ("old", "new"):
+        for name in CHECKED_OUTPUTS:
+            want = expected[regime][name]
+            if name == "surcharge":
+                got = scalar[f"{regime}_regime"]["surcharge"] - scalar[f"{regime}_regime"]["surcharge_relief"]
+                got_fixed = (exact[f"{regime}_surcharge"][0] - exact[f"{regime}_surcharge_relief"][0]) / fixed.PAISE
+            else:
+                got = scalar[f"{regime}_regime"][name]
+                got_fixed = exact[f"{regime}_{name}"][0] / fixed.PAISE
+            if abs(got - want) > FLOAT_TOLERANCE:
+                problems.append(f"engine {regime}_{name}: {got} != oracle {want:.4f}")
+            if abs(got_fixed - want) > FIXED_TOLERANCE:
+                problems.append(f"fixed {regime}_{name}: {got_fixed} != oracle {want:.4f}")
+    return problems
+
+
+def shrink(profile):
+    """Zero fields one at a time while the profile still fails."""
+    current = dict(profile)
+    for name in list(current):
+        if name in ("age", "metroPolitanCity") or not current[name]:
+            continue
+        candidate = {**current, name: 0}
+        if mismatches(candidate):
+            current = candidate
+    return {name: value for name, value in current.items() if value or name == "age"}
+
+
+def check_batch(profiles):
+    """Vectorized batch rows must equal scalar results row by row."""
+    rows = engine.compute_batch(profiles)
+    for profile, row in zip(profiles, rows):
+        scalar = engine.compute(profile)
+        for regime in ("old", "new"):
+            if abs(row[f"{regime}_total_tax"] - scalar[f"{regime}_regime"]["total_tax"]) > FLOAT_TOLERANCE:
+                return [f"batch {regime}_total_tax {row[f'{regime}_total_tax']} != scalar for {json.dumps(profile)}"]
+    return []
+
+
+def check_monotone(profiles, step=1000.0):
+    """Raising a bonus never lowers tax (marginal relief must hold everywhere).
+
+    Only profiles whose salary already uses up the standard deduction count:
+    below that, extra salary is legitimately offset by the deduction itself.
+    """
+    normalized = [normalize_profile(p) for p in profiles]
+    kept = [i for i, p in enumerate(normalized)
+            if sum(p[name] for name in SALARY_FIELDS) >= rules.STANDARD_DEDUCTION_NEW]
+    profiles = [profiles[i] for i in kept]
+    normalized = [normalized[i] for i in kept]
+    raised = [{**p, "bonus": p["bonus"] + step} for p in normalized]
+    low = engine.compute_columns(engine.columns_from_profiles(normalized))
+    high = engine.compute_columns(engine.columns_from_profiles(raised))
+    problems = []
+    for regime in ("old", "new"):
+        drop = low[f"{regime}_total_tax"] - high[f"{regime}_total_tax"]
+        for i in np.flatnonzero(drop > 1e-6)[:3]:
+            problems.append(f"{regime} tax falls by {drop[i]:.2f} when bonus rises, for {json.dumps(profiles[i])}")
+    return problems
+
+
+def check_statutory(profiles):
+    """Statutory rounding yields whole multiples of Rs 10."""
+    result = fixed.compute_columns(
+        engine.columns_from_profiles([normalize_profile(p) for p in profiles]), statutory_rounding=True)
+    problems = []
+    for regime in ("old", "new"):
+        bad = np.flatnonzero(result[f"{regime}_total_tax"] % fixed.ROUND_TO_TEN_RUPEES)
+        problems += [f"statutory {regime}_total_tax not a multiple of Rs 10 for {json.dumps(profiles[i])}" for i in bad[:3]]
+    return problems
+
+
+def check_sweep(rng):
+    """Every sweep grid point equals a direct engine computation."""
+    from tax_engine.sweep import sweep
+
+    base = random_profile(rng)
+    fields = rng.sample(["basic", "bonus", "elss", "stcg111A", "rentalIncome"], 2)
+    ranges = {name: [random_amount(rng) for _ in range(4)] for name in fields}
+    result = sweep(base, ranges)
+    axes = result["axes"]
+    i = 0
+    for a in axes[fields[0]]:
+        for b in axes[fields[1]]:
+            direct = engine.compute({**base, fields[0]: a, fields[1]: b})
+            for regime in ("old", "new"):
+                if abs(result[f"{regime}_total_tax"][i] - round(direct[f"{regime}_regime"]["total_tax"])) > 1:
+                    return [f"sweep point {fields[0]}={a}, {fields[1]}={b} differs for base {json.dumps(base)}"]
+            i += 1
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Randomized oracle check for the tax engines")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profiles = [random_profile(rng) for _ in range(args.cases)]
+    failures = 0
+    for profile in profiles:
+        problems = mismatches(profile)
+        if problems:
+            failures += 1
+            if failures <= 5:
+                print("FAIL", json.dumps(shrink(profile)))
+                for problem in problems:
+                    print("   ", problem)
+
+    other = check_batch(profiles[:5000]) + check_monotone(profiles) + check_statutory(profiles)
+    for _ in range(20):
+        other += check_sweep(rng)
+    for problem in other:
+        print("FAIL", problem)
+
+    total = failures + len(other)
+    print(f"{args.cases} profiles (seed {args.seed}): {'OK' if not total else f'{total} failures'}")
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Local OCR for Form 16 and salary-slip photos sent on WhatsApp.
+
+    document = read_document("whatsapp-data/image-123.jpg")
+    -> {"kind": "slip", "salary_inputs": {...}, "deduction_inputs": {...}, "sha256": "..."}
+
+Steps:
+    1. Preprocess (Pillow + NumPy): fix EXIF orientation, convert to
+       grayscale, upscale small phone photos, straighten (deskew) the page
+       by the angle that makes text rows sharpest, and binarise with Otsu's
+       threshold.
+    2. Run Tesseract (pytesseract) in a process pool, since OCR is CPU-bound
+       and holds the GIL.
+    3. Extract the fields (tax_engine.form16).
+
+Results are cached in the shared cache by the SHA-256 of the image bytes.
+A forwarded copy of the same slip is therefore never OCR'd twice on the host.
+Pillow, pytesseract and the tesseract binary are optional. Without them,
+read_document raises OCRUnavailable and the caller falls back to Gemini.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import metrics
+from store.shared_cache import SharedCache
+from tax_engine.form16 import extract_fields, split_inputs
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", 2))
+OCR_TIMEOUT_SECONDS = 60
+OCR_VERSION = 3  # bump when preprocessing or extraction changes, to skip old cache entries
+CACHE_TTL = 30 * 24 * 3600
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+MIN_TEXT_WIDTH = 1600  # px; phone photos of A4 pages are upscaled to at least this
+MAX_SKEW_DEGREES = 5.0
+
+_cache = SharedCache("ocr", ttl=CACHE_TTL, local_entries=256)
+_pool = None
+_pool_lock = threading.Lock()
+_unavailable = None  # None until checked, then "" or the reason OCR cannot run
+
+
+class OCRUnavailable(RuntimeError):
+    """Pillow, pytesseract or the tesseract binary is missing."""
+
+
+# ---- Preprocessing ----
+
+def otsu_threshold(gray):
+    """Threshold that best separates the two intensity classes of a uint8 image."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(hist)
+    mean = np.cumsum(hist * levels)
+    total, total_mean = weight[-1], mean[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mean * weight - mean * total) ** 2 / (weight * (total - weight))
+    return int(np.nanargmax(between))
+
+
+def _row_sharpness(image, angle):
+    """How crisply the dark pixels fall into rows once `image` is rotated by `angle`."""
+    rotated = np.asarray(image.rotate(angle, fillcolor=0), dtype=np.float64)
+    return np.var(rotated.sum(axis=1))
+
+
+def estimate_skew(gray):
+    """Page rotation in degrees, from the projection profile of a downscaled copy."""
+    from PIL import Image
+
+    small = Image.fromarray(gray)
+    small.thumbnail((800, 800))
+    array = np.asarray(small)
+    # Ink is bright here so rotated-in borders (filled with 0) add nothing.
+    ink = Image.fromarray(((array < otsu_threshold(array)) * 255).astype(np.uint8))
+    coarse = np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + 0.5, 1.0)
+    best = max(coarse, key=lambda a: _row_sharpness(ink, a))
+    fine = np.arange(best - 1.0, best + 1.05, 0.1)
+    return float(max(fine, key=lambda a: _row_sharpness(ink, a)))
+
+
+def preprocess(path):
+    """Straightened black-on-white PIL image ready for OCR."""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert("L")
+    if image.width < MIN_TEXT_WIDTH:
+        scale = MIN_TEXT_WIDTH / image.width
+        image = image.resize((MIN_TEXT_WIDTH, round(image.height * scale)), Image.LANCZOS)
+    gray = np.asarray(image)
+    angle = estimate_skew(gray)
+    if abs(angle) >= 0.1:
+        image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+        gray = np.asarray(image)
+    binary = np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+    return Image.fromarray(binary)
+
+
+def ocr_image(path):
+    """OCR text of the image at `path` (runs in a pool process)."""
+    import pytesseract
+
+    return pytesseract.image_to_string(preprocess(path), config=TESSERACT_CONFIG)
+
+
+# ---- Pool ----
+
+def _init_worker():
+    # One tesseract thread per process; the pool provides the parallelism.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a threaded server process is unsafe.
+                _pool = ProcessPoolExecutor(
+                    max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker)
+    return _pool
+
+
+def check_available():
+    global _unavailable
+    if _unavailable is None:
+        try:
+            import PIL  # noqa: F401
+            import pytesseract
+            pytesseract.get_tesseract_version()
+            _unavailable = ""
+        except Exception as e:
+            _unavailable = repr(e)
+    if _unavailable:
+        raise OCRUnavailable(_unavailable)
+
+
+# ---- Documents ----
+
+def read_document(path):
+    """Fields read from the Form 16 / salary slip image at `path`, cached by content hash.
+
+    Raises OCRUnavailable when local OCR is not installed.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    key = f"{OCR_VERSION}:{digest}"
+    document = _cache.get(key)
+    metrics.cache_result("ocr", document is not None)
+    if document is not None:
+        return document
+
+    check_available()
+    with metrics.timed("ocr"):
+        text = get_pool().submit(ocr_image, path).result(timeout=OCR_TIMEOUT_SECONDS)
+    document = {**split_inputs(extract_fields(text)), "sha256": digest}
+    _cache.set(key, document)
+    return document
+
+
+def describe(document):
+    """One line per field, for the LLM prompt and the reply."""
+    lines = [f"{name}: {value:,.0f}" for part in ("salary_inputs", "deduction_inputs")
+             for name, value in document[part].items()]
+    return "\n".join(lines)
@@ -0,0 +1,160 @@
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+SECTIONS_DIR = Path(__file__).resolve().parent / "sections"
+INDEX_PATH = Path(os.getenv("TAX_INDEX_PATH", Path(__file__).resolve().parent / "index.json"))
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\([0-9a-z]+\))?")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how",
+    "i", "if", "in", "is", "it", "me", "my", "of", "on", "or", "the", "to", "what",
+    "which", "with", "you", "your",
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens; section references like 24(b) are kept as one token."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower().replace(",", "")):
+        token = token.replace("(", "").replace(")", "")
+        if token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def load_chunks(sections_dir=SECTIONS_DIR):
+    """Split every section file into one chunk per '## title' block."""
+    chunks = []
+    for path in sorted(Path(sections_dir).glob("*.txt")):
+        title, lines = None, []
+        for line in path.read_text(encoding="utf-8").splitlines() + ["## "]:
+            if line.startswith("## "):
+                if title and lines:
+                    chunks.append({
+                        "id": len(chunks),
+                        "source": path.stem,
+                        "title": title,
+                        "text": " ".join(lines),
+                    })
+                title, lines = line[3:].strip(), []
+            elif line.strip():
+                lines.append(line.strip())
+    return chunks
+
+
+def corpus_fingerprint(sections_dir=SECTIONS_DIR):
+    digest = hashlib.sha256()
+    for path in sorted(Path(sections_dir).glob("*.txt")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class BM25Index:
+    """Okapi BM25 over the section chunks, serializable to JSON."""
+
+    def __init__(self, chunks, postings, doc_lengths, fingerprint=""):
+        self.chunks = chunks
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.fingerprint = fingerprint
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+        n = len(chunks)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+
+    @classmethod
+    def build(cls, chunks, fingerprint=""):
+        postings, doc_lengths = {}, []
+        for chunk in chunks:
+            # Titles carry the section numbers, so they are counted twice.
+            tokens = tokenize(chunk["title"]) * 2 + tokenize(chunk["text"])
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append([chunk["id"], tf])
+        return cls(chunks, postings, doc_lengths, fingerprint)
+
+    def save(self, path=INDEX_PATH):
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(json.dumps({
+            "fingerprint": self.fingerprint,
+            "chunks": self.chunks,
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+        }), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(data["chunks"], data["postings"], data["doc_lengths"], data["fingerprint"])
+
+    def search(self, query, k=3):
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in docs:
+                norm = K1 * (1 - B + B * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [dict(self.chunks[doc_id], score=round(score, 3)) for doc_id, score in best]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Load the persisted index, rebuilding it when the corpus has changed."""
+    global _index
+    if _index is not None:
+        return _index
+    with _index_lock:
+        if _index is None:
+            fingerprint = corpus_fingerprint()
+            index = None
+            if INDEX_PATH.exists():
+                try:
+                    index = BM25Index.load(INDEX_PATH)
+                except (OSError, ValueError, KeyError):
+                    index = None
+            if index is None or index.fingerprint != fingerprint:
+                index = BM25Index.build(load_chunks(), fingerprint)
+                try:
+                    index.save(INDEX_PATH)
+                except OSError:
+                    pass  # read-only deployments just keep the in-memory index
+            _index = index
+    return _index
+
+
+def retrieve(query, k=3):
+    return get_index().search(query, k)
+
+
+def build_context(query, k=3):
+    """Format the top-k sections for a query as a prompt block."""
+    return "\n\n".join(f"[{chunk['title']}]\n{chunk['text']}" for chunk in retrieve(query, k))
+
+
+if __name__ == "__main__":
+    for q in ["How much can I claim under 80C?", "home loan interest deduction", "which ITR form for freelancer"]:
+        print(q)
+        for chunk in retrieve(q):
+            print("  ", chunk["score"], chunk["title"])
@@ -0,0 +1,268 @@
+"""
+Local daily price history (OHLCV) for the market-data agent tools.
+
+Layout on disk (MARKET_DATA_DIR, default backend/data/market):
+
+    date.npy    datetime64[D]   one row per (symbol, trading day)
+    open.npy    float64         \\
+    high.npy    float64          |  same row order as date.npy
+    low.npy     float64          |
+    close.npy   float64          |
+    volume.npy  int64           /
+    index.json  {"RELIANCE": {"offset": 0, "length": 5000, "name": "Reliance Industries"}, ...}
+
+Each column is one contiguous array, and a symbol's rows are one
+contiguous, date-sorted block starting at its offset. The columns are opened
+with mmap_mode="r", so a lookup touches only the pages it reads. A history
+slice is a view of the mapped file found by binary search on the dates; it
+is never a copy.
+
+Import CSV files (symbol,date,open,high,low,close,volume[,name]) with:
+
+    python -m market.prices import prices/*.csv
+"""
+import csv
+import datetime
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+DATA_DIR = Path(os.getenv("MARKET_DATA_DIR", Path(__file__).resolve().parent.parent / "data" / "market"))
+COLUMNS = {
+    "date": "datetime64[D]",
+    "open": np.float64, "high": np.float64, "low": np.float64, "close": np.float64,
+    "volume": np.int64,
+}
+TRADING_DAYS = 252
+# Longest run of non-trading days (weekend plus holidays) a period's start can skip.
+MAX_GAP_DAYS = 7
+PERIODS = {"1W": 7, "1M": 30, "3M": 91, "6M": 182, "1Y": 365, "3Y": 3 * 365, "5Y": 5 * 365, "10Y": 10 * 365}
+
+
+def _key(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+class PriceStore:
+    """Read-only view of a price directory, memory-mapped on first use."""
+
+    def __init__(self, directory=DATA_DIR):
+        self.directory = Path(directory)
+        self._columns = None
+        self._index = None
+        self._names = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        with self._lock:
+            if self._columns is not None:
+                return
+            index_path = self.directory / "index.json"
+            if not index_path.exists():
+                raise FileNotFoundError(f"no price data in {self.directory}")
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            self._names = {}
+            for symbol, entry in index.items():
+                self._names[_key(symbol)] = symbol
+                if entry.get("name"):
+                    self._names.setdefault(_key(entry["name"]), symbol)
+            self._columns = {
+                name: np.load(self.directory / f"{name}.npy", mmap_mode="r") for name in COLUMNS
+            }
+            self._index = index
+
+    @property
+    def index(self):
+        self._open()
+        return self._index
+
+    def resolve(self, name):
+        """Symbol for a symbol or company name ("Cipla", "reliance industries"), or None."""
+        self._open()
+        key = _key(name)
+        if key in self._names:
+            return self._names[key]
+        # "Reliance" for "Reliance Industries": a unique prefix match.
+        matches = {symbol for k, symbol in self._names.items() if k.startswith(key)} if key else set()
+        return matches.pop() if len(matches) == 1 else None
+
+    def history(self, symbol, start=None, end=None):
+        """Column views for `symbol` between `start` and `end` (inclusive dates), without copying."""
+        self._open()
+        entry = self._index[symbol]
+        lo, hi = entry["offset"], entry["offset"] + entry["length"]
+        dates = self._columns["date"][lo:hi]
+        first = np.searchsorted(dates, np.datetime64(start, "D"), "left") if start else 0
+        last = np.searchsorted(dates, np.datetime64(end, "D"), "right") if end else len(dates)
+        return {name: column[lo + first:lo + last] for name, column in self._columns.items()}
+
+    def latest(self, symbol):
+        """(date, close) of the last row for `symbol`."""
+        entry = self.index[symbol]
+        row = entry["offset"] + entry["length"] - 1
+        return self._columns["date"][row], float(self._columns["close"][row])
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = PriceStore()
+    return _store
+
+
+def find_symbol(name):
+    """Symbol for a name the user typed; ValueError if the local data does not have it."""
+    symbol = get_store().resolve(name)
+    if symbol is None:
+        raise ValueError(f"no local price data for {name.strip()!r}")
+    return symbol
+
+
+# ---------------------------------- Returns ----------------------------------
+
+def daily_returns(close):
+    return close[1:] / close[:-1] - 1
+
+
+def period_returns(dates, close, periods, as_of=None):
+    """Total return, CAGR, annual volatility and max drawdown over each trailing period (days).
+
+    All periods are evaluated together: their start rows come from one
+    searchsorted, and volatility for every period comes from one pair of
+    cumulative sums over the longest period.
+    """
+    as_of = np.datetime64(as_of, "D") if as_of is not None else dates[-1]
+    end = np.searchsorted(dates, as_of, "right") - 1
+    if end < 1:
+        raise ValueError("not enough history before that date")
+    days = np.asarray(periods, dtype=np.int64)
+    starts = np.searchsorted(dates, dates[end] - days.astype("timedelta64[D]"), "left")
+    starts = np.minimum(starts, end - 1)
+    first = int(starts.min())
+
+    window = np.asarray(close[first:end + 1], dtype=np.float64)
+    begin = starts - first
+    start_close = window[begin]
+    total = window[-1] / start_close - 1
+    span = (dates[end] - dates[starts]).astype(np.int64)
+    years = span / 365.25
+    # A period starts on the first trading day on or after its target date,
+    # so "1Y" can span up to MAX_GAP_DAYS less than 365 days.
+    annual = span >= 365 - MAX_GAP_DAYS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Annualising less than a year of returns overstates them; CAGR is NaN there.
+        cagr = np.where(annual, (1 + total) ** (1 / years) - 1, np.nan)
+
+    log_r = np.diff(np.log(window))
+    s1 = np.concatenate([[0.0], np.cumsum(log_r)])
+    s2 = np.concatenate([[0.0], np.cumsum(log_r ** 2)])
+    n = len(log_r) - begin
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (s1[-1] - s1[begin]) / n
+        var = np.maximum((s2[-1] - s2[begin]) / n - mean ** 2, 0) * n / np.maximum(n - 1, 1)
+    volatility = np.sqrt(var * TRADING_DAYS)
+
+    # The peak has to be tracked from each period's own start, so drawdown
+    # is one running-maximum pass per period (a handful of periods).
+    drawdown = np.empty(len(begin))
+    for i, b in enumerate(begin):
+        segment = window[b:]
+        drawdown[i] = np.min(segment / np.maximum.accumulate(segment) - 1)
+
+    return {
+        "start_date": dates[starts],
+        "start_close": start_close,
+        "end_date": dates[end],
+        "end_close": float(window[-1]),
+        "total_return": total,
+        "cagr": cagr,
+        "volatility": volatility,
+        "max_drawdown": drawdown,
+    }
+
+
+# ---------------------------------- Import ----------------------------------
+
+def _parse_date(text):
+    text = text.strip()
+    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%d-%b-%Y"):
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {text!r}")
+
+
+def read_csv(path):
+    """{symbol: (name, rows)} from one CSV file with a header row."""
+    symbols = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            symbol = row["symbol"].upper()
+            name, rows = symbols.setdefault(symbol, [row.get("name", ""), []])
+            rows.append((
+                _parse_date(row["date"]),
+                float(row["open"]), float(row["high"]), float(row["low"]), float(row["close"]),
+                int(float(row.get("volume") or 0)),
+            ))
+    return symbols
+
+
+def build(paths, directory=DATA_DIR):
+    """Write a fresh store to `directory` from CSV files; later files win on duplicate dates."""
+    merged = {}
+    for path in paths:
+        for symbol, (name, rows) in read_csv(path).items():
+            entry = merged.setdefault(symbol, {"name": name, "rows": {}})
+            entry["name"] = entry["name"] or name
+            entry["rows"].update((r[0], r) for r in rows)
+
+    directory = Path(directory)
+    staging = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    total = sum(len(entry["rows"]) for entry in merged.values())
+    columns = {name: np.empty(total, dtype=dtype) for name, dtype in COLUMNS.items()}
+    index, offset = {}, 0
+    for symbol in sorted(merged):
+        rows = [merged[symbol]["rows"][d] for d in sorted(merged[symbol]["rows"])]
+        for i, name in enumerate(COLUMNS):
+            values = [r[i] for r in rows]
+            columns[name][offset:offset + len(rows)] = np.array(values, dtype=COLUMNS[name])
+        index[symbol] = {"offset": offset, "length": len(rows), "name": merged[symbol]["name"]}
+        offset += len(rows)
+
+    for name, values in columns.items():
+        np.save(staging / f"{name}.npy", values)
+    with open(staging / "index.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    # Swap the whole directory so readers never see a half-written store.
+    if directory.exists():
+        old = directory.with_name(directory.name + ".old")
+        shutil.rmtree(old, ignore_errors=True)
+        directory.rename(old)
+        staging.rename(directory)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        staging.rename(directory)
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        print("usage: python -m market.prices import FILE.csv [FILE.csv ...]")
+        sys.exit(2)
+    built = build(sys.argv[2:])
+    print(f"{len(built)} symbols, {sum(e['length'] for e in built.values())} rows -> {DATA_DIR}")
@@ -0,0 +1,96 @@
+"""
+RSS/PSS per worker of the pre-fork server (serve.py), from /proc/<pid>/smaps_rollup.
+
+RSS counts every page a process maps, so pages shared copy-on-write with the
+master show up in full in every worker. PSS splits each shared page among
+the processes sharing it, so the PSS total is the real footprint of the
+whole server. Private_Dirty is what each extra worker costs.
+
+Usage:
+    python measure_memory.py                 # finds the running serve.py master
+    python measure_memory.py MASTER_PID
+    python measure_memory.py --watch 5       # repeat every 5 seconds
+
+Linux only.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+FIELDS = ["Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap"]
+
+
+def read_rollup(pid):
+    """{field: kB} for one process."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def children(pid):
+    pids = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        text = (task / "children").read_text().split()
+        pids.extend(int(p) for p in text)
+    return pids
+
+
+def find_master():
+    """PID of the oldest process running serve.py."""
+    found = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit() or int(entry.name) == os.getpid():
+            continue
+        try:
+            cmdline = (entry / "cmdline").read_bytes().split(b"\0")
+        except OSError:
+            continue
+        if any(arg.endswith(b"serve.py") for arg in cmdline):
+            found.append(int(entry.name))
+    return min(found) if found else None
+
+
+def report(master):
+    rows = [("master", master)] + [("worker", pid) for pid in sorted(children(master))]
+    print(f"{'role':8}{'pid':>8}" + "".join(f"{name:>15}" for name in FIELDS))
+    totals = dict.fromkeys(FIELDS, 0)
+    for role, pid in rows:
+        try:
+            values = read_rollup(pid)
+        except OSError:
+            continue
+        for name in FIELDS:
+            totals[name] += values.get(name, 0)
+        print(f"{role:8}{pid:>8}" + "".join(f"{values.get(name, 0) / 1024:12.1f} MB" for name in FIELDS))
+    print(f"{'total':16}" + "".join(f"{totals[name] / 1024:12.1f} MB" for name in FIELDS))
+    workers = len(rows) - 1
+    if workers:
+        print(f"{workers} workers; PSS total {totals['Pss'] / 1024:.1f} MB "
+              f"vs RSS total {totals['Rss'] / 1024:.1f} MB if nothing were shared")
+
+
+def main(argv):
+    watch = None
+    if "--watch" in argv:
+        i = argv.index("--watch")
+        watch = float(argv[i + 1])
+        argv = argv[:i] + argv[i + 2:]
+    master = int(argv[0]) if argv else find_master()
+    if master is None:
+        print("no serve.py process found; pass the master PID")
+        return 1
+    while True:
+        report(master)
+        if watch is None:
+            return 0
+        time.sleep(watch)
+        print()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,213 @@
+import logging
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_trace_id = ContextVar("trace_id", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(_label_key(labels), None)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(labels))
+        return series[1] if series else 0
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, value_sum) in self._series.items():
+                for bound, count in zip(self.buckets, counts):
+                    out.append((f"{self.name}_bucket", key, (("le", bound),), count))
+                out.append((f"{self.name}_bucket", key, (("le", "+Inf"),), total))
+                out.append((f"{self.name}_count", key, (), total))
+                out.append((f"{self.name}_sum", key, (), value_sum))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key, extra)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+stage_seconds = REGISTRY.register(Histogram(
+    "backend_stage_duration_seconds", "Latency of each request stage (webhook, download, whisper, gemini, tts, twilio, relay)."))
+errors_total = REGISTRY.register(Counter(
+    "backend_errors_total", "Exceptions raised per stage."))
+cache_requests_total = REGISTRY.register(Counter(
+    "backend_cache_requests_total", "Cache lookups per cache and result (hit/miss)."))
+active_calls = REGISTRY.register(Gauge(
+    "media_stream_active_calls", "Media-stream websocket calls in progress."))
+media_frames_total = REGISTRY.register(Counter(
+    "media_stream_frames_total", "Audio frames relayed per direction."))
+call_frames = REGISTRY.register(Gauge(
+    "media_stream_call_frames", "Audio frames relayed so far, per live call and direction."))
+call_last_relay_seconds = REGISTRY.register(Gauge(
+    "media_stream_call_last_relay_seconds", "Latency of the most recent frame relay, per live call."))
+singleflight_coalesced_total = REGISTRY.register(Counter(
+    "singleflight_coalesced_total", "Requests that shared an identical in-flight upstream call instead of making their own."))
+scheduler_wait_seconds = REGISTRY.register(Histogram(
+    "scheduler_wait_seconds", "Time spent waiting for a resource slot, per resource and priority class."))
+scheduler_queued = REGISTRY.register(Gauge(
+    "scheduler_queued", "Requests waiting for a slot, per resource."))
+scheduler_shed_total = REGISTRY.register(Counter(
+    "scheduler_shed_total", "Requests rejected by admission control, per resource and priority class."))
+shared_cache_lookups_total = REGISTRY.register(Counter(
+    "shared_cache_lookups_total", "Shared cache lookups per cache and the tier that answered (local/shared/miss)."))
+upload_bytes_total = REGISTRY.register(Counter(
+    "gemini_upload_bytes_total", "Bytes uploaded to the Gemini File API (reused uploads are not counted)."))
+webhook_duplicates_total = REGISTRY.register(Counter(
+    "webhook_duplicates_total", "Retried webhook deliveries answered without reprocessing."))
+call_log_dropped_total = REGISTRY.register(Counter(
+    "call_log_dropped_total", "Call-session events dropped because the write queue was full."))
+
+
+def cache_result(cache, hit):
+    cache_requests_total.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# ---------------------------------- Tracing ----------------------------------
+
+# Incoming IDs come from client headers; anything else is replaced.
+TRACE_ID_RE = re.compile(r"[0-9a-f]{8,32}")
+
+
+def new_trace_id(incoming=None):
+    """Start a trace for the current task; reuses a well-formed incoming ID when given."""
+    valid = isinstance(incoming, str) and TRACE_ID_RE.fullmatch(incoming)
+    trace_id = incoming if valid else uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds `trace_id` to every log record so handlers can print it."""
+
+    def filter(self, record):
+        record.trace_id = _trace_id.get() or "-"
+        return True
+
+
+def install_trace_filter(logger_names=("", "uvicorn.error", "uvicorn.access")):
+    """Attach a TraceIdFilter to the handlers of these loggers (root and uvicorn's), once each."""
+    for name in logger_names:
+        for handler in logging.getLogger(name).handlers:
+            if not any(isinstance(f, TraceIdFilter) for f in handler.filters):
+                handler.addFilter(TraceIdFilter())
+
+
+@contextmanager
+def timed(stage, **labels):
+    """Time a block into backend_stage_duration_seconds; count and re-raise errors."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors_total.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage, **labels)
+        logger.debug("trace=%s stage=%s took %.1f ms", current_trace_id(), stage, elapsed * 1000)
+
+
+def record_error(stage, exc):
+    """Count and log an error that is deliberately not re-raised."""
+    errors_total.inc(stage=stage)
+    logger.warning("trace=%s stage=%s error: %r", current_trace_id(), stage, exc)
@@ -0,0 +1,312 @@
+"""
+Risk and return analytics for many portfolios at once.
+
+Every portfolio's return series becomes a row of one (portfolios x periods)
+matrix, left-padded with NaN when histories differ in length, so each
+metric is a handful of NumPy reductions over the whole batch:
+
+    volatility, Sharpe, Sortino     from nan-aware means and deviations
+    beta, alpha, R^2, tracking      regression on the benchmark, per row
+    max/current drawdown            running maximum of the wealth curve
+    rolling volatility/Sharpe/beta  window sums from cumulative sums
+
+Percentages are returned in percent (12.5 means 12.5%), matching what the
+dashboard displays. Results are cached per (portfolio id, version), so a
+dashboard refresh only recomputes portfolios whose data changed.
+"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+PERIODS_PER_YEAR = {"daily": 252, "weekly": 52, "monthly": 12}
+DEFAULT_RISK_FREE_RATE = 0.065  # annual, roughly the Indian 10-year G-sec yield
+DEFAULT_WINDOW = 63             # about a quarter of trading days
+MAX_PERIODS = 50 * 252
+MAX_PORTFOLIOS = 10_000
+CACHE_SIZE = 4096
+
+METRICS = [
+    "total_return", "annual_return", "volatility", "sharpe_ratio", "sortino_ratio",
+    "beta", "alpha", "r_squared", "tracking_error", "information_ratio",
+    "max_drawdown", "max_drawdown_periods", "current_drawdown", "risk_score",
+]
+
+
+# ---------------------------------- Inputs ----------------------------------
+
+def to_returns(series, kind="returns"):
+    """Period returns (fractions) from a list of returns or of portfolio values."""
+    values = np.asarray(series, dtype=np.float64)
+    if values.ndim != 1 or len(values) < 2 + (kind == "values"):
+        raise ValueError("a series needs at least 3 values or 2 returns")
+    if len(values) > MAX_PERIODS + 1:
+        raise ValueError(f"series longer than {MAX_PERIODS} periods")
+    if not np.all(np.isfinite(values)):
+        raise ValueError("series contains non-numeric values")
+    if kind == "values":
+        if np.any(values <= 0):
+            raise ValueError("portfolio values must be positive")
+        return values[1:] / values[:-1] - 1
+    return values
+
+
+def stack(series_list):
+    """(P, T) matrix of returns, right-aligned, NaN where a series has no data."""
+    length = max(len(s) for s in series_list)
+    matrix = np.full((len(series_list), length), np.nan)
+    for row, s in zip(matrix, series_list):
+        row[length - len(s):] = s
+    return matrix
+
+
+# ---------------------------------- Metrics ----------------------------------
+
+def _nanstd(x, axis=-1):
+    counts = np.sum(~np.isnan(x), axis=axis)
+    mean = np.nanmean(x, axis=axis, keepdims=True)
+    return np.sqrt(np.nansum((x - mean) ** 2, axis=axis) / np.maximum(counts - 1, 1))
+
+
+def drawdowns(returns):
+    """Drawdown curve (fractions <= 0) of each row's wealth curve."""
+    wealth = np.cumprod(1 + np.nan_to_num(returns), axis=-1)
+    peak = np.maximum.accumulate(wealth, axis=-1)
+    return wealth / peak - 1
+
+
+def longest_drawdown(dd):
+    """Longest run of consecutive periods below a previous peak, per row."""
+    under = dd < 0
+    # Cumulative count of underwater periods, reset at every new peak.
+    idx = np.arange(dd.shape[-1])
+    last_peak = np.maximum.accumulate(np.where(under, 0, idx), axis=-1)
+    return np.max(np.where(under, idx - last_peak, 0), axis=-1)
+
+
+def regression(returns, benchmark):
+    """(beta, intercept per period, r_squared) of each row on the benchmark, over shared periods."""
+    valid = ~np.isnan(returns)
+    bench = np.where(valid, benchmark, np.nan)
+    r_mean = np.nanmean(returns, axis=-1, keepdims=True)
+    b_mean = np.nanmean(bench, axis=-1, keepdims=True)
+    dr, db = returns - r_mean, bench - b_mean
+    cov = np.nansum(dr * db, axis=-1)
+    var_b = np.nansum(db ** 2, axis=-1)
+    var_r = np.nansum(dr ** 2, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = np.where(var_b > 0, cov / var_b, 0.0)
+        r_squared = np.where((var_b > 0) & (var_r > 0), cov ** 2 / (var_b * var_r), 0.0)
+    intercept = r_mean[:, 0] - beta * b_mean[:, 0]
+    return beta, intercept, r_squared
+
+
+def risk_score(volatility_pct, beta):
+    """0-100 score from annual volatility (%) and beta; the dashboard's formula."""
+    return np.clip(np.round((volatility_pct / 20 + beta / 1.5) * 50), 0, 100)
+
+
+def compute_metrics(returns, benchmark, periods_per_year=252, risk_free_rate=DEFAULT_RISK_FREE_RATE):
+    """Metric arrays (one value per portfolio) for a (P, T) return matrix and a (T,) benchmark."""
+    n = np.sum(~np.isnan(returns), axis=-1)
+    rf = (1 + risk_free_rate) ** (1 / periods_per_year) - 1
+    growth = np.nanprod(1 + returns, axis=-1)
+    mean = np.nanmean(returns, axis=-1)
+    std = _nanstd(returns)
+    downside = np.sqrt(np.nanmean(np.minimum(returns - rf, 0) ** 2, axis=-1))
+    scale = np.sqrt(periods_per_year)
+
+    beta, intercept, r_squared = regression(returns, benchmark)
+    active = returns - benchmark
+    tracking = _nanstd(active) * scale
+    dd = drawdowns(returns)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m = {
+            "total_return": (growth - 1) * 100,
+            "annual_return": (growth ** (periods_per_year / n) - 1) * 100,
+            "volatility": std * scale * 100,
+            "sharpe_ratio": np.where(std > 0, (mean - rf) / std * scale, 0.0),
+            "sortino_ratio": np.where(downside > 0, (mean - rf) / downside * scale, 0.0),
+            "beta": beta,
+            # Jensen's alpha: intercept of excess returns on excess benchmark returns.
+            "alpha": (intercept - rf * (1 - beta)) * periods_per_year * 100,
+            "r_squared": r_squared,
+            "tracking_error": tracking * 100,
+            "information_ratio": np.where(tracking > 0, np.nanmean(active, axis=-1) * periods_per_year / tracking, 0.0),
+            "max_drawdown": np.min(dd, axis=-1) * 100,
+            "max_drawdown_periods": longest_drawdown(dd),
+            "current_drawdown": dd[:, -1] * 100,
+        }
+    m["risk_score"] = risk_score(m["volatility"], beta)
+    return m
+
+
+def _window_sums(x, window):
+    """Sums over each trailing window along the last axis (NaN counted as 0)."""
+    c = np.cumsum(np.nan_to_num(x), axis=-1)
+    c = np.concatenate([np.zeros(x.shape[:-1] + (1,)), c], axis=-1)
+    return c[..., window:] - c[..., :-window]
+
+
+def rolling_metrics(returns, benchmark, window, periods_per_year=252, risk_free_rate=DEFAULT_RISK_FREE_RATE):
+    """Rolling annualized volatility (%), Sharpe and beta; each (P, T - window + 1), NaN until a window is full."""
+    valid = ~np.isnan(returns)
+    b = np.where(valid, benchmark, 0.0)
+    r = np.nan_to_num(returns)
+    n = _window_sums(valid.astype(np.float64), window)
+    s_r, s_rr = _window_sums(r, window), _window_sums(r * r, window)
+    s_b, s_bb, s_rb = _window_sums(b, window), _window_sums(b * b, window), _window_sums(r * b, window)
+    rf = (1 + risk_free_rate) ** (1 / periods_per_year) - 1
+    full = n == window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s_r / n
+        var = np.maximum(s_rr - n * mean ** 2, 0) / (n - 1)
+        std = np.sqrt(var)
+        cov = s_rb - s_r * s_b / n
+        var_b = s_bb - s_b ** 2 / n
+        return {
+            "volatility": np.where(full, std * np.sqrt(periods_per_year) * 100, np.nan),
+            "sharpe_ratio": np.where(full & (std > 0), (mean - rf) / std * np.sqrt(periods_per_year), np.nan),
+            "beta": np.where(full & (var_b > 0), cov / var_b, np.nan),
+        }
+
+
+# ---------------------------------- Service ----------------------------------
+
+def _series_version(series):
+    return hashlib.sha256(np.asarray(series, dtype=np.float64).tobytes()).hexdigest()[:16]
+
+
+def _rounded(values):
+    """JSON-ready list of (already rounded) floats, NaN as None."""
+    values = values.tolist()
+    return [None if v != v else v for v in values]
+
+
+class AnalyticsCache:
+    """LRU of per-portfolio results keyed by (id, version, benchmark, parameters)."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+_cache = AnalyticsCache()
+
+
+def analyze(request, cache=_cache):
+    """Metrics (and optionally rolling/drawdown series) for every portfolio in `request`.
+
+        {"portfolios": [{"id": "p1", "version": "3", "values": [...]} | {"id", "returns": [...]}],
+         "benchmark": {"values": [...]} | {"returns": [...]},
+         "frequency": "daily" | "weekly" | "monthly" | "periods_per_year": 252,
+         "risk_free_rate": 0.065, "window": 63, "series": false}
+
+    A portfolio without a version is versioned by a hash of its data.
+    """
+    portfolios = request.get("portfolios")
+    if not isinstance(portfolios, list) or not portfolios:
+        raise ValueError("portfolios must be a non-empty list")
+    if len(portfolios) > MAX_PORTFOLIOS:
+        raise ValueError(f"at most {MAX_PORTFOLIOS} portfolios per request")
+    frequency = request.get("frequency", "daily")
+    if "periods_per_year" in request:
+        periods_per_year = int(request["periods_per_year"])
+    elif frequency in PERIODS_PER_YEAR:
+        periods_per_year = PERIODS_PER_YEAR[frequency]
+    else:
+        raise ValueError(f"frequency must be one of {sorted(PERIODS_PER_YEAR)}")
+    if periods_per_year <= 0:
+        raise ValueError("periods_per_year must be positive")
+    risk_free_rate = float(request.get("risk_free_rate", DEFAULT_RISK_FREE_RATE))
+    if not math.isfinite(risk_free_rate):
+        raise ValueError("risk_free_rate must be a finite number")
+    window = int(request.get("window", DEFAULT_WINDOW))
+    with_series = bool(request.get("series", False))
+
+    bench_spec = request.get("benchmark") or {}
+    bench_kind = "values" if "values" in bench_spec else "returns"
+    if bench_kind not in bench_spec:
+        raise ValueError("benchmark needs 'values' or 'returns'")
+    benchmark = to_returns(bench_spec[bench_kind], bench_kind)
+    params = (_series_version(benchmark), periods_per_year, risk_free_rate, window, with_series)
+
+    results, missing = [None] * len(portfolios), []
+    for i, p in enumerate(portfolios):
+        kind = "values" if "values" in p else "returns"
+        if kind not in p:
+            raise ValueError(f"portfolio {p.get('id', i)!r} needs 'values' or 'returns'")
+        pid = str(p.get("id", i))
+        version = str(p["version"]) if "version" in p else _series_version(p[kind])
+        key = (pid, version) + params
+        cached = cache.get(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            missing.append((i, key, pid, version, to_returns(p[kind], kind)))
+
+    if missing:
+        series = [r for *_, r in missing]
+        if max(len(s) for s in series) > len(benchmark):
+            raise ValueError("benchmark history is shorter than a portfolio's")
+        returns = stack(series)
+        bench = benchmark[len(benchmark) - returns.shape[1]:]
+        metrics = compute_metrics(returns, bench, periods_per_year, risk_free_rate)
+        rolling = None
+        if with_series:
+            if not 2 <= window <= returns.shape[1]:
+                raise ValueError(f"window must be between 2 and {returns.shape[1]}")
+            rolling = rolling_metrics(returns, bench, window, periods_per_year, risk_free_rate)
+            dd = np.round(drawdowns(returns) * 100, 2)
+            rolling = {name: np.round(values, 4) for name, values in rolling.items()}
+        for row, (i, key, pid, version, r) in enumerate(missing):
+            result = {"id": pid, "version": version, "periods": len(r)}
+            result.update({name: round(float(metrics[name][row]), 4) for name in METRICS})
+            if rolling is not None:
+                # Series start at this portfolio's first period (first full window).
+                start = returns.shape[1] - len(r)
+                result["drawdown"] = dd[row, start:].tolist()
+                result["rolling"] = {name: _rounded(values[row, start:]) for name, values in rolling.items()}
+            cache.put(key, result)
+            results[i] = result
+
+    return {"periods_per_year": periods_per_year, "window": window, "portfolios": results}
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    years, count = 10, 1000
+    bench = rng.normal(0.0004, 0.01, 252 * years)
+    books = 0.0002 + 0.9 * bench + rng.normal(0, 0.006, (count, len(bench)))
+    request = {
+        "benchmark": {"returns": bench.tolist()},
+        "portfolios": [{"id": f"p{i}", "version": 1, "returns": row.tolist()} for i, row in enumerate(books)],
+        "series": True,
+    }
+    start = time.perf_counter()
+    out = analyze(request)
+    print(f"{count} portfolios x {len(bench)} days: {time.perf_counter() - start:.2f}s")
+    print({k: v for k, v in out["portfolios"][0].items() if k not in ("drawdown", "rolling")})
+    start = time.perf_counter()
+    analyze(request)
+    print(f"cached: {time.perf_counter() - start:.2f}s")
@@ -1,15 +1,119 @@
+import hashlib
 import os
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from string import Formatter
+
+PROMPTS_DIR = Path(__file__).resolve().parent / "prompts"
+POLL_INTERVAL = float(os.getenv("PROMPT_POLL_INTERVAL", 2.0))
+
+
+class CompiledPrompt:
+    """A prompt file parsed once into literal/placeholder segments.
+
+    Placeholders use str.format syntax ({name}); literal braces are written
+    as {{ and }}. `version` is a short content hash usable in cache keys.
+    """
+
+    def __init__(self, name, text, mtime):
+        self.name = name
+        self.text = text
+        self.mtime = mtime
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        self.segments = []
+        self.fields = set()
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError(f"Prompt {name!r}: format specs are not supported in {{{field}}}")
+            self.segments.append((literal, field))
+            if field is not None:
+                self.fields.add(field)
+
+    def render(self, **values):
+        if not self.fields:
+            return self.text
+        parts = []
+        for literal, field in self.segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(values[field]))
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"CompiledPrompt({self.name!r}, version={self.version!r})"
+
+
+class PromptRegistry(Mapping):
+    """Prompts loaded from PROMPTS_DIR, recompiled when a file's mtime changes.
+
+    Reading a prompt checks the directory at most once per `poll_interval`
+    seconds, so edits are picked up by running workers without a restart.
+    Indexing returns the raw text to stay compatible with the old `prompts` dict.
+    """
+
+    def __init__(self, directory=PROMPTS_DIR, poll_interval=POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._prompts = {}
+        self._lock = threading.Lock()
+        self._last_poll = 0.0
+        self.reload()
+
+    def reload(self):
+        """Rescan the prompt directory, recompiling new and modified files."""
+        with self._lock:
+            seen = set()
+            for entry in os.scandir(self.directory):
+                if not entry.is_file() or not entry.name.endswith(".txt"):
+                    continue
+                name = entry.name.rsplit(".", 1)[0]
+                seen.add(name)
+                mtime = entry.stat().st_mtime_ns
+                current = self._prompts.get(name)
+                if current is not None and current.mtime == mtime:
+                    continue
+                with open(entry.path, "r", encoding="utf-8") as file:
+                    self._prompts[name] = CompiledPrompt(name, file.read().strip(), mtime)
+            for name in set(self._prompts) - seen:
+                del self._prompts[name]
+            self._last_poll = time.monotonic()
+
+    def _poll(self):
+        if time.monotonic() - self._last_poll >= self.poll_interval:
+            self.reload()
+
+    def get_prompt(self, name):
+        self._poll()
+        return self._prompts[name]
+
+    def render(self, name, **values):
+        return self.get_prompt(name).render(**values)
+
+    def version(self, name):
+        return self.get_prompt(name).version
+
+    def __getitem__(self, name):
+        return self.get_prompt(name).text
+
+    def __iter__(self):
+        self._poll()
+        return iter(dict(self._prompts))
+
+    def __len__(self):
+        self._poll()
+        return len(self._prompts)
+
+
+prompts = PromptRegistry()
 
-prompts = {}
 
 def load_prompt():
-    l = os.listdir('prompt_manager/prompts')
-    for f in l:
-        with open(f'prompt_manager/prompts/{f}', 'r', encoding='utf-8') as file:
-            prompts[f.split(".")[-2]] = file.read().strip()
-    
-load_prompt()
+    """Force a reload of every prompt file."""
+    prompts.reload()
 
 
 if __name__ == '__main__':
-    print(prompts)
\ No newline at end of file
+    for name in prompts:
+        print(prompts.get_prompt(name))
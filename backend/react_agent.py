@@ -1,11 +1,13 @@
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-from langchain.agents import AgentExecutor, create_react_agent
+from langchain.agents import create_react_agent
 from react_template import get_react_prompt_template
 from langchain_groq import ChatGroq
 from langchain_ollama import ChatOllama
 from langchain_google_genai import ChatGoogleGenerativeAI
 from tools.mytools import *
+from tool_executor import CachingAgentExecutor, tool_session
+from knowledge.retriever import build_context
 # no warnings
 import warnings
 import sys
@@ -28,7 +30,10 @@ query = """ Should I invest in Cipla pharmaceuticals? """
 
 # set the tools
 # tools = [add, subtract, multiply, divide, power, search, repl_tool, check_system_time]
-tools = [add, subtract, multiply, divide, power, search, check_system_time]
+tools = [
+    add, subtract, multiply, divide, power, search, check_system_time, select_itr_form,
+    get_historical_price, get_current_price, evaluate_returns,
+]
 # print(tools)
 # Get the react prompt template
 prompt_template = get_react_prompt_template()
@@ -36,15 +41,17 @@ prompt_template = get_react_prompt_template()
 # Construct the ReAct agent
 agent = create_react_agent(llm, tools, prompt_template)
 
-# Create an agent executor by passing in the agent and tools
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+# Create an agent executor by passing in the agent and tools.
+# Tool calls are memoized per question (and across questions for search and prices).
+agent_executor = CachingAgentExecutor(agent=agent, tools=tools, verbose=True)
 
 # # Get the current time
 # x = agent_executor.invoke({"input": query})
 
 def get_agent_response(user_input: str) -> str:
     try:
-        response = agent_executor.invoke({"input": user_input})
+        with tool_session():
+            response = agent_executor.invoke({"input": user_input, "context": build_context(user_input)})
         return response["output"]
     except Exception as e:
         # print("Error:", e)
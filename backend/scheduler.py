@@ -0,0 +1,211 @@
+"""
+Priority scheduling of the shared upstream resources (LLM quota, Whisper,
+TTS, CPU-heavy engine work) between live calls, interactive chat, WhatsApp
+and batch jobs.
+
+Each resource has a concurrency limit. Work asks for a slot with a priority
+class:
+
+    async with scheduler.slot("llm", WHATSAPP):
+        ...
+    text = await scheduler.run("stt", WHATSAPP, speech_to_text.convert_to_text, path)
+
+LIVE_CALL is served strictly first when a slot frees up. No slots are held
+back for it: the realtime call path does not go through the scheduler
+today, so a reservation would only idle capacity (with the default STT
+limit of 2, WhatsApp would get one). The other classes share the slots by
+weighted fair queuing (stride scheduling):
+every grant advances the class's pass by 1/weight and the waiting class
+with the lowest pass goes next, so INTERACTIVE gets about twice the slots
+of WHATSAPP under contention and BATCH is never starved outright.
+
+Admission control sheds instead of queueing without bound: a request is
+rejected with Overloaded when its class queue is full or when it has waited
+longer than the class allows. While a live call is in progress, BATCH only
+runs if a slot is free right away.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import metrics
+
+LIVE_CALL, INTERACTIVE, WHATSAPP, BATCH = "live_call", "interactive", "whatsapp", "batch"
+PRIORITIES = [LIVE_CALL, INTERACTIVE, WHATSAPP, BATCH]
+WEIGHTS = {INTERACTIVE: 4, WHATSAPP: 2, BATCH: 1}
+# Longest a request may queue for a slot, and how many may queue, per class.
+MAX_WAIT_SECONDS = {LIVE_CALL: 30.0, INTERACTIVE: 20.0, WHATSAPP: 60.0, BATCH: 10.0}
+MAX_QUEUED = {LIVE_CALL: 1000, INTERACTIVE: 200, WHATSAPP: 500, BATCH: 20}
+
+RESOURCE_LIMITS = {
+    "llm": int(os.getenv("SCHED_LLM_LIMIT", 8)),
+    "stt": int(os.getenv("SCHED_STT_LIMIT", 2)),
+    "tts": int(os.getenv("SCHED_TTS_LIMIT", 4)),
+    "cpu": int(os.getenv("SCHED_CPU_LIMIT", os.cpu_count() or 2)),
+}
+
+
+class Overloaded(Exception):
+    """Work shed by admission control; the caller should answer 503 / try later."""
+
+    def __init__(self, resource, priority, reason):
+        super().__init__(f"{resource} is overloaded for {priority} work ({reason})")
+        self.resource = resource
+        self.priority = priority
+        self.retry_after = int(MAX_WAIT_SECONDS[priority])
+
+
+class Resource:
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = max(limit, 1)
+        self.in_use = 0
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        self.passes = {priority: 0.0 for priority in WEIGHTS}
+        self.virtual_time = 0.0
+
+    def _free(self):
+        return self.in_use < self.limit
+
+    def queued(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def try_acquire(self, priority):
+        # Nobody may jump a queue of equal or higher priority.
+        ahead = self.queues[LIVE_CALL] if priority == LIVE_CALL else self.queued()
+        if self._free() and not ahead:
+            self.in_use += 1
+            return True
+        return False
+
+    def enqueue(self, priority, waiter):
+        queue = self.queues[priority]
+        if not queue and priority in self.passes:
+            # A class returning from idle does not get credit for the time it was away.
+            self.passes[priority] = max(self.passes[priority], self.virtual_time)
+        queue.append(waiter)
+
+    def discard(self, priority, waiter):
+        try:
+            self.queues[priority].remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self):
+        self.in_use -= 1
+        self.dispatch()
+
+    def dispatch(self):
+        while True:
+            priority = self._next_priority()
+            if priority is None:
+                return
+            waiter = self.queues[priority].popleft()
+            if waiter.done():  # timed out or cancelled while queued
+                continue
+            self.in_use += 1
+            if priority in self.passes:
+                self.virtual_time = self.passes[priority]
+                self.passes[priority] += 1 / WEIGHTS[priority]
+            waiter.set_result(True)
+
+    def _next_priority(self):
+        if not self._free():
+            return None
+        if self.queues[LIVE_CALL]:
+            return LIVE_CALL
+        waiting = [p for p in self.passes if self.queues[p]]
+        return min(waiting, key=lambda p: (self.passes[p], PRIORITIES.index(p)), default=None)
+
+
+class Scheduler:
+    def __init__(self, limits=None):
+        self.resources = {name: Resource(name, limit) for name, limit in (limits or RESOURCE_LIMITS).items()}
+        self.live_calls = 0
+
+    def _admit(self, resource, priority):
+        if priority == BATCH and self.live_calls:
+            return "live call in progress"
+        if len(resource.queues[priority]) >= MAX_QUEUED[priority]:
+            return "queue full"
+        return None
+
+    def _shed(self, resource, priority, reason):
+        metrics.scheduler_shed_total.inc(resource=resource.name, priority=priority)
+        raise Overloaded(resource.name, priority, reason)
+
+    async def acquire(self, name, priority):
+        """Wait for one slot of resource `name`; returns the function that releases it."""
+        resource = self.resources[name]
+        start = time.perf_counter()
+        if not resource.try_acquire(priority):
+            reason = self._admit(resource, priority)
+            if reason:
+                self._shed(resource, priority, reason)
+            waiter = asyncio.get_running_loop().create_future()
+            resource.enqueue(priority, waiter)
+            metrics.scheduler_queued.set(resource.queued(), resource=name)
+            try:
+                await asyncio.wait_for(waiter, MAX_WAIT_SECONDS[priority])
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted in the same tick we gave up: hand the slot on.
+                    resource.release()
+                else:
+                    resource.discard(priority, waiter)
+                if isinstance(e, asyncio.TimeoutError):
+                    self._shed(resource, priority, "waited too long")
+                raise
+            finally:
+                metrics.scheduler_queued.set(resource.queued(), resource=name)
+        metrics.scheduler_wait_seconds.observe(time.perf_counter() - start, resource=name, priority=priority)
+        return resource.release
+
+    @asynccontextmanager
+    async def slot(self, name, priority):
+        """Hold one slot of resource `name` for the duration of the block."""
+        release = await self.acquire(name, priority)
+        try:
+            yield
+        finally:
+            release()
+
+    async def run(self, name, priority, fn, *args, **kwargs):
+        """Run a blocking fn(*args, **kwargs) in a worker thread while holding a slot."""
+        async with self.slot(name, priority):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    @asynccontextmanager
+    async def live_call(self):
+        """Mark a live call as in progress; BATCH work is shed meanwhile unless a slot is free."""
+        self.live_calls += 1
+        try:
+            yield
+        finally:
+            self.live_calls -= 1
+
+
+scheduler = Scheduler()
+
+
+if __name__ == "__main__":
+    async def demo():
+        s = Scheduler({"llm": 3})
+        order = []
+
+        async def job(priority, i):
+            try:
+                async with s.slot("llm", priority):
+                    order.append(priority)
+                    await asyncio.sleep(0.01)
+            except Overloaded:
+                order.append(f"shed:{priority}")
+
+        jobs = [job(WHATSAPP, i) for i in range(20)] + [job(INTERACTIVE, i) for i in range(10)]
+        jobs += [job(LIVE_CALL, 0)]
+        await asyncio.gather(*jobs)
+        print(order)
+
+    asyncio.run(demo())
@@ -1,8 +1,8 @@
-from twilio.rest import Client
 from dotenv import load_dotenv
 import os
 import re
 import json
+import metrics
 from time import sleep
 
 load_dotenv()
@@ -11,16 +11,24 @@ account_sid = os.getenv("Twilio_Account_SID")
 auth_token = os.getenv("Twilio_Auth_Token")
 twilio_number = os.getenv("Twilio_Phone_Number")
 
+_client = None
+
 def get_client(max_retries=3):
+    """Create the Twilio client on first use and reuse it afterwards."""
+    global _client
+    if _client is not None:
+        return _client
+    from twilio.rest import Client
+
     for i in range(max_retries):
         try:
-            return Client(account_sid, auth_token)
+            _client = Client(account_sid, auth_token)
+            return _client
         except Exception:
             if i < max_retries - 1:
                 sleep(1)
-    return Client(account_sid, auth_token)
-
-client = get_client()
+    _client = Client(account_sid, auth_token)
+    return _client
 
 def preprocess_message(message):
     message = re.sub(r'[^\x00-\x7F]+', lambda m: json.dumps(m.group())[1:-1], message)
@@ -51,7 +59,7 @@ def send_whatpsapp_message(number, message='', media_url=None):
         to_number = format_phone_number(number)
         media_urls = [json.loads(json.dumps(media_url))] if media_url else None
         
-        response = client.messages.create(
+        response = get_client().messages.create(
             media_url=media_urls,
             from_=format_phone_number(twilio_number),
             body=processed_msg,
@@ -67,7 +75,8 @@ def send_whatpsapp_message(number, message='', media_url=None):
         _message_status[status_key] = result
         return result
         
-    except:
+    except Exception as e:
+        metrics.record_error("twilio_send", e)
         return {"error": True, "message": "Message is being processed"}
 
 if __name__ == "__main__":
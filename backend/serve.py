@@ -0,0 +1,196 @@
+"""
+Pre-fork launcher for the FastAPI backend.
+
+`uvicorn app:app --workers N` starts N fresh interpreters, and each loads its
+own copy of the Whisper weights, the tax-law index, the compiled prompts and
+the LangChain agent. This launcher loads the read-only parts once in the
+master and then forks the workers. The forked workers share those pages
+copy-on-write, so each extra worker costs roughly its own heap instead of a
+full copy of the models.
+
+    python serve.py                       # WEB_WORKERS workers (default 8)
+    WEB_WORKERS=4 PRELOAD=index,prompts,whisper python serve.py
+    python measure_memory.py              # RSS/PSS of the running workers
+
+Only objects that hold no threads, sockets or gRPC channels are built
+before the fork. The Gemini and Twilio clients, the SQLite connections and
+the background writers are all still created lazily, inside each worker.
+gc.freeze() moves everything loaded so far out of the collector's view.
+Otherwise the first collection in each worker would write to every object
+header and un-share the pages.
+
+Several workers must agree on which one got a Twilio webhook delivery
+first, so the launcher turns on the shared (SQLite) dedup table
+(WEBHOOK_DEDUP_SHARED=1) unless it is set explicitly. Everything else in
+memory is per worker: the scheduler's concurrency limits (SCHED_*_LIMIT)
+and its live-call count, which sheds BATCH work, apply to each worker on
+its own. With N workers the host runs up to N times each limit.
+
+Linux/macOS only (os.fork).
+"""
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger("serve")
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+WORKERS = int(os.getenv("WEB_WORKERS", 8))
+# Steps run in the master before forking, in this order.
+PRELOAD = [s for s in os.getenv("PRELOAD", "index,prompts,whisper,tts,agent,market").split(",") if s]
+RESTART_BACKOFF_SECONDS = 1.0
+
+# Read by store.dedup at import, so it must be set before app is imported.
+os.environ.setdefault("WEBHOOK_DEDUP_SHARED", "1")
+
+
+# ---- Preload steps ----
+
+def _preload_index():
+    from knowledge.retriever import get_index
+    get_index()
+
+
+def _preload_prompts():
+    from prompt_manager.prompt import prompts
+    for name in prompts:
+        prompts[name]
+
+
+def _preload_whisper():
+    from speech import speech_to_text
+    model = speech_to_text.get_model()
+    # Inference only: no gradients, and no autograd state that would dirty the shared weights.
+    for param in model.parameters():
+        param.requires_grad_(False)
+
+
+def _preload_tts():
+    # The ElevenLabs/gTTS modules only; the HTTP client is created per worker.
+    import elevenlabs  # noqa: F401
+    import gtts  # noqa: F401
+
+
+def _preload_agent():
+    # Builds the tool list, the ReAct prompt and the agent graph; no request is made.
+    import react_agent  # noqa: F401
+
+
+def _preload_market():
+    from market.prices import get_store
+    get_store().index
+
+
+PRELOAD_STEPS = {
+    "index": _preload_index,
+    "prompts": _preload_prompts,
+    "whisper": _preload_whisper,
+    "tts": _preload_tts,
+    "agent": _preload_agent,
+    "market": _preload_market,
+}
+
+
+def preload(steps=PRELOAD):
+    """Run the preload steps; a step whose dependency is missing is left to load lazily."""
+    import uvicorn  # noqa: F401
+    import app  # noqa: F401  (the FastAPI app and its light imports)
+
+    for step in steps:
+        start = time.perf_counter()
+        try:
+            PRELOAD_STEPS[step]()
+        except Exception as e:
+            logger.warning("preload %s skipped: %r", step, e)
+            continue
+        logger.info("preload %s took %.2fs", step, time.perf_counter() - start)
+    gc.collect()
+    gc.freeze()
+
+
+# ---- Workers ----
+
+def bind_socket(host=HOST, port=PORT):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock):
+    """Serve on the inherited listening socket until told to stop (runs in the child)."""
+    import uvicorn
+    from app import app
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, lifespan="on", log_level=os.getenv("LOG_LEVEL", "info"))
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock)
+        except BaseException:
+            logger.exception("worker %d crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info("started worker %d", pid)
+    return pid
+
+
+def serve(workers=WORKERS):
+    preload()
+    sock = bind_socket()
+    logger.info("master %d listening on %s:%d with %d workers", os.getpid(), HOST, PORT, workers)
+
+    children = {spawn(sock) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            logger.warning("worker %d exited (status %d), restarting", pid, status)
+            time.sleep(RESTART_BACKOFF_SECONDS)
+            children.add(spawn(sock))
+    sock.close()
+
+
+if __name__ == "__main__":
+    import metrics
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s [%(trace_id)s] %(message)s")
+    metrics.install_trace_filter()
+    if len(sys.argv) > 1:
+        WORKERS = int(sys.argv[1])
+    serve(WORKERS)
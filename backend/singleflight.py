@@ -0,0 +1,61 @@
+"""
+Single-flight coalescing for identical in-flight upstream calls.
+
+When many identical prompts arrive together (a broadcast, a popular
+question), only the first caller for a key runs the upstream call. The
+others wait for it and receive the same result, or the same exception.
+Nothing is kept once the call finishes, so a later request always makes a
+fresh call and can never get a stale result. Caching stays the job of the
+callers' own caches.
+
+    flight = SingleFlight("gemini_query")
+    answer = flight.do(flight_key("gemini-pro", version, prompt), call_gemini, prompt)
+
+do() is for threaded code; the Gemini helpers run in worker threads.
+"""
+import re
+import threading
+from concurrent.futures import Future
+
+import metrics
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace and case so trivially different copies share a flight."""
+    return re.sub(r"\s+", " ", prompt).strip().casefold()
+
+
+def flight_key(model, prompt_version, prompt, *extra):
+    return "\x1f".join(map(str, (model, prompt_version, normalize_prompt(prompt)) + extra))
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}       # key -> concurrent.futures.Future
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) unless an identical call is in flight; share its outcome."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            metrics.singleflight_coalesced_total.inc(flight=self.name)
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
@@ -0,0 +1,258 @@
+"""
+Audio capture with voice-activity detection (VAD) for the voice assistant.
+
+Blocks from a source go into a preallocated ring buffer. Nothing is appended
+to a list, and no array is concatenated until an utterance is cut out.
+A VAD with hysteresis and hangover marks where speech starts and ends:
+
+    start   ATTACK_BLOCKS consecutive blocks with RMS >= start_threshold
+    end     hangover: silence_duration of consecutive blocks with RMS < stop_threshold
+
+Everything that is queued is processed at once. The RMS of all pending blocks
+comes from one reshape and one mean, and the start/end state machine then
+steps over the precomputed booleans. Each utterance is cut out of the ring
+with PRE_ROLL_SECONDS of lead-in (the onset quiet enough to fall below the
+threshold) and handed to a callback:
+
+    stream_utterances(MicrophoneSource(), lambda audio, rate: ...)   # until stopped
+    stream_utterances(FileSource("call.wav"), on_utterance)          # no microphone needed
+
+The microphone callback pushes into a bounded queue and drops (and counts)
+blocks rather than growing without bound when processing falls behind.
+
+Benchmark / smoke test on a file:
+    python -m speech.capture recording.wav
+"""
+import queue
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+BLOCK_FRAMES = 1024
+ATTACK_BLOCKS = 2
+START_RATIO = 2.0  # start threshold = START_RATIO * stop threshold
+PRE_ROLL_SECONDS = 0.3
+MAX_UTTERANCE_SECONDS = 60.0
+MAX_QUEUED_BLOCKS = 256  # ~5.5 s at 48 kHz
+MAX_BATCH_BLOCKS = 64
+
+
+class RingBuffer:
+    """Fixed-size (frames, channels) buffer addressed by absolute frame number."""
+
+    def __init__(self, capacity, channels, dtype=np.int16):
+        self.data = np.zeros((capacity, channels), dtype=dtype)
+        self.capacity = capacity
+        self.written = 0  # absolute index of the next frame to write
+
+    @property
+    def oldest(self):
+        return max(0, self.written - self.capacity)
+
+    def write(self, frames):
+        n = len(frames)
+        if n >= self.capacity:
+            frames = frames[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        pos = self.written % self.capacity
+        first = min(n, self.capacity - pos)
+        self.data[pos:pos + first] = frames[:first]
+        self.data[:n - first] = frames[first:]
+        self.written += n
+
+    def read(self, start, end):
+        """Copy of frames [start, end), clipped to what is still in the buffer."""
+        start = max(start, self.oldest)
+        end = min(end, self.written)
+        if end <= start:
+            return self.data[:0].copy()
+        lo, hi = start % self.capacity, end % self.capacity
+        if lo < hi or hi == 0:
+            return self.data[lo:hi or self.capacity].copy()
+        return np.concatenate([self.data[lo:], self.data[:hi]])
+
+
+def block_rms(frames, block_frames):
+    """RMS of each whole block in `frames` (channels averaged), as float64."""
+    n_blocks = len(frames) // block_frames
+    mono = frames[:n_blocks * block_frames].astype(np.float64).mean(axis=1)
+    return np.sqrt(np.mean(mono.reshape(n_blocks, block_frames) ** 2, axis=1))
+
+
+class VAD:
+    """Speech start/end detector with hysteresis and hangover, fed whole blocks."""
+
+    def __init__(self, samplerate, stop_threshold, silence_duration, block_frames=BLOCK_FRAMES):
+        self.block_frames = block_frames
+        self.start_threshold = stop_threshold * START_RATIO
+        self.stop_threshold = stop_threshold
+        self.hangover_blocks = max(1, round(silence_duration * samplerate / block_frames))
+        self.speaking = False
+        self._loud = 0   # consecutive blocks above start_threshold while silent
+        self._quiet = 0  # consecutive blocks below stop_threshold while speaking
+
+    def process(self, rms, first_frame):
+        """Events [("start"|"end", frame)] for consecutive blocks starting at `first_frame`."""
+        events = []
+        loud = rms >= self.start_threshold
+        quiet = rms < self.stop_threshold
+        for i in range(len(rms)):
+            frame = first_frame + i * self.block_frames
+            if not self.speaking:
+                self._loud = self._loud + 1 if loud[i] else 0
+                if self._loud >= ATTACK_BLOCKS:
+                    self.speaking, self._quiet = True, 0
+                    events.append(("start", frame - (ATTACK_BLOCKS - 1) * self.block_frames))
+            else:
+                self._quiet = self._quiet + 1 if quiet[i] else 0
+                if self._quiet >= self.hangover_blocks:
+                    self.speaking, self._loud = False, 0
+                    events.append(("end", frame + self.block_frames))
+        return events
+
+
+# ---- Sources ----
+
+class FileSource:
+    """Blocks of a 16-bit WAV file; realtime=True paces them like a microphone."""
+
+    def __init__(self, path, block_frames=BLOCK_FRAMES, realtime=False):
+        with wave.open(str(path), "rb") as f:
+            if f.getsampwidth() != 2:
+                raise ValueError("only 16-bit PCM WAV files are supported")
+            self.samplerate = f.getframerate()
+            self.channels = f.getnchannels()
+            raw = f.readframes(f.getnframes())
+        self.frames = np.frombuffer(raw, dtype="<i2").reshape(-1, self.channels)
+        self.block_frames = block_frames
+        self.realtime = realtime
+        self.dropped = 0
+
+    def blocks(self, stop_event):
+        # Without pacing there is no reason to hand the VAD one block at a time.
+        step = self.block_frames * (1 if self.realtime else MAX_BATCH_BLOCKS)
+        period = step / self.samplerate
+        for start in range(0, len(self.frames), step):
+            if stop_event.is_set():
+                return
+            if self.realtime:
+                time.sleep(period)
+            yield [self.frames[start:start + step]]
+
+
+class MicrophoneSource:
+    """sounddevice input stream feeding a bounded queue of blocks."""
+
+    def __init__(self, samplerate=48000, channels=1, block_frames=BLOCK_FRAMES, max_queued=MAX_QUEUED_BLOCKS):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.block_frames = block_frames
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.dropped = 0
+
+    def _callback(self, indata, frames, time_info, status):
+        try:
+            self.queue.put_nowait(indata.copy())
+        except queue.Full:
+            self.dropped += 1
+
+    def blocks(self, stop_event):
+        """Lists of whatever blocks are queued, so the VAD sees them in one batch."""
+        import sounddevice as sd
+
+        with sd.InputStream(samplerate=self.samplerate, channels=self.channels, blocksize=self.block_frames,
+                            dtype="int16", callback=self._callback):
+            while not stop_event.is_set():
+                try:
+                    batch = [self.queue.get(timeout=0.1)]
+                except queue.Empty:
+                    continue
+                while len(batch) < MAX_BATCH_BLOCKS:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                yield batch
+
+
+# ---- Utterances ----
+
+def stream_utterances(source, on_utterance, silence_threshold=300, silence_duration=1.5,
+                      max_utterances=None, stop_event=None):
+    """Call on_utterance(audio, samplerate) for every utterance from `source`.
+
+    `silence_threshold` is the stop threshold, as the RMS of 16-bit samples.
+    Runs until the source ends, `stop_event` is set or `max_utterances` have
+    been delivered. Speech still in progress when the source ends is
+    delivered too. Returns the number of utterances delivered.
+    """
+    stop_event = stop_event or threading.Event()
+    rate, block = source.samplerate, source.block_frames
+    ring = RingBuffer(int((MAX_UTTERANCE_SECONDS + PRE_ROLL_SECONDS) * rate) + block, source.channels)
+    vad = VAD(rate, silence_threshold, silence_duration, block)
+    pre_roll = int(PRE_ROLL_SECONDS * rate)
+    max_frames = int(MAX_UTTERANCE_SECONDS * rate)
+    pending = np.zeros((0, source.channels), dtype=np.int16)  # frames not yet in a whole block
+    speech_start = None
+    delivered = 0
+
+    def deliver(start, end):
+        nonlocal delivered
+        on_utterance(ring.read(start - pre_roll, end), rate)
+        delivered += 1
+        if max_utterances is not None and delivered >= max_utterances:
+            stop_event.set()
+
+    for batch in source.blocks(stop_event):
+        analysed = ring.written - len(pending)  # first frame not yet seen by the VAD
+        for frames in batch:
+            ring.write(frames)
+        pending = np.concatenate([pending, *batch]) if len(pending) else np.concatenate(batch)
+        whole = len(pending) // block * block
+        if not whole:
+            continue
+        events = vad.process(block_rms(pending[:whole], block), analysed)
+        pending = pending[whole:]
+        for kind, frame in events:
+            if kind == "start":
+                speech_start = frame
+            elif speech_start is not None:
+                deliver(speech_start, frame)
+                speech_start = None
+            if stop_event.is_set():
+                return delivered
+        if speech_start is not None and ring.written - speech_start >= max_frames:
+            # Nobody pauses for a minute; cut here and keep listening.
+            deliver(speech_start, ring.written)
+            speech_start = ring.written if vad.speaking else None
+    # Speech cut off by the end of the source or a manual stop.
+    if speech_start is not None:
+        deliver(speech_start, ring.written)
+    return delivered
+
+
+def write_wav(path, audio, samplerate):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(audio.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(samplerate)
+        f.writeframes(np.ascontiguousarray(audio, dtype="<i2").tobytes())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m speech.capture FILE.wav")
+        sys.exit(2)
+    source = FileSource(sys.argv[1])
+    found = []
+    start = time.perf_counter()
+    stream_utterances(source, lambda audio, rate: found.append(len(audio) / rate))
+    elapsed = time.perf_counter() - start
+    duration = len(source.frames) / source.samplerate
+    lengths = f", {min(found):.2f}-{max(found):.2f}s long" if found else ""
+    print(f"{len(found)} utterances{lengths} in {duration:.1f}s of audio; "
+          f"processed in {elapsed * 1000:.1f} ms ({duration / elapsed:.0f}x realtime)")
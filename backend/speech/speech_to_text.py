@@ -1,133 +1,87 @@
-import whisper
-import sounddevice as sd
-import numpy as np
-import wavio
 import threading
-import queue
 import os
 import warnings
-import pyperclip
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "turbo")
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Load the Whisper model once per process (whisper/torch are imported here)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import whisper
+                _model = whisper.load_model(WHISPER_MODEL)
+    return _model
 
 def convert_to_text(file_path):
-    model = whisper.load_model("turbo")
     # result = model.transcribe("welcome.mp3")
-    result = model.transcribe(file_path) 
+    result = get_model().transcribe(file_path) 
     return result['text']
 
+def transcribe(audio):
+    """Text of float32 16 kHz mono samples (see speech/transcode.decode_for_whisper)."""
+    return get_model().transcribe(audio)['text']
+
 
 # record audio
-def record_audio(filename, samplerate=48000, silence_threshold=15, silence_duration=1.5, channels=2, play_audio=False):
+def record_audio(filename, samplerate=48000, silence_threshold=300, silence_duration=1.5, channels=2, play_audio=False):
     """
-    Records high-quality audio without interruptions.
-    
+    Records one utterance from the microphone: from when the user starts
+    speaking until `silence_duration` seconds of silence.
+
     Args:
         filename (str): Path to save the recorded audio file (e.g., "output.wav").
         samplerate (int): Sampling rate in Hz (default: 48000).
-        silence_threshold (float): RMS value below which audio is considered silent (default: 0.01).
-        silence_duration (float): Duration of continuous silence (in seconds) to stop recording (default: 3.0).
+        silence_threshold (float): RMS of 16-bit samples below which audio counts as silence (default: 300).
+        silence_duration (float): Duration of continuous silence (in seconds) to stop recording (default: 1.5).
         channels (int): Number of audio channels (1 = mono, 2 = stereo, default: 2).
         play_audio (bool): Whether to play the recorded audio after saving (default: False).
-    
+
     Returns:
-        None
+        The saved path, or None if nothing was said. See speech/capture.py
+        for the ring buffer, the VAD and streaming many utterances.
     """
-    
-    blocksize = 1024  # Optimal buffer size for smooth recording
-    audio_queue = queue.Queue()
-    recording = []
-    silence_counter = 0
-    stop_flag = threading.Event()
-
-    def audio_capture():
-        """Captures audio blocks and adds them to the queue."""
-        try:
-            with sd.InputStream(samplerate=samplerate, channels=channels, blocksize=blocksize, dtype='int16') as stream:
-                while not stop_flag.is_set():
-                    block, _ = stream.read(blocksize)
-                    audio_queue.put(block)
-        except Exception as e:
-            print(f"Audio capture error: {e}")
-            stop_flag.set()
-
-    def audio_processing():
-        """Processes audio blocks, detects silence, and handles stop logic."""
-        nonlocal silence_counter, recording
-        spoken = False # maintain a flag to check if the user has spoken or not
-        try:
-            while not stop_flag.is_set() or not audio_queue.empty():
-                try:
-                    block = audio_queue.get(timeout=0.5)
-                    recording.append(block)
-
-                    # Convert block to mono for RMS calculation
-                    if channels > 1:
-                        mono_block = block.mean(axis=1)
-                    else:
-                        mono_block = block.flatten()
-
-                    # Calculate RMS for silence detection
-                    rms = np.sqrt(np.mean(mono_block**2))
-                    print(f"RMS: {rms:.6f}")
-
-                    # Check if the block is silent
-                    if rms < silence_threshold:
-                        if spoken:
-                            silence_counter += len(block) / samplerate
-                    else:
-                        silence_counter = 0
-                        spoken = True
-
-                    # Stop if silence persists
-                    if silence_counter >= silence_duration:
-                        print("Silence detected. Stopping recording...")
-                        stop_flag.set()
-                        break
-                except queue.Empty:
-                    continue
-        except Exception as e:
-            print(f"Audio processing error: {e}")
-            stop_flag.set()
-
-    # Start threads
-    capture_thread = threading.Thread(target=audio_capture)
-    processing_thread = threading.Thread(target=audio_processing)
+    from speech.capture import MicrophoneSource, stream_utterances, write_wav
 
-    print("Recording... Press Ctrl+C to stop manually.")
-    capture_thread.start()
-    processing_thread.start()
+    source = MicrophoneSource(samplerate, channels)
+    stop_event = threading.Event()
+    recorded = []
 
-    try:
-        # Wait for threads to finish
-        capture_thread.join()
-        processing_thread.join()
-
-        # Concatenate and save the recording
-        if recording:
-            recording = np.concatenate(recording, axis=0)
-            wavio.write(filename, recording, samplerate, sampwidth=2)
-            print(f"Recording finished. Audio saved to: {os.path.abspath(filename)}")
-
-            # Optional: Play the audio
-            if play_audio:
-                print("Playing recorded audio...")
-                sd.play(recording, samplerate)
-                sd.wait()
+    def save(audio, rate):
+        write_wav(filename, audio, rate)
+        recorded.append(audio)
 
+    print("Recording... Press Ctrl+C to stop manually.")
+    # Capture runs in a worker thread so Ctrl+C reaches this one.
+    worker = threading.Thread(
+        target=stream_utterances, args=(source, save, silence_threshold, silence_duration, 1, stop_event))
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
     except KeyboardInterrupt:
         print("Recording manually stopped.")
-        stop_flag.set()
-        capture_thread.join()
-        processing_thread.join()
-        if recording:
-            recording = np.concatenate(recording, axis=0)
-            wavio.write(filename, recording, samplerate, sampwidth=2)
-            print(f"Partial recording saved to: {os.path.abspath(filename)}")
-    except Exception as e:
-        print(f"Error: {e}")
-        stop_flag.set()
-
+        stop_event.set()
+        worker.join()
+    if source.dropped:
+        print(f"Warning: {source.dropped} audio blocks dropped")
+    if not recorded:
+        return None
+    print(f"Recording finished. Audio saved to: {os.path.abspath(filename)}")
+    if play_audio:
+        import sounddevice as sd
+
+        print("Playing recorded audio...")
+        sd.play(recorded[0], samplerate)
+        sd.wait()
+    return filename
 
 if __name__ == "__main__":
+    import pyperclip
+
     # handle warnings
     warnings.filterwarnings("ignore")
 
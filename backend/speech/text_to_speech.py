@@ -1,18 +1,25 @@
-from gtts import gTTS
-from pydub import AudioSegment
-from pydub.playback import play
 import os
-from elevenlabs import ElevenLabs, save
 from dotenv import load_dotenv
+import metrics
 
 load_dotenv()
 
-client = ElevenLabs(
-    api_key=os.getenv("ELEVEN_LABS_API"),
-)
+_client = None
+
+def get_client():
+    """Create the ElevenLabs client on first use."""
+    global _client
+    if _client is None:
+        from elevenlabs import ElevenLabs
+        _client = ElevenLabs(
+            api_key=os.getenv("ELEVEN_LABS_API"),
+        )
+    return _client
 
 def AI_speak(text, output_path="output.mp3", lang='en'):
-    speech = client.text_to_speech.convert(
+    from elevenlabs import save
+
+    speech = get_client().text_to_speech.convert(
         voice_id="wlmwDR77ptH6bKHZui0l",
         output_format="mp3_44100_128",
         text=text,
@@ -23,21 +30,31 @@ def AI_speak(text, output_path="output.mp3", lang='en'):
 # Language in which you want to convert
 def speak(text, output_path="output.mp3", lang='en'):
     try:
-        AI_speak(text, output_path, lang)
+        with metrics.timed("tts", engine="elevenlabs"):
+            AI_speak(text, output_path, lang)
 
-    except:
-        myobj = gTTS(text=text, lang=lang, slow=False)
+    except Exception as e:
+        from gtts import gTTS
 
-        # Saving the converted audio in a mp3 file named
-        myobj.save(output_path)
+        metrics.record_error("tts", e)
+        with metrics.timed("tts", engine="gtts"):
+            myobj = gTTS(text=text, lang=lang, slow=False)
+
+            # Saving the converted audio in a mp3 file named
+            myobj.save(output_path)
 
     return output_path
 
 # play audio
 def play_audio(file_path):
-    # Play the MP3 file using pydub
-    audio = AudioSegment.from_mp3(file_path)
-    play(audio)
+    import sounddevice as sd
+    from speech import transcode
+
+    # Decode while playing instead of loading the whole MP3 first.
+    fmt = transcode.FORMATS["playback"]
+    with sd.RawOutputStream(samplerate=fmt.rate, channels=fmt.channels, dtype="int16") as stream:
+        for chunk in transcode.transcode(transcode.iter_file(file_path), "playback"):
+            stream.write(chunk)
         
 
 if __name__ == "__main__":
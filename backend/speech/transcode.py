@@ -0,0 +1,130 @@
+"""
+Streaming audio transcoding through ffmpeg pipes.
+
+Audio reaches the backend in whatever the channel sends: OGG/Opus voice notes
+from WhatsApp, MP3 from the TTS engines. Each consumer wants exactly one raw
+format (FORMATS). transcode() starts one ffmpeg process per stream. A feeder
+thread writes the input chunks to its stdin while the caller reads output
+chunks from its stdout, so nothing is written to disk and neither side is
+ever held whole in memory:
+
+    pcm = decode_for_whisper(response.iter_content(CHUNK_BYTES))   # float32, 16 kHz mono
+    for chunk in transcode(mp3_chunks, "twilio"):                   # mu-law, 8 kHz mono
+        ...
+
+ffmpeg sniffs the input container itself; pass input_format for raw input
+("s16le", "mulaw") that has no header.
+"""
+import os
+import subprocess
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+import metrics
+
+FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+CHUNK_BYTES = 64 * 1024
+STDERR_TAIL_BYTES = 2000
+
+OutputFormat = namedtuple("OutputFormat", "codec rate channels")
+FORMATS = {
+    "whisper": OutputFormat("s16le", 16000, 1),   # what whisper.load_audio produces
+    "twilio": OutputFormat("mulaw", 8000, 1),     # Twilio media streams
+    "playback": OutputFormat("s16le", 44100, 2),  # local speakers (sounddevice)
+}
+
+
+class TranscodeError(RuntimeError):
+    """ffmpeg is missing or could not decode the input."""
+
+
+def ffmpeg_command(output, input_format=None, input_rate=None, input_channels=None):
+    fmt = FORMATS[output]
+    command = [FFMPEG, "-hide_banner", "-loglevel", "error", "-nostdin"]
+    if input_format:
+        command += ["-f", input_format]
+        if input_rate:
+            command += ["-ar", str(input_rate)]
+        if input_channels:
+            command += ["-ac", str(input_channels)]
+    command += ["-i", "pipe:0", "-vn", "-f", fmt.codec, "-ar", str(fmt.rate), "-ac", str(fmt.channels), "pipe:1"]
+    return command
+
+
+def transcode(chunks, output, input_format=None, input_rate=None, input_channels=None, chunk_bytes=CHUNK_BYTES):
+    """Yield `output`-format bytes as ffmpeg decodes the byte chunks of `chunks`.
+
+    Raises TranscodeError if ffmpeg is not installed or fails, or if reading
+    `chunks` fails. Closing the
+    generator early stops ffmpeg.
+    """
+    try:
+        proc = subprocess.Popen(
+            ffmpeg_command(output, input_format, input_rate, input_channels),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    except OSError as e:
+        raise TranscodeError(f"cannot start {FFMPEG}: {e}") from None
+
+    stderr_tail = bytearray()
+    feed_error = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                if chunk:
+                    proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # ffmpeg exited (bad input or the reader stopped); its exit status tells which
+        except Exception as e:
+            feed_error.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    def drain_stderr():
+        # An undrained stderr pipe can fill up and stall ffmpeg.
+        for line in proc.stderr:
+            stderr_tail.extend(line)
+            del stderr_tail[:-STDERR_TAIL_BYTES]
+
+    threads = [threading.Thread(target=feed, daemon=True), threading.Thread(target=drain_stderr, daemon=True)]
+    for thread in threads:
+        thread.start()
+    finished = False
+    try:
+        while data := proc.stdout.read(chunk_bytes):
+            yield data
+        finished = True
+    finally:
+        if not finished:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+        for thread in threads:
+            thread.join()
+    if feed_error:
+        raise TranscodeError(f"input stream failed: {feed_error[0]!r}") from feed_error[0]
+    if proc.returncode != 0:
+        metrics.record_error("transcode", stderr_tail.decode(errors="replace"))
+        raise TranscodeError(f"ffmpeg exited with {proc.returncode}: {stderr_tail.decode(errors='replace').strip()}")
+
+
+def decode_for_whisper(chunks, input_format=None):
+    """Audio from byte chunks as the float32 16 kHz mono array Whisper takes instead of a path."""
+    pcm = bytearray()
+    with metrics.timed("transcode", output="whisper"):
+        for data in transcode(chunks, "whisper", input_format):
+            pcm.extend(data)
+    usable = len(pcm) // 2 * 2
+    return np.frombuffer(pcm[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+
+def iter_file(path, chunk_bytes=CHUNK_BYTES):
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_bytes):
+            yield chunk
+
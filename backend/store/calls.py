@@ -0,0 +1,216 @@
+"""
+Call-session records for the media-stream calls: who called, when, how long,
+frame counts, the conversation transcript and the tax facts mentioned.
+
+The audio relay only ever calls CallLog.record(), which is a non-blocking
+put on an in-memory queue. A single background task drains the queue in
+batches and writes each batch in one SQLite transaction on a worker thread.
+If the queue is full the event is dropped and counted, never waited on.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+import metrics
+from store.db import get_connection, register_schema, transaction
+from store.profiles import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+FLUSH_INTERVAL = float(os.getenv("CALL_LOG_FLUSH_INTERVAL", 1.0))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    call_id          TEXT PRIMARY KEY,
+    call_sid         TEXT,
+    session_id       TEXT,
+    phone            TEXT,
+    started_at       REAL NOT NULL,
+    ended_at         REAL,
+    duration         REAL,
+    inbound_frames   INTEGER NOT NULL DEFAULT 0,
+    outbound_frames  INTEGER NOT NULL DEFAULT 0,
+    first_reply_seconds REAL,
+    facts            TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_calls_phone ON calls(phone, started_at);
+
+CREATE TABLE IF NOT EXISTS call_turns (
+    id       INTEGER PRIMARY KEY,
+    call_id  TEXT NOT NULL REFERENCES calls(call_id),
+    role     TEXT NOT NULL,
+    text     TEXT NOT NULL,
+    at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_call_turns_call ON call_turns(call_id, at);
+"""
+register_schema(SCHEMA)
+
+INSERT_CALL = """
+INSERT INTO calls (call_id, call_sid, session_id, phone, started_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(call_id) DO UPDATE SET
+    call_sid = COALESCE(excluded.call_sid, call_sid),
+    session_id = COALESCE(excluded.session_id, session_id),
+    phone = COALESCE(excluded.phone, phone)
+"""
+# Placeholder for a call whose "start" event was dropped, so its turns and end still satisfy the foreign key.
+INSERT_STUB_CALL = "INSERT OR IGNORE INTO calls (call_id, started_at) VALUES (?, ?)"
+INSERT_TURN = "INSERT INTO call_turns (call_id, role, text, at) VALUES (?, ?, ?, ?)"
+END_CALL = """
+UPDATE calls SET ended_at = ?, duration = ? - started_at, inbound_frames = ?, outbound_frames = ?,
+    first_reply_seconds = ?
+WHERE call_id = ?
+"""
+SELECT_CALLER_TEXT = "SELECT text FROM call_turns WHERE call_id = ? AND role = 'caller' ORDER BY at"
+SELECT_PHONE = "SELECT phone FROM calls WHERE call_id = ?"
+SET_FACTS = "UPDATE calls SET facts = ? WHERE call_id = ?"
+SELECT_RECENT = """
+SELECT call_id, call_sid, session_id, phone, started_at, ended_at, duration,
+       inbound_frames, outbound_frames, first_reply_seconds, facts
+FROM calls WHERE phone = ? ORDER BY started_at DESC LIMIT ?
+"""
+SELECT_CALL = SELECT_RECENT.split("WHERE")[0] + "WHERE call_id = ?"
+SELECT_TURNS = "SELECT role, text, at FROM call_turns WHERE call_id = ? ORDER BY at"
+
+
+def _call_row(row):
+    call = dict(row)
+    call["facts"] = json.loads(call["facts"]) if call["facts"] else {}
+    return call
+
+
+# ---------------------------------- Writing ----------------------------------
+
+def write_events(events):
+    """Apply a batch of queued events in one transaction (runs on a worker thread)."""
+    calls, turns, ends = [], [], []
+    for kind, row in events:
+        {"start": calls, "turn": turns, "end": ends}[kind].append(row)
+    stubs = {}
+    for call_id, *_, at in turns:
+        stubs.setdefault(call_id, at)
+    for at, *_, call_id in ends:
+        stubs.setdefault(call_id, at)
+    conn = get_connection()
+    with transaction(conn):
+        conn.executemany(INSERT_CALL, calls)
+        conn.executemany(INSERT_STUB_CALL, stubs.items())
+        conn.executemany(INSERT_TURN, turns)
+        conn.executemany(END_CALL, ends)
+    for end in ends:
+        # One call's failure must not cost the others their facts.
+        try:
+            extract_call_facts(end[-1])
+        except Exception as e:
+            metrics.record_error("call_facts", e)
+
+
+def extract_call_facts(call_id):
+    """Pull tax facts from what the caller said and merge them into their profile."""
+    from store.profiles import get_store, learn_from_message
+    from tax_engine.facts import extract_facts
+
+    conn = get_connection()
+    text = "\n".join(row["text"] for row in conn.execute(SELECT_CALLER_TEXT, (call_id,)))
+    if not text:
+        return
+    row = conn.execute(SELECT_PHONE, (call_id,)).fetchone()
+    phone = row["phone"] if row else None
+    facts = learn_from_message(phone, text) if phone else extract_facts(text)
+    if facts:
+        conn.execute(SET_FACTS, (json.dumps(facts), call_id))
+    if phone:
+        get_store().add_summary(phone, "call", text)
+
+
+class CallLog:
+    """Non-blocking event sink for live calls, drained by one background task."""
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self._queue = asyncio.Queue(queue_size)
+        self._task = None
+
+    def record(self, kind, row):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+        try:
+            self._queue.put_nowait((kind, row))
+        except asyncio.QueueFull:
+            metrics.call_log_dropped_total.inc(kind=kind)
+
+    def start_call(self, call_id, call_sid=None, session_id=None, phone=None):
+        phone = normalize_phone(phone) if phone else None
+        self.record("start", (call_id, call_sid, session_id, phone, time.time()))
+
+    def add_turn(self, call_id, role, text):
+        if text and text.strip():
+            self.record("turn", (call_id, role, text.strip(), time.time()))
+
+    def end_call(self, call_id, inbound_frames, outbound_frames, first_reply_seconds=None):
+        now = time.time()
+        self.record("end", (now, now, inbound_frames, outbound_frames, first_reply_seconds, call_id))
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Let a batch build up so a call's events share one transaction.
+            await asyncio.sleep(FLUSH_INTERVAL)
+            while len(batch) < BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+
+    async def _write(self, batch):
+        try:
+            with metrics.timed("call_log_write"):
+                await asyncio.to_thread(write_events, batch)
+        except Exception as e:
+            metrics.record_error("call_log_write", e)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    async def close(self):
+        """Write everything still queued and stop the background task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        self._task = None
+
+
+_call_log = None
+
+
+def get_call_log():
+    global _call_log
+    if _call_log is None:
+        _call_log = CallLog()
+    return _call_log
+
+
+async def close_call_log():
+    if _call_log is not None:
+        await _call_log.close()
+
+
+# ---------------------------------- Queries ----------------------------------
+
+def recent_calls(phone, limit=10):
+    """The latest calls with this number, newest first."""
+    rows = get_connection().execute(SELECT_RECENT, (normalize_phone(phone), limit)).fetchall()
+    return [_call_row(row) for row in rows]
+
+
+def get_call(call_id):
+    """One call with its transcript, or None."""
+    conn = get_connection()
+    row = conn.execute(SELECT_CALL, (call_id,)).fetchone()
+    if row is None:
+        return None
+    call = _call_row(row)
+    call["transcript"] = [dict(turn) for turn in conn.execute(SELECT_TURNS, (call_id,))]
+    return call
@@ -0,0 +1,78 @@
+"""
+Local SQLite storage shared by the backend subsystems.
+
+One database file in WAL mode, so readers never wait for the writer and
+several worker processes can share it. Connections are per thread (sqlite3
+connections must not cross threads); statements are parameterized constants,
+which sqlite3 prepares once and keeps in its per-connection statement cache.
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+DB_PATH = Path(os.getenv("ASSISTANT_DB_PATH", Path(__file__).resolve().parent.parent / "data" / "assistant.db"))
+BUSY_TIMEOUT_SECONDS = 5.0
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_schemas = []
+_schema_lock = threading.Lock()
+
+
+def register_schema(sql):
+    """Register CREATE TABLE/INDEX IF NOT EXISTS statements for the database.
+
+    Nothing is opened here; each connection applies the schemas it has not
+    seen yet the next time it is handed out.
+    """
+    with _schema_lock:
+        if sql not in _schemas:
+            _schemas.append(sql)
+
+
+def _apply_schemas(conn, applied):
+    for sql in _schemas[applied:]:
+        conn.executescript(sql)
+    return len(_schemas)
+
+
+def connect(path=None):
+    """Open a tuned connection to the database at `path` (default DB_PATH)."""
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        path, timeout=BUSY_TIMEOUT_SECONDS, cached_statements=STATEMENT_CACHE_SIZE, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL makes NORMAL durable against application crashes; only a power
+    # loss can drop the last transactions.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def get_connection():
+    """This thread's connection to DB_PATH, opened on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = connect()
+        _local.applied = 0
+    if _local.applied < len(_schemas):
+        _local.applied = _apply_schemas(conn, _local.applied)
+    return conn
+
+
+class transaction:
+    """`with transaction(conn):` runs the block in BEGIN IMMEDIATE ... COMMIT."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
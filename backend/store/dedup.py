@@ -0,0 +1,146 @@
+"""
+Idempotency for Twilio webhooks, which are retried when a response is slow.
+
+Each delivery carries an ID (MessageSid, CallSid). The first delivery claims
+it; later deliveries of the same ID within the TTL get back the value stored
+with the claim (a trace ID, a rendered TwiML document) instead of being
+processed again. A delivery that fails releases its claim, so the retry
+runs.
+
+Claims live in a ring of time buckets: a bucket holds the IDs first seen in
+its BUCKET_SECONDS slice, and whole buckets are dropped as they age past
+the TTL, so expiry costs nothing per key and memory is capped by MAX_KEYS.
+With WEBHOOK_DEDUP_SHARED=1 claims are also made in the SQLite store, so
+several worker processes agree on who got a delivery first.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from store.db import get_connection, register_schema
+
+TTL_SECONDS = float(os.getenv("WEBHOOK_DEDUP_TTL", 3600))
+BUCKET_SECONDS = 60.0
+MAX_KEYS = 100_000
+SHARED = os.getenv("WEBHOOK_DEDUP_SHARED", "0") == "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_claims (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL,
+    claimed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_webhook_claims_at ON webhook_claims(claimed_at);
+"""
+CLAIM = "INSERT OR IGNORE INTO webhook_claims (key, value, claimed_at) VALUES (?, ?, ?)"
+SELECT_CLAIM = "SELECT value FROM webhook_claims WHERE key = ? AND claimed_at >= ?"
+REPLACE_CLAIM = "UPDATE webhook_claims SET value = ?, claimed_at = ? WHERE key = ? AND claimed_at < ?"
+UPDATE_CLAIM = "UPDATE webhook_claims SET value = ? WHERE key = ?"
+DELETE_CLAIM = "DELETE FROM webhook_claims WHERE key = ?"
+EXPIRE = "DELETE FROM webhook_claims WHERE claimed_at < ?"
+
+
+class SeenSet:
+    """Bounded, time-bucketed set of claimed webhook IDs."""
+
+    def __init__(self, ttl=TTL_SECONDS, bucket_seconds=BUCKET_SECONDS, max_keys=MAX_KEYS, shared=SHARED):
+        self.ttl = ttl
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max(1, int(ttl // bucket_seconds) + 1)
+        self.max_keys = max_keys
+        self.shared = shared
+        self._buckets = deque()  # (bucket number, {key: value}), oldest first
+        self._size = 0
+        self._lock = threading.Lock()
+        if shared:
+            register_schema(SCHEMA)
+
+    def claim(self, key, value=""):
+        """Claim `key` for this delivery.
+
+        Returns None if this is the first delivery, otherwise the value
+        stored by the delivery that claimed it.
+        """
+        now = time.time()
+        with self._lock:
+            self._rotate(now)
+            for _, seen in self._buckets:
+                if key in seen:
+                    return seen[key]
+            if self.shared:
+                previous = self._claim_shared(key, value, now)
+                if previous is not None:
+                    self._add(key, previous)
+                    return previous
+            self._add(key, value)
+            return None
+
+    def update(self, key, value):
+        """Replace the value stored with an existing claim (e.g. once the response is ready)."""
+        with self._lock:
+            for _, seen in self._buckets:
+                if key in seen:
+                    seen[key] = value
+        if self.shared:
+            get_connection().execute(UPDATE_CLAIM, (value, key))
+
+    def release(self, key):
+        """Drop a claim whose delivery failed, so Twilio's retry is processed again."""
+        with self._lock:
+            for _, seen in self._buckets:
+                if seen.pop(key, None) is not None:
+                    self._size -= 1
+        if self.shared:
+            get_connection().execute(DELETE_CLAIM, (key,))
+
+    def __len__(self):
+        return self._size
+
+    def _add(self, key, value):
+        self._buckets[-1][1][key] = value
+        self._size += 1
+        # Over capacity: drop the oldest bucket early rather than grow, and
+        # within a single bucket the oldest keys.
+        while self._size > self.max_keys:
+            if len(self._buckets) > 1:
+                self._size -= len(self._buckets.popleft()[1])
+            else:
+                seen = self._buckets[0][1]
+                del seen[next(iter(seen))]
+                self._size -= 1
+
+    def _rotate(self, now):
+        current = int(now // self.bucket_seconds)
+        if self._buckets and self._buckets[-1][0] == current:
+            return
+        self._buckets.append((current, {}))
+        oldest = current - self.max_buckets + 1
+        while self._buckets[0][0] < oldest:
+            self._size -= len(self._buckets.popleft()[1])
+        if self.shared:
+            get_connection().execute(EXPIRE, (now - self.ttl,))
+
+    def _claim_shared(self, key, value, now):
+        conn = get_connection()
+        if conn.execute(CLAIM, (key, value, now)).rowcount:
+            return None
+        row = conn.execute(SELECT_CLAIM, (key, now - self.ttl)).fetchone()
+        if row is not None:
+            return row["value"]
+        # An expired claim that has not been swept yet: take it over.
+        conn.execute(REPLACE_CLAIM, (value, now, key, now - self.ttl))
+        return None
+
+
+_seen = None
+_seen_lock = threading.Lock()
+
+
+def get_seen_set():
+    global _seen
+    if _seen is None:
+        with _seen_lock:
+            if _seen is None:
+                _seen = SeenSet()
+    return _seen
@@ -0,0 +1,316 @@
+"""
+Per-user memory for the WhatsApp and call flows: tax profiles, short
+conversation summaries and the latest computed results, keyed by phone number.
+
+Writes go through a write-behind buffer: updates for the same user and
+assessment year are merged in memory and flushed together in one
+transaction every FLUSH_INTERVAL seconds (or when the buffer fills up), so a
+busy conversation costs one write per interval instead of one per turn.
+Reads see buffered writes immediately.
+
+Only the changed fields are buffered, and a flush patches them into the
+stored row (SQLite json_patch) rather than replacing it, so fields written
+meanwhile by another worker process are kept.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from store.db import get_connection, register_schema, transaction
+from tax_engine.rules import ASSESSMENT_YEAR
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("PROFILE_FLUSH_INTERVAL", 2.0))
+MAX_BUFFERED = 500
+HOT_PROFILES = 1024
+SUMMARY_CHARS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id     TEXT PRIMARY KEY,
+    phone       TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    last_seen   REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_phone ON users(phone);
+
+CREATE TABLE IF NOT EXISTS tax_profiles (
+    user_id          TEXT NOT NULL REFERENCES users(user_id),
+    assessment_year  TEXT NOT NULL,
+    profile          TEXT NOT NULL,
+    updated_at       REAL NOT NULL,
+    PRIMARY KEY (user_id, assessment_year)
+);
+CREATE INDEX IF NOT EXISTS idx_tax_profiles_year ON tax_profiles(assessment_year);
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    id          INTEGER PRIMARY KEY,
+    user_id     TEXT NOT NULL REFERENCES users(user_id),
+    channel     TEXT NOT NULL,
+    summary     TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_user ON conversation_summaries(user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS tax_results (
+    id               INTEGER PRIMARY KEY,
+    user_id          TEXT NOT NULL REFERENCES users(user_id),
+    assessment_year  TEXT NOT NULL,
+    result           TEXT NOT NULL,
+    created_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_user_year ON tax_results(user_id, assessment_year, created_at);
+"""
+register_schema(SCHEMA)
+
+UPSERT_USER = """
+INSERT INTO users (user_id, phone, created_at, last_seen) VALUES (?, ?, ?, ?)
+ON CONFLICT(user_id) DO UPDATE SET last_seen = excluded.last_seen
+"""
+UPSERT_PROFILE = """
+INSERT INTO tax_profiles (user_id, assessment_year, profile, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(user_id, assessment_year) DO UPDATE SET
+    profile = json_patch(tax_profiles.profile, excluded.profile), updated_at = excluded.updated_at
+"""
+SELECT_PROFILE = "SELECT profile FROM tax_profiles WHERE user_id = ? AND assessment_year = ?"
+INSERT_SUMMARY = "INSERT INTO conversation_summaries (user_id, channel, summary, created_at) VALUES (?, ?, ?, ?)"
+SELECT_SUMMARIES = """
+SELECT channel, summary, created_at FROM conversation_summaries
+WHERE user_id = ? ORDER BY created_at DESC LIMIT ?
+"""
+INSERT_RESULT = "INSERT INTO tax_results (user_id, assessment_year, result, created_at) VALUES (?, ?, ?, ?)"
+SELECT_RESULT = """
+SELECT result FROM tax_results
+WHERE user_id = ? AND assessment_year = ? ORDER BY created_at DESC LIMIT 1
+"""
+
+
+def normalize_phone(phone):
+    """'whatsapp:+91 98765-43210' -> '+919876543210'; the user ID for that number."""
+    digits = re.sub(r"[^\d+]", "", str(phone).split(":")[-1])
+    if not digits:
+        raise ValueError(f"not a phone number: {phone!r}")
+    if not digits.startswith("+"):
+        digits = "+91" + digits[-10:] if len(digits) >= 10 else digits
+    return digits
+
+
+class ProfileStore:
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self._lock = threading.Lock()
+        self._profiles = {}       # (user_id, year) -> fields changed since the last flush
+        self._summaries = []      # pending INSERT_SUMMARY rows
+        self._results = {}        # (user_id, year) -> latest pending result
+        self._seen = {}           # user_id -> last_seen
+        self._hot = OrderedDict()  # (user_id, year) -> profile, recently used
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="profile-store-flush", daemon=True)
+        self._flusher.start()
+
+    # ---- Reads ----
+
+    def get_profile(self, phone, year=ASSESSMENT_YEAR):
+        """The stored profile (dict of engine fields) for this number, or {}."""
+        key = (normalize_phone(phone), year)
+        with self._lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                return dict(self._hot[key])
+        row = get_connection().execute(SELECT_PROFILE, key).fetchone()
+        stored = json.loads(row["profile"]) if row else {}
+        with self._lock:
+            if key not in self._hot:
+                self._remember(key, {**stored, **self._profiles.get(key, {})}, locked=True)
+            return dict(self._hot[key])
+
+    def recent_summaries(self, phone, limit=5):
+        user_id = normalize_phone(phone)
+        with self._lock:
+            pending = [
+                {"channel": channel, "summary": summary, "created_at": created_at}
+                for uid, channel, summary, created_at in self._summaries if uid == user_id
+            ]
+        rows = get_connection().execute(SELECT_SUMMARIES, (user_id, limit)).fetchall()
+        stored = [dict(row) for row in rows]
+        return (pending[::-1] + stored)[:limit]
+
+    def latest_result(self, phone, year=ASSESSMENT_YEAR):
+        key = (normalize_phone(phone), year)
+        with self._lock:
+            if key in self._results:
+                return self._results[key][1]
+        row = get_connection().execute(SELECT_RESULT, key).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    # ---- Buffered writes ----
+
+    def update_profile(self, phone, fields, year=ASSESSMENT_YEAR):
+        """Merge `fields` into the stored profile; returns the merged profile."""
+        key = (normalize_phone(phone), year)
+        stored = self.get_profile(phone, year)  # loads the row outside the lock
+        with self._lock:
+            # Merge into the latest copy under the lock so concurrent updates all land.
+            current = {**self._hot.get(key, stored), **fields}
+            self._profiles.setdefault(key, {}).update(fields)
+            self._seen[key[0]] = time.time()
+            self._remember(key, current, locked=True)
+            full = len(self._profiles) + len(self._summaries) >= MAX_BUFFERED
+        if full:
+            self.flush()
+        return dict(current)
+
+    def add_summary(self, phone, channel, user_text, reply_text=""):
+        user_id = normalize_phone(phone)
+        summary = f"User: {user_text.strip()[:SUMMARY_CHARS]}"
+        if reply_text:
+            summary += f"\nAssistant: {reply_text.strip()[:SUMMARY_CHARS]}"
+        now = time.time()
+        with self._lock:
+            self._summaries.append((user_id, channel, summary, now))
+            self._seen[user_id] = now
+
+    def save_result(self, phone, result, year=ASSESSMENT_YEAR):
+        user_id = normalize_phone(phone)
+        with self._lock:
+            self._results[(user_id, year)] = (time.time(), result)
+            self._seen[user_id] = time.time()
+
+    # ---- Flushing ----
+
+    def flush(self):
+        """Write every buffered change in one transaction."""
+        with self._lock:
+            profiles, self._profiles = self._profiles, {}
+            summaries, self._summaries = self._summaries, []
+            results, self._results = self._results, {}
+            seen, self._seen = self._seen, {}
+        if not (profiles or summaries or results or seen):
+            return
+        try:
+            conn = get_connection()
+            with transaction(conn):
+                conn.executemany(UPSERT_USER, [(uid, uid, at, at) for uid, at in seen.items()])
+                conn.executemany(UPSERT_PROFILE, [
+                    (uid, year, json.dumps(fields), time.time()) for (uid, year), fields in profiles.items()])
+                conn.executemany(INSERT_SUMMARY, summaries)
+                conn.executemany(INSERT_RESULT, [
+                    (uid, year, json.dumps(result), at) for (uid, year), (at, result) in results.items()])
+        except Exception:
+            logger.exception("profile store flush failed; keeping %d changes buffered", len(profiles) + len(summaries))
+            with self._lock:
+                for key, fields in profiles.items():
+                    self._profiles[key] = {**fields, **self._profiles.get(key, {})}
+                self._summaries[:0] = summaries
+                for key, value in results.items():
+                    self._results.setdefault(key, value)
+                for uid, at in seen.items():
+                    self._seen.setdefault(uid, at)
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join(timeout=self._flush_interval + 1)
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    def _remember(self, key, profile, locked=False):
+        if not locked:
+            with self._lock:
+                return self._remember(key, profile, locked=True)
+        self._hot[key] = profile
+        self._hot.move_to_end(key)
+        while len(self._hot) > HOT_PROFILES:
+            self._hot.popitem(last=False)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide ProfileStore, started on first use and flushed at exit."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProfileStore()
+                atexit.register(_store.close)
+    return _store
+
+
+def flush_store():
+    """Flush the process-wide store if it was ever started."""
+    if _store is not None:
+        _store.flush()
+
+
+# ---------------------------------- Prompting ----------------------------------
+
+def user_context(phone, year=ASSESSMENT_YEAR):
+    """Text block describing what we already know about this user, or ''."""
+    store = get_store()
+    profile = store.get_profile(phone, year)
+    result = store.latest_result(phone, year)
+    summaries = store.recent_summaries(phone, limit=3)
+    if not (profile or summaries):
+        return ""
+    lines = []
+    if profile:
+        lines.append("Known tax details (do not ask for these again): "
+                     + ", ".join(f"{name}={value}" for name, value in sorted(profile.items())))
+    if result:
+        lines.append(
+            f"Last computed for AY {result.get('assessment_year', year)}: "
+            f"old regime tax {result['old_regime']['total_tax']}, new regime tax {result['new_regime']['total_tax']}, "
+            f"recommended {result['recommended_regime']} regime.")
+    if summaries:
+        lines.append("Earlier conversation:\n" + "\n".join(s["summary"] for s in reversed(summaries)))
+    return "\n".join(lines)
+
+
+def learn_from_message(phone, text, year=ASSESSMENT_YEAR):
+    """Merge the tax facts in `text` into the user's profile and refresh the result.
+
+    Returns the facts found. The old-vs-new computation is rerun (and saved)
+    only when something changed and the profile has a salary.
+    """
+    from tax_engine.facts import extract_facts
+
+    return learn_facts(phone, extract_facts(text), year)
+
+
+def learn_facts(phone, facts, year=ASSESSMENT_YEAR):
+    """Merge already-extracted profile fields (chat, call or document) into the profile."""
+    from tax_engine import engine
+    from tax_engine.facts import has_salary
+
+    # A value the engine would reject (e.g. "9999999 crore") is never stored,
+    # or it would fail every later computation for this user.
+    valid = {}
+    for field, value in (facts or {}).items():
+        try:
+            engine.normalize_profile({field: value})
+        except ValueError as e:
+            logger.warning("dropping fact %s=%r: %s", field, value, e)
+            continue
+        valid[field] = value
+    if not valid:
+        return valid
+    store = get_store()
+    profile = store.update_profile(phone, valid, year)
+    if has_salary(profile):
+        try:
+            store.save_result(phone, engine.compute(profile), year)
+        except ValueError as e:
+            # A profile stored before these checks must not fail the caller.
+            logger.warning("cannot compute stored profile for %s: %s", normalize_phone(phone), e)
+    return valid
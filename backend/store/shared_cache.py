@@ -0,0 +1,157 @@
+"""
+Cache tier shared by every worker process on the host.
+
+Each uvicorn worker used to keep its own answer caches, so with N workers a
+repeated question missed N times before every worker knew the answer.
+SharedCache puts a SQLite file (SHARED_CACHE_PATH, default
+backend/data/cache.db) behind a small in-process LRU:
+
+    cache = SharedCache("gemini_query", ttl=6 * 3600)
+    answer = cache.get(key)            # local LRU, then the shared file
+    cache.set(key, answer)
+
+The file is opened in WAL mode with mmap reads, so a lookup is a B-tree
+walk over mapped pages without a read() system call. A local hit costs about
+a microsecond and a shared hit costs tens of microseconds. Writes are
+not synced, because losing cached answers in a power cut is harmless.
+
+Keys must already include everything the value depends on (the prompt
+version, the model). An entry is never updated in place, only expired.
+Because of that, the local copy of a shared entry can never go stale.
+Values must be JSON-serializable.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import metrics
+
+CACHE_PATH = Path(os.getenv("SHARED_CACHE_PATH", Path(__file__).resolve().parent.parent / "data" / "cache.db"))
+DEFAULT_TTL = 6 * 3600
+LOCAL_ENTRIES = 1024
+MAX_SHARED_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", 200_000))
+MMAP_BYTES = 256 * 1024 * 1024
+PRUNE_EVERY = 500  # writes per process between sweeps of expired rows
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    expires_at  REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_expiry ON cache_entries(expires_at);
+"""
+SELECT_ENTRY = "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?"
+UPSERT_ENTRY = "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)"
+DELETE_EXPIRED = "DELETE FROM cache_entries WHERE expires_at <= ?"
+COUNT_ENTRIES = "SELECT COUNT(*) FROM cache_entries"
+DELETE_OLDEST = """
+DELETE FROM cache_entries WHERE rowid IN (
+    SELECT rowid FROM cache_entries ORDER BY expires_at LIMIT ?
+)
+"""
+
+_local = threading.local()
+_writes = 0
+_writes_lock = threading.Lock()
+
+
+def _connection():
+    """This thread's connection to CACHE_PATH, opened on first use.
+
+    The connection is tied to the process that opened it. A worker forked
+    from a parent that already had one opens its own instead.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=1.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+        conn.executescript(SCHEMA)
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def hash_key(key):
+    """Fixed-size key for the shared table, however long the prompt is."""
+    return hashlib.blake2b(str(key).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _prune(conn, now):
+    conn.execute(DELETE_EXPIRED, (now,))
+    excess = conn.execute(COUNT_ENTRIES).fetchone()[0] - MAX_SHARED_ENTRIES
+    if excess > 0:
+        conn.execute(DELETE_OLDEST, (excess,))
+
+
+class SharedCache:
+    """Two-tier cache: a per-process LRU in front of the host-wide SQLite file."""
+
+    def __init__(self, namespace, ttl=DEFAULT_TTL, local_entries=LOCAL_ENTRIES):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_entries = local_entries
+        self._entries = OrderedDict()  # hashed key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.local_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        key = hash_key(key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    metrics.shared_cache_lookups_total.inc(cache=self.namespace, tier="local")
+                    return entry[1]
+                del self._entries[key]
+        try:
+            row = _connection().execute(SELECT_ENTRY, (self.namespace, key, now)).fetchone()
+        except sqlite3.Error as e:
+            # The shared tier is an optimisation; a locked or broken file is a miss.
+            metrics.record_error("shared_cache", e)
+            row = None
+        if row is None:
+            metrics.shared_cache_lookups_total.inc(cache=self.namespace, tier="miss")
+            return default
+        value = json.loads(row[0])
+        self._remember(key, row[1], value)
+        metrics.shared_cache_lookups_total.inc(cache=self.namespace, tier="shared")
+        return value
+
+    def set(self, key, value, ttl=None):
+        global _writes
+        key = hash_key(key)
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._remember(key, expires_at, value)
+        with _writes_lock:
+            _writes += 1
+            prune = _writes % PRUNE_EVERY == 0
+        try:
+            conn = _connection()
+            conn.execute(UPSERT_ENTRY, (self.namespace, key, json.dumps(value), expires_at))
+            if prune:
+                _prune(conn, now)
+        except sqlite3.Error as e:
+            metrics.record_error("shared_cache", e)
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,166 @@
+"""
+Streaming batch computation for the /tax/compute-batch endpoint.
+
+The upload is first spooled to a temporary file (in memory up to
+SPOOL_MAX_BYTES, on disk beyond that), because a streaming response also
+listens on the connection and cannot share it with a body still being read.
+The spool is then parsed into records, grouped into chunks of CHUNK_ROWS and
+each chunk is computed in one vectorized pass off the event loop. Results are
+streamed back in the input format (NDJSON or CSV) as each chunk is done, so
+memory stays bounded by one chunk.
+"""
+import asyncio
+import csv
+import io
+import json
+import tempfile
+
+from tax_engine.engine import (
+    columns_from_profiles, compute_columns, normalize_profile, result_rows, ROW_FIELDS,
+)
+
+CHUNK_ROWS = 4096
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+READ_BYTES = 256 * 1024
+ID_FIELDS = ("id", "employee_id", "employeeId", "emp_id")
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+CONTENT_TYPES = {
+    "application/x-ndjson": NDJSON,
+    "application/ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+    "text/csv": CSV,
+}
+MEDIA_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+
+
+def detect_format(content_type):
+    return CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+
+
+def record_id(record):
+    for field in ID_FIELDS:
+        if record.get(field) not in (None, ""):
+            return record[field]
+    return None
+
+
+def compute_records(records, first_line=1):
+    """Compute a chunk of raw records; invalid records become error rows.
+
+    Returns rows in input order, each with `line` and `id` (when present).
+    """
+    valid, positions, rows = [], [], []
+    for offset, record in enumerate(records):
+        line = first_line + offset
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("expected an object")
+            valid.append(normalize_profile(record))
+            positions.append(offset)
+            rows.append({"line": line, "id": record_id(record)})
+        except ValueError as e:
+            rows.append({"line": line, "id": record_id(record) if isinstance(record, dict) else None, "error": str(e)})
+    if valid:
+        results = result_rows(compute_columns(columns_from_profiles(valid)))
+        for offset, result in zip(positions, results):
+            rows[offset].update(result)
+    return rows
+
+
+async def spool_body(chunks):
+    """Copy an async byte stream into a rewound SpooledTemporaryFile."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    async for chunk in chunks:
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def aiter_file(file, size=READ_BYTES):
+    """Read a file in blocks as an async byte stream, closing it at the end."""
+    try:
+        while True:
+            block = await asyncio.to_thread(file.read, size)
+            if not block:
+                break
+            yield block
+    finally:
+        file.close()
+
+
+async def aiter_lines(chunks):
+    """Split an async stream of byte chunks into decoded lines."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def aiter_records(lines, fmt):
+    """Yield (line number, record) from NDJSON or CSV lines."""
+    header = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == NDJSON:
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, f"invalid JSON: {e.msg}"
+        elif header is None:
+            header = next(csv.reader([line]))
+        else:
+            values = next(csv.reader([line]))
+            yield line_no, dict(zip(header, values))
+
+
+def _encode_rows(rows, fmt, write_header):
+    if fmt == NDJSON:
+        return "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["line", "id", *ROW_FIELDS, "error"], extrasaction="ignore")
+    if write_header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+async def stream_results(chunks, fmt, chunk_rows=CHUNK_ROWS):
+    """Async generator of encoded result bytes for an async stream of request bytes."""
+    records, lines = [], []
+    first = True
+
+    async def flush():
+        rows = await asyncio.to_thread(_compute_numbered, list(zip(lines, records)))
+        return _encode_rows(rows, fmt, write_header=first)
+
+    async for line_no, record in aiter_records(aiter_lines(chunks), fmt):
+        records.append(record)
+        lines.append(line_no)
+        if len(records) >= chunk_rows:
+            yield await flush()
+            records, lines, first = [], [], False
+    if records or (first and fmt == CSV):
+        yield await flush()
+
+
+def _compute_numbered(numbered):
+    """compute_records() for records that carry their own source line numbers.
+
+    A record that is a string is a parse error message from aiter_records().
+    """
+    rows = compute_records([record for _, record in numbered])
+    for row, (line, record) in zip(rows, numbered):
+        row["line"] = line
+        if isinstance(record, str):
+            row["error"] = record
+    return rows
@@ -0,0 +1,47 @@
+"""
+Vectorized slab-table core shared by every regime and income head.
+
+A slab table is compiled once into three arrays (lower bound, width, rate)
+so that the tax on any number of incomes is a single clip-multiply-sum.
+"""
+import numpy as np
+
+# Finite stand-in for "no upper bound", so widths never become inf - inf.
+OPEN_END = 1e15
+
+
+def compile_slabs(slabs, length=None):
+    """Compile [(lower, rate), ...] into (lower, width, rate) float64 arrays.
+
+    `length` pads the table with empty slabs so tables for different age bands
+    can be stacked and gathered per row.
+    """
+    lowers = [float(lower) for lower, _ in slabs]
+    rates = [float(rate) for _, rate in slabs]
+    uppers = lowers[1:] + [OPEN_END]
+    widths = [upper - lower for lower, upper in zip(lowers, uppers)]
+    while length is not None and len(lowers) < length:
+        lowers.append(OPEN_END)
+        widths.append(0.0)
+        rates.append(0.0)
+    return np.array(lowers), np.array(widths), np.array(rates)
+
+
+def compile_slab_bands(tables):
+    """Stack several slab tables into (bands, k) arrays for per-row selection."""
+    length = max(len(slabs) for slabs in tables)
+    compiled = [compile_slabs(slabs, length) for slabs in tables]
+    return tuple(np.stack(parts) for parts in zip(*compiled))
+
+
+def slab_tax(income, compiled):
+    """Tax on `income` (array) under one compiled slab table."""
+    lower, width, rate = compiled
+    return np.clip(income[:, None] - lower, 0.0, width) @ rate
+
+
+def slab_tax_banded(income, band, compiled_bands):
+    """Tax on `income` where row i uses the slab table `band[i]`."""
+    lower, width, rate = compiled_bands
+    amounts = np.clip(income[:, None] - lower[band], 0.0, width[band])
+    return np.einsum("ij,ij->i", amounts, rate[band])
@@ -0,0 +1,461 @@
+"""
+Single tax engine for salaried individuals (old and new regime).
+
+Profiles use the same keys as the frontend calculator (`salary_inputs` /
+`deduction_inputs` in camelCase), plus INCOME_FIELDS for the other heads
+(house property, business, capital gains, other sources). Internally every computation works on
+columns (dict of NumPy arrays), so one profile and a million profiles go
+through exactly the same code:
+
+    compute(profile)            -> nested breakdown dict for one profile
+    compute_batch(profiles)     -> list of flat result rows
+    compute_columns(columns)    -> dict of result arrays
+
+The computation is a list of stages (STAGES); each stage reads and writes
+entries of the column dict.
+"""
+import math
+import re
+
+import numpy as np
+
+from tax_engine import rules
+from tax_engine.core import compile_slabs, compile_slab_bands, slab_tax, slab_tax_banded
+
+SALARY_FIELDS = ["basic", "da", "hra", "lta", "bonus", "otherAllowances"]
+INCOME_FIELDS = [
+    "rentalIncome", "municipalTaxes", "letOutLoanInterest",
+    "businessIncome", "turnover44AD", "receipts44ADA",
+    "stcg111A", "ltcg112A", "ltcgOther", "stcgOther",
+    "otherSourcesIncome",
+]
+DEDUCTION_FIELDS = [
+    "ppf", "elss", "nsc", "epf", "homeLoanPrinciple80C", "medicalPremiums",
+    "educationLoanInterest", "nps", "savingsAccountInterest", "homeLoanInterest24B", "rentPaid",
+]
+AMOUNT_FIELDS = SALARY_FIELDS + INCOME_FIELDS + DEDUCTION_FIELDS
+FLAG_FIELDS = {"metroPolitanCity": True}
+DEFAULT_AGE = 30
+# Rs 10 lakh crore; far above any real income. Bounds each amount and also
+# their sum, since totals (gross salary, basic + DA) are multiplied by rates in
+# basis points and the fixed-point engine must stay inside int64.
+MAX_AMOUNT = 1e13
+
+INPUT_FIELDS = AMOUNT_FIELDS + list(FLAG_FIELDS) + ["age"]
+
+# Alternative spellings accepted from payroll files and API clients, matched
+# after lowercasing and dropping everything except letters and digits.
+FIELD_ALIASES = {
+    "homeloanprincipal": "homeLoanPrinciple80C",
+    "homeloanprincipal80c": "homeLoanPrinciple80C",
+    "eduloaninterest": "educationLoanInterest",
+    "savingsinterest": "savingsAccountInterest",
+    "homeloaninterest": "homeLoanInterest24B",
+    "metro": "metroPolitanCity",
+    "ismetro": "metroPolitanCity",
+    "metropolitancity": "metroPolitanCity",
+    "rent": "rentPaid",
+    "rentreceived": "rentalIncome",
+    "businessprofit": "businessIncome",
+    "stcg": "stcg111A",
+    "ltcg": "ltcg112A",
+    "othersources": "otherSourcesIncome",
+}
+
+_CANONICAL = {re.sub(r"[^a-z0-9]", "", name.lower()): name for name in INPUT_FIELDS}
+_CANONICAL.update(FIELD_ALIASES)
+
+_TRUE = {"1", "true", "yes", "y", "t"}
+_FALSE = {"0", "false", "no", "n", "f", ""}
+
+AGE_BANDS = ["below_60", "senior", "super_senior"]
+_OLD_SLABS = compile_slab_bands([rules.OLD_REGIME_SLABS[band] for band in AGE_BANDS])
+_NEW_SLABS = compile_slabs(rules.NEW_REGIME_SLABS)
+# Basic exemption: the lower bound of the first taxed slab.
+_OLD_EXEMPTION = np.array([rules.OLD_REGIME_SLABS[band][1][0] for band in AGE_BANDS], dtype=np.float64)
+_NEW_EXEMPTION = float(rules.NEW_REGIME_SLABS[1][0])
+_SURCHARGE_LOWER = np.array([lower for lower, _ in rules.SURCHARGE_SLABS], dtype=np.float64)
+_SURCHARGE_RATE = {
+    "old": np.array([rate for _, rate in rules.SURCHARGE_SLABS]),
+    "new": np.minimum([rate for _, rate in rules.SURCHARGE_SLABS], rules.SURCHARGE_MAX_NEW),
+}
+
+
+def canonical_field(name):
+    """Map a column/key name to its canonical input field, or None if unknown."""
+    return _CANONICAL.get(re.sub(r"[^a-z0-9]", "", str(name).lower()))
+
+
+def parse_flag(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"expected a yes/no value, got {value!r}")
+
+
+def parse_amount(value):
+    if value is None or value == "":
+        return 0.0
+    amount = float(str(value).replace(",", "")) if isinstance(value, str) else float(value)
+    if not math.isfinite(amount) or amount < 0:
+        raise ValueError(f"expected a non-negative amount, got {value!r}")
+    if amount > MAX_AMOUNT:
+        raise ValueError(f"amount too large: {value!r}")
+    return amount
+
+
+def normalize_profile(profile):
+    """Flatten and validate a profile into canonical field -> value.
+
+    Accepts either {"salary_inputs": {...}, "deduction_inputs": {...}, "age": 30}
+    or a flat dict. Unknown keys are ignored; bad values raise ValueError.
+    """
+    flat = {}
+    for key, value in profile.items():
+        if isinstance(value, dict):
+            flat.update(value)
+        else:
+            flat[key] = value
+
+    normalized = {name: 0.0 for name in AMOUNT_FIELDS}
+    normalized.update(FLAG_FIELDS)
+    normalized["age"] = DEFAULT_AGE
+    for key, value in flat.items():
+        field = canonical_field(key)
+        if field is None:
+            continue
+        try:
+            if field in FLAG_FIELDS:
+                normalized[field] = parse_flag(value)
+            elif field == "age":
+                normalized[field] = int(parse_amount(value)) if value not in (None, "") else DEFAULT_AGE
+            else:
+                normalized[field] = parse_amount(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{key}: {e}") from None
+    if sum(normalized[name] for name in AMOUNT_FIELDS) > MAX_AMOUNT:
+        raise ValueError(f"amounts add up to more than {MAX_AMOUNT:.0f}")
+    return normalized
+
+
+def columns_from_profiles(profiles):
+    """Build input columns from already-normalized profiles."""
+    return {
+        field: np.array([p[field] for p in profiles], dtype=np.float64)
+        for field in INPUT_FIELDS
+    }
+
+
+# ---------------------------------- Stages ----------------------------------
+
+def income_stage(c):
+    c["gross_salary"] = sum(c[name] for name in SALARY_FIELDS)
+    c["other_income"] = c["savingsAccountInterest"] + c["otherSourcesIncome"]
+    c["business_income"] = (
+        c["businessIncome"]
+        + c["turnover44AD"] * rules.PRESUMPTIVE_44AD_RATE
+        + c["receipts44ADA"] * rules.PRESUMPTIVE_44ADA_RATE
+    )
+    # Let-out property: annual value less the 30% standard deduction and loan
+    # interest. Negative values are a loss under house property.
+    annual_value = np.maximum(c["rentalIncome"] - c["municipalTaxes"], 0.0)
+    c["let_out_income"] = annual_value - annual_value * rules.HP_STANDARD_DEDUCTION_RATE - c["letOutLoanInterest"]
+    c["capital_gains"] = c["stcgOther"] + c["stcg111A"] + c["ltcg112A"] + c["ltcgOther"]
+    c["special_rate_gains"] = c["stcg111A"] + c["ltcg112A"] + c["ltcgOther"]
+    c["gross_total_income"] = (
+        c["gross_salary"] + c["other_income"] + c["business_income"] + c["let_out_income"] + c["capital_gains"])
+
+
+def old_deductions_stage(c):
+    senior = c["age"] >= rules.SENIOR_AGE
+    basic_da = c["basic"] + c["da"]
+    hra_rate = np.where(c["metroPolitanCity"] > 0, rules.HRA_METRO_RATE, rules.HRA_NON_METRO_RATE)
+    rent_excess = np.maximum(c["rentPaid"] - basic_da * rules.HRA_RENT_EXCESS_RATE, 0.0)
+
+    c["old_hra_exemption"] = np.minimum(np.minimum(c["hra"], basic_da * hra_rate), rent_excess)
+    c["old_standard_deduction"] = np.minimum(c["gross_salary"], rules.STANDARD_DEDUCTION_OLD)
+    c["old_80c"] = np.minimum(
+        c["ppf"] + c["elss"] + c["nsc"] + c["epf"] + c["homeLoanPrinciple80C"], rules.LIMIT_80C)
+    c["old_80ccd_1b"] = np.minimum(c["nps"], rules.LIMIT_80CCD_1B)
+    c["old_80d"] = np.minimum(c["medicalPremiums"], np.where(senior, rules.LIMIT_80D_SENIOR, rules.LIMIT_80D))
+    c["old_80e"] = c["educationLoanInterest"]
+    c["old_80tta"] = np.minimum(c["savingsAccountInterest"], np.where(senior, rules.LIMIT_80TTB, rules.LIMIT_80TTA))
+
+    c["old_total_deductions"] = (
+        c["old_hra_exemption"] + c["old_standard_deduction"] + c["old_80c"] + c["old_80ccd_1b"]
+        + c["old_80d"] + c["old_80e"] + c["old_80tta"]
+    )
+
+
+def new_deductions_stage(c):
+    c["new_standard_deduction"] = np.minimum(c["gross_salary"], rules.STANDARD_DEDUCTION_NEW)
+    c["new_total_deductions"] = c["new_standard_deduction"]
+
+
+def house_property_stage(c):
+    # Self-occupied interest (24b) only exists in the old regime, where the
+    # loss set off against other heads is capped; the new regime allows none.
+    c["old_24b"] = np.minimum(c["homeLoanInterest24B"], rules.LIMIT_24B_SELF_OCCUPIED)
+    c["old_house_property"] = np.maximum(c["let_out_income"] - c["old_24b"], -rules.LIMIT_HP_LOSS_SETOFF)
+    c["new_house_property"] = np.maximum(c["let_out_income"], 0.0)
+
+
+def taxable_income_stage(c):
+    """Split total income into slab-rate income and gains taxed at special rates."""
+    slab_heads = c["gross_salary"] + c["other_income"] + c["business_income"] + c["stcgOther"]
+    for regime in ("old", "new"):
+        normal = slab_heads + c[f"{regime}_house_property"] - c[f"{regime}_total_deductions"]
+        c[f"{regime}_normal_income"] = np.maximum(normal, 0.0)
+        c[f"{regime}_taxable_income"] = c[f"{regime}_normal_income"] + c["special_rate_gains"]
+
+
+def slab_stage(c):
+    c["age_band"] = (c["age"] >= rules.SENIOR_AGE).astype(np.intp) + (c["age"] >= rules.SUPER_SENIOR_AGE)
+    c["old_tax_on_income"] = slab_tax_banded(c["old_normal_income"], c["age_band"], _OLD_SLABS)
+    c["new_tax_on_income"] = slab_tax(c["new_normal_income"], _NEW_SLABS)
+
+
+SPECIAL_RATE_FIELDS = ["stcg111A", "ltcg112A", "ltcgOther"]
+
+
+def special_rate_tax(normal_income, exemption, stcg_111a, ltcg_112a, ltcg_112):
+    """(total, 112A part) of tax on gains under 111A, 112A and 112.
+
+    Basic exemption left unused by slab-rate income is set off against these
+    gains, highest rate first.
+    """
+    unused = np.maximum(exemption - normal_income, 0.0)
+    taxes = []
+    for amount, rate in (
+        (stcg_111a, rules.STCG_111A_RATE),
+        (np.maximum(ltcg_112a - rules.LTCG_112A_EXEMPTION, 0.0), rules.LTCG_112A_RATE),
+        (ltcg_112, rules.LTCG_112_RATE),
+    ):
+        used = np.minimum(amount, unused)
+        unused = unused - used
+        taxes.append((amount - used) * rate)
+    return sum(taxes), taxes[1]
+
+
+def capital_gains_stage(c):
+    exemption = {"old": _OLD_EXEMPTION[c["age_band"]], "new": _NEW_EXEMPTION}
+    gains = [c[name] for name in SPECIAL_RATE_FIELDS]
+    for regime in ("old", "new"):
+        c[f"{regime}_special_rate_tax"], c[f"{regime}_ltcg_112a_tax"] = special_rate_tax(
+            c[f"{regime}_normal_income"], exemption[regime], *gains)
+
+
+def rebate_stage(c):
+    # 87A never covers tax on 112A gains; in the new regime it covers slab-rate tax only.
+    old_income = c["old_taxable_income"]
+    old_rebatable = c["old_tax_on_income"] + c["old_special_rate_tax"] - c["old_ltcg_112a_tax"]
+    c["old_rebate_87a"] = np.where(
+        old_income <= rules.REBATE_OLD_INCOME_LIMIT, np.minimum(old_rebatable, rules.REBATE_OLD_MAX), 0.0)
+    c["old_marginal_relief"] = np.zeros_like(old_rebatable)
+
+    new_income, new_tax = c["new_taxable_income"], c["new_tax_on_income"]
+    within_limit = new_income <= rules.REBATE_NEW_INCOME_LIMIT
+    c["new_rebate_87a"] = np.where(within_limit, np.minimum(new_tax, rules.REBATE_NEW_MAX), 0.0)
+    # Just above the limit, tax may not exceed the income above the limit.
+    c["new_marginal_relief"] = np.where(
+        within_limit, 0.0, np.maximum(new_tax - (new_income - rules.REBATE_NEW_INCOME_LIMIT), 0.0))
+
+    for regime in ("old", "new"):
+        c[f"{regime}_tax_after_rebate"] = (
+            c[f"{regime}_tax_on_income"] + c[f"{regime}_special_rate_tax"]
+            - c[f"{regime}_rebate_87a"] - c[f"{regime}_marginal_relief"])
+
+
+def _surcharge(tax, special_tax, rate):
+    """Surcharge at `rate`, capped for the part of tax on special-rate gains."""
+    return (tax - special_tax) * rate + special_tax * np.minimum(rate, rules.SURCHARGE_MAX_SPECIAL)
+
+
+def surcharge_stage(c):
+    """Surcharge by total income, with marginal relief above each threshold.
+
+    Relief keeps tax plus surcharge from exceeding the tax and surcharge at the
+    threshold by more than the income above it. Income at the threshold is
+    found by taking the excess out of slab-rate income first, then out of
+    special-rate gains.
+    """
+    for regime in ("old", "new"):
+        income, tax = c[f"{regime}_taxable_income"], c[f"{regime}_tax_after_rebate"]
+        special = c[f"{regime}_special_rate_tax"]
+        rates = _SURCHARGE_RATE[regime]
+        band = np.maximum(np.searchsorted(_SURCHARGE_LOWER, income, side="left") - 1, 0)
+        surcharge = _surcharge(tax, special, rates[band])
+
+        relief = np.zeros_like(tax)
+        above = np.flatnonzero(band > 0)
+        if above.size:
+            b = band[above]
+            excess = income[above] - _SURCHARGE_LOWER[b]
+            normal = c[f"{regime}_normal_income"][above]
+            cut = np.minimum(excess, normal)
+            normal, left = normal - cut, excess - cut
+            gains = []
+            for name in SPECIAL_RATE_FIELDS:
+                cut = np.minimum(c[name][above], left)
+                gains.append(c[name][above] - cut)
+                left = left - cut
+            if regime == "old":
+                age_band = c["age_band"][above]
+                slab_at_threshold = slab_tax_banded(normal, age_band, _OLD_SLABS)
+                special_at_threshold, _ = special_rate_tax(normal, _OLD_EXEMPTION[age_band], *gains)
+            else:
+                slab_at_threshold = slab_tax(normal, _NEW_SLABS)
+                special_at_threshold, _ = special_rate_tax(normal, _NEW_EXEMPTION, *gains)
+            tax_at_threshold = slab_at_threshold + special_at_threshold
+            limit = tax_at_threshold + _surcharge(tax_at_threshold, special_at_threshold, rates[b - 1]) + excess
+            relief[above] = np.clip(tax[above] + surcharge[above] - limit, 0.0, surcharge[above])
+
+        c[f"{regime}_surcharge"] = surcharge
+        c[f"{regime}_surcharge_relief"] = relief
+
+
+def cess_stage(c):
+    for regime in ("old", "new"):
+        tax = c[f"{regime}_tax_after_rebate"] + c[f"{regime}_surcharge"] - c[f"{regime}_surcharge_relief"]
+        c[f"{regime}_cess"] = tax * rules.CESS_RATE
+        c[f"{regime}_total_tax"] = tax + c[f"{regime}_cess"]
+
+
+def summary_stage(c):
+    # Ties go to the new regime, which is the default.
+    c["recommended_new"] = c["new_total_tax"] <= c["old_total_tax"]
+    c["savings"] = np.abs(c["old_total_tax"] - c["new_total_tax"])
+
+
+STAGES = [
+    income_stage,
+    old_deductions_stage,
+    new_deductions_stage,
+    house_property_stage,
+    taxable_income_stage,
+    slab_stage,
+    capital_gains_stage,
+    rebate_stage,
+    surcharge_stage,
+    cess_stage,
+    summary_stage,
+]
+
+
+def compute_columns(columns):
+    """Run every stage over input columns; returns the dict with all outputs added."""
+    c = dict(columns)
+    for stage in STAGES:
+        stage(c)
+    return c
+
+
+# ---------------------------------- Output ----------------------------------
+
+OLD_DEDUCTION_ITEMS = {
+    "standard_deduction": "old_standard_deduction",
+    "hra_exemption": "old_hra_exemption",
+    "section_80c": "old_80c",
+    "section_80ccd_1b": "old_80ccd_1b",
+    "section_80d": "old_80d",
+    "section_80e": "old_80e",
+    "section_80tta": "old_80tta",
+}
+INCOME_HEAD_ITEMS = {
+    "salary": "gross_salary",
+    "house_property": "let_out_income",
+    "business": "business_income",
+    "capital_gains": "capital_gains",
+    "other_sources": "other_income",
+}
+REGIME_ITEMS = [
+    "house_property", "total_deductions", "normal_income", "taxable_income",
+    "tax_on_income", "special_rate_tax", "rebate_87a", "marginal_relief", "tax_after_rebate",
+    "surcharge", "surcharge_relief", "cess", "total_tax",
+]
+ROW_FIELDS = [
+    "gross_salary", "gross_total_income",
+    "old_taxable_income", "old_total_tax", "new_taxable_income", "new_total_tax",
+    "recommended_regime", "savings",
+]
+
+
+def _amount(value):
+    return round(float(value), 2)
+
+
+def breakdown(result, i=0):
+    """Nested breakdown for row i of compute_columns() output."""
+    regimes = {}
+    for regime in ("old", "new"):
+        regimes[f"{regime}_regime"] = {item: _amount(result[f"{regime}_{item}"][i]) for item in REGIME_ITEMS}
+    regimes["old_regime"]["deductions"] = {
+        name: _amount(result[column][i]) for name, column in OLD_DEDUCTION_ITEMS.items()
+    }
+    regimes["new_regime"]["deductions"] = {"standard_deduction": _amount(result["new_standard_deduction"][i])}
+    return {
+        "assessment_year": rules.ASSESSMENT_YEAR,
+        "gross_salary": _amount(result["gross_salary"][i]),
+        "other_income": _amount(result["other_income"][i]),
+        "gross_total_income": _amount(result["gross_total_income"][i]),
+        "income_heads": {name: _amount(result[column][i]) for name, column in INCOME_HEAD_ITEMS.items()},
+        **regimes,
+        "recommended_regime": "new" if result["recommended_new"][i] else "old",
+        "savings": _amount(result["savings"][i]),
+    }
+
+
+def result_rows(result):
+    """Flat rows (dicts) for every profile in a compute_columns() output."""
+    recommended = np.where(result["recommended_new"], "new", "old")
+    columns = [
+        recommended if name == "recommended_regime" else np.round(result[name], 2)
+        for name in ROW_FIELDS
+    ]
+    return [
+        {name: (str(value) if name == "recommended_regime" else float(value)) for name, value in zip(ROW_FIELDS, values)}
+        for values in zip(*columns)
+    ]
+
+
+def regime_tax(taxable_income, age=DEFAULT_AGE):
+    """(old, new) regime tax after rebate and before cess for an already-taxable slab-rate income."""
+    income = np.array([taxable_income], dtype=np.float64)
+    c = {"age": np.array([age], dtype=np.float64)}
+    for regime in ("old", "new"):
+        c[f"{regime}_normal_income"] = c[f"{regime}_taxable_income"] = income
+        c[f"{regime}_special_rate_tax"] = c[f"{regime}_ltcg_112a_tax"] = np.zeros(1)
+    slab_stage(c)
+    rebate_stage(c)
+    return float(c["old_tax_after_rebate"][0]), float(c["new_tax_after_rebate"][0])
+
+
+def compute(profile):
+    """Full old-vs-new regime breakdown for one profile."""
+    result = compute_columns(columns_from_profiles([normalize_profile(profile)]))
+    return breakdown(result)
+
+
+def compute_batch(profiles):
+    """Flat result rows for many profiles, computed in one vectorized pass."""
+    normalized = [normalize_profile(p) for p in profiles]
+    return result_rows(compute_columns(columns_from_profiles(normalized)))
+
+
+if __name__ == "__main__":
+    import json
+
+    salary_inputs = {"basic": 500000, "hra": 200000, "lta": 50000, "da": 100000, "bonus": 150000, "otherAllowances": 50000}
+    deduction_inputs = {
+        "ppf": 50000, "elss": 25000, "nsc": 10000, "epf": 30000, "homeLoanPrinciple80C": 40000,
+        "medicalPremiums": 20000, "educationLoanInterest": 15000, "nps": 50000,
+        "savingsAccountInterest": 10000, "homeLoanInterest24B": 200000,
+        "metroPolitanCity": True, "rentPaid": 150000,
+    }
+    print(json.dumps(compute({"salary_inputs": salary_inputs, "deduction_inputs": deduction_inputs, "age": 25}), indent=2))
@@ -0,0 +1,127 @@
+"""
+Pull tax profile fields out of free-form chat or call text.
+
+"my basic is 50k per month, hra 20,000 and I put 1.5 lakh in ppf, I live in
+Pune" -> {"basic": 600000, "hra": 240000, "ppf": 150000, "metroPolitanCity": False}
+
+Only confident matches are returned: a keyword with an amount right next to
+it. The result is meant to be merged into the stored profile, so
+anything not mentioned keeps its earlier value.
+"""
+import re
+
+# keyword pattern -> engine field. Alternatives are tried in this order at each
+# position, so the more specific phrase comes first ("rental income" before "rent").
+KEYWORDS = [
+    (r"basic(?:\s+salary|\s+pay)?", "basic"),
+    # A single salary figure is taxed as if it were all basic pay.
+    (r"(?:gross\s+|annual\s+)?salary|\bctc\b|\bpackage\b", "basic"),
+    (r"dearness\s+allowance|\bda\b", "da"),
+    (r"house\s+rent\s+allowance|\bhra\b", "hra"),
+    (r"leave\s+travel\s+allowance|\blta\b", "lta"),
+    (r"bonus|variable\s+pay", "bonus"),
+    (r"other\s+allowances?|special\s+allowance", "otherAllowances"),
+    (r"rent(?:al)?\s+income|rent\s+received", "rentalIncome"),
+    (r"\brent\b", "rentPaid"),
+    (r"\bppf\b", "ppf"),
+    (r"\belss\b|mutual\s+funds?\s+tax\s+saver", "elss"),
+    (r"\bnsc\b", "nsc"),
+    (r"\bepf\b|provident\s+fund|\bpf\b", "epf"),
+    (r"home\s+loan\s+interest|housing\s+loan\s+interest", "homeLoanInterest24B"),
+    (r"home\s+loan\s+princip(?:al|le)", "homeLoanPrinciple80C"),
+    (r"health\s+insurance|medical\s+(?:insurance|premiums?)|mediclaim|\b80d\b", "medicalPremiums"),
+    (r"education\s+loan(?:\s+interest)?|\b80e\b", "educationLoanInterest"),
+    (r"\bnps\b", "nps"),
+    (r"savings?\s+(?:account\s+)?interest", "savingsAccountInterest"),
+    (r"business\s+(?:income|profit)", "businessIncome"),
+    (r"short[\s-]+term\s+(?:capital\s+)?gains?|\bstcg\b", "stcg111A"),
+    (r"long[\s-]+term\s+(?:capital\s+)?gains?|\bltcg\b", "ltcg112A"),
+]
+_KEYWORD_RE = re.compile("|".join(f"(?P<f{i}>{pattern})" for i, (pattern, _) in enumerate(KEYWORDS)), re.I)
+
+UNITS = {
+    "k": 1e3, "thousand": 1e3,
+    "l": 1e5, "lac": 1e5, "lacs": 1e5, "lakh": 1e5, "lakhs": 1e5,
+    "cr": 1e7, "crore": 1e7, "crores": 1e7,
+}
+PERIOD = r"\s*(?:per|a|/|every|each)\s*(?:month|mo|pm)\b|\s*(?:monthly|pm)\b"
+AMOUNT_RE = re.compile(
+    r"(?:rs\.?|inr|₹)?\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>k|thousand|lacs?|lakhs?|l|cr|crores?)?\b"
+    rf"(?P<period>{PERIOD})?",
+    re.I,
+)
+GAP_WORDS = 6  # max words between a keyword and its amount
+# "1.5 lakh in ppf": an amount just before the keyword.
+LEADING_AMOUNT_RE = re.compile(AMOUNT_RE.pattern + r"\s+(?:in|into|towards|on|as)\s+(?:my\s+|the\s+)?$", re.I)
+# "I paid 20000 rent": no connector, so only after a verb of paying (otherwise
+# "basic 50k hra 20k" would give hra 50k).
+PAID_AMOUNT_RE = re.compile(
+    r"\b(?:pa(?:y|ys|id|ying)|spen[dt]|spending|invest(?:ed)?|put)\s+" + AMOUNT_RE.pattern + r"\s+(?:my\s+|the\s+)?$",
+    re.I,
+)
+# "... rent per month": the period after the keyword of a leading amount.
+TRAILING_PERIOD_RE = re.compile(PERIOD, re.I)
+
+AGE_RE = re.compile(r"\b(?:i\s*(?:am|'m)\s*|age\s*(?:is\s*)?)(?P<age>\d{2})\b(?:\s*(?:years?|yrs?))?", re.I)
+METRO_CITIES = ("mumbai", "bombay", "delhi", "kolkata", "calcutta", "chennai", "madras")
+CITY_RE = re.compile(r"\b(?:live|living|stay|staying|based|located|reside)\s+(?:in|at)\s+(?P<city>[a-z]+)", re.I)
+
+
+def parse_amount(match, monthly=False):
+    """Rupee value of an AMOUNT_RE match, annualised if it (or `monthly`) says per month."""
+    value = float(match.group("number").replace(",", ""))
+    unit = (match.group("unit") or "").lower()
+    value *= UNITS.get(unit, 1)
+    if match.group("period") or monthly:
+        value *= 12
+    return round(value, 2)
+
+
+def extract_facts(text):
+    """Engine profile fields mentioned in `text`, as {field: value}."""
+    facts = {}
+    for keyword in _KEYWORD_RE.finditer(text):
+        field = KEYWORDS[int(keyword.lastgroup[1:])][1]
+        head = text[:keyword.start()]
+        leading = LEADING_AMOUNT_RE.search(head) or PAID_AMOUNT_RE.search(head)
+        if leading is not None:
+            monthly = TRAILING_PERIOD_RE.match(text, keyword.end()) is not None
+            facts[field] = parse_amount(leading, monthly)
+            continue
+        tail = text[keyword.end():]
+        amount = AMOUNT_RE.search(tail)
+        if amount is None or len(tail[:amount.start()].split()) > GAP_WORDS:
+            continue
+        # An amount that belongs to a nearer keyword is not this one's.
+        if _KEYWORD_RE.search(tail[:amount.start()]) is not None:
+            continue
+        facts[field] = parse_amount(amount)
+
+    age = AGE_RE.search(text)
+    if age and 18 <= int(age.group("age")) <= 110:
+        facts["age"] = int(age.group("age"))
+
+    city = CITY_RE.search(text)
+    if city:
+        facts["metroPolitanCity"] = city.group("city").lower() in METRO_CITIES
+    elif re.search(r"\bnon[\s-]?metro\b", text, re.I):
+        facts["metroPolitanCity"] = False
+    elif re.search(r"\bmetro\b", text, re.I) or any(re.search(rf"\b{c}\b", text, re.I) for c in METRO_CITIES):
+        facts["metroPolitanCity"] = True
+    return facts
+
+
+def has_salary(profile):
+    """Whether a stored profile has enough salary detail to compute tax."""
+    return profile.get("basic", 0) > 0
+
+
+if __name__ == "__main__":
+    for text in [
+        "my basic is 50k per month, hra 20,000 monthly and I put 1.5 lakh in ppf, I live in Pune",
+        "Basic salary Rs 12,00,000, bonus 2L, rent 25000 pm, health insurance 25k. I am 45, staying in Mumbai",
+        "home loan interest of 2 lakh and home loan principal 1.2 lakh",
+        "I paid 20000 rent per month",
+        "I am 2500 short on my 80C",
+    ]:
+        print(extract_facts(text))
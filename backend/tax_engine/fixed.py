@@ -0,0 +1,411 @@
+"""
+Exact fixed-point tax engine: every amount is an int64 count of paise.
+
+The float engine (engine.py) is fast but carries binary rounding noise; the
+fixed-point engine gives the same results exactly, without Decimal and
+without touching the global decimal context. Rates are integer basis points
+(1% == 100 bp), so every product is an integer and every division is an
+explicit, named rounding step:
+
+    slab tax      sum(amount * rate_bp), rounded half-up to the paisa
+    rebate 87A    min(tax, limit); marginal relief is exact subtraction
+    surcharge     tax * rate_bp, rounded half-up to the paisa
+    cess          tax * 400 bp, rounded half-up to the paisa
+
+With `statutory_rounding=True` the engine also applies section 288A (total
+income rounded to the nearest Rs 10) and 288B (tax payable rounded to the
+nearest Rs 10), as the return forms do.
+
+The primitives work on Python ints and on NumPy int64 arrays alike.
+"""
+import math
+
+import numpy as np
+
+from tax_engine import rules
+from tax_engine.engine import (
+    AGE_BANDS, INPUT_FIELDS, SALARY_FIELDS, SPECIAL_RATE_FIELDS, columns_from_profiles, normalize_profile,
+)
+
+PAISE = 100
+BP = 10000  # basis points in 1.0
+ROUND_TO_TEN_RUPEES = 10 * PAISE
+OPEN_END = 10 ** 15  # paise; bounds amounts and their row totals so total * rate_bp stays inside int64
+
+
+# -------------------------------- Primitives --------------------------------
+
+def to_paise(amount):
+    """Rupees (int, float or numeric string) -> int paise, rounded half-up."""
+    if isinstance(amount, str):
+        amount = float(amount.replace(",", "") or 0)
+    return int(math.floor(amount * PAISE + 0.5))
+
+
+def to_paise_array(amounts):
+    """Rupee array -> int64 paise array, rounded half-up; ValueError for inf/NaN or out-of-range amounts."""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if not np.isfinite(amounts).all() or (np.abs(amounts) * PAISE > OPEN_END).any():
+        raise ValueError("amounts must be finite and at most Rs 10 lakh crore")
+    return np.floor(amounts * PAISE + 0.5).astype(np.int64)
+
+
+def from_paise(paise):
+    """Paise -> rupees as float (or float array)."""
+    return paise / PAISE
+
+
+def format_rupees(paise):
+    """Exact decimal string for an amount in paise, e.g. 12345 -> '123.45'."""
+    paise = int(paise)
+    sign = "-" if paise < 0 else ""
+    rupees, rest = divmod(abs(paise), PAISE)
+    return f"{sign}{rupees}.{rest:02d}"
+
+
+def basis_points(rate):
+    """Fractional rate from rules.py -> integer basis points."""
+    return int(round(rate * BP))
+
+
+def from_basis_points(amount_bp):
+    """Paise x basis points -> paise, rounded half-up (amounts are non-negative)."""
+    return (amount_bp + BP // 2) // BP
+
+
+def apply_rate(amount, rate_bp):
+    """amount * rate, rounded half-up to the paisa."""
+    return from_basis_points(amount * rate_bp)
+
+
+def round_half_up(amount, unit):
+    """Round a non-negative paise amount to the nearest multiple of `unit` paise."""
+    return (amount + unit // 2) // unit * unit
+
+
+def rebate(tax, income, income_limit, max_rebate):
+    """Section 87A rebate: up to `max_rebate` of tax when income is within the limit."""
+    return np.where(income <= income_limit, np.minimum(tax, max_rebate), 0)
+
+
+def cess(tax):
+    return apply_rate(tax, basis_points(rules.CESS_RATE))
+
+
+def surcharge(tax, special_tax, rate_bp):
+    """Surcharge at `rate_bp`, capped for the part of tax on special-rate gains."""
+    special_bp = np.minimum(rate_bp, basis_points(rules.SURCHARGE_MAX_SPECIAL))
+    return apply_rate(tax - special_tax, rate_bp) + apply_rate(special_tax, special_bp)
+
+
+# ---------------------------------- Slabs ----------------------------------
+
+def compile_slabs(slabs, length=None):
+    """Compile [(lower, rate), ...] into (lower, width, rate_bp) int64 arrays in paise."""
+    lowers = [int(lower) * PAISE for lower, _ in slabs]
+    rates = [basis_points(rate) for _, rate in slabs]
+    uppers = lowers[1:] + [OPEN_END]
+    widths = [upper - lower for lower, upper in zip(lowers, uppers)]
+    while length is not None and len(lowers) < length:
+        lowers.append(OPEN_END)
+        widths.append(0)
+        rates.append(0)
+    return np.array(lowers, dtype=np.int64), np.array(widths, dtype=np.int64), np.array(rates, dtype=np.int64)
+
+
+def compile_slab_bands(tables):
+    length = max(len(slabs) for slabs in tables)
+    compiled = [compile_slabs(slabs, length) for slabs in tables]
+    return tuple(np.stack(parts) for parts in zip(*compiled))
+
+
+def slab_tax(income, compiled):
+    """Exact tax in paise on `income` (int64 paise array) under one compiled table."""
+    lower, width, rate = compiled
+    amounts = np.clip(income[:, None] - lower, 0, width)
+    return from_basis_points((amounts * rate).sum(axis=1))
+
+
+def slab_tax_banded(income, band, compiled_bands):
+    lower, width, rate = compiled_bands
+    amounts = np.clip(income[:, None] - lower[band], 0, width[band])
+    return from_basis_points((amounts * rate[band]).sum(axis=1))
+
+
+_OLD_SLABS = compile_slab_bands([rules.OLD_REGIME_SLABS[band] for band in AGE_BANDS])
+_NEW_SLABS = compile_slabs(rules.NEW_REGIME_SLABS)
+_OLD_EXEMPTION = np.array([rules.OLD_REGIME_SLABS[band][1][0] * PAISE for band in AGE_BANDS], dtype=np.int64)
+_NEW_EXEMPTION = rules.NEW_REGIME_SLABS[1][0] * PAISE
+_SURCHARGE_LOWER = np.array([lower * PAISE for lower, _ in rules.SURCHARGE_SLABS], dtype=np.int64)
+_SURCHARGE_BP = {
+    "old": np.array([basis_points(rate) for _, rate in rules.SURCHARGE_SLABS], dtype=np.int64),
+    "new": np.array([basis_points(min(rate, rules.SURCHARGE_MAX_NEW)) for _, rate in rules.SURCHARGE_SLABS],
+                    dtype=np.int64),
+}
+
+
+# ---------------------------------- Stages ----------------------------------
+# Same stages and output names as engine.py, in paise.
+
+def _p(rupees):
+    return int(rupees) * PAISE
+
+
+def income_stage(c):
+    c["gross_salary"] = sum(c[name] for name in SALARY_FIELDS)
+    c["other_income"] = c["savingsAccountInterest"] + c["otherSourcesIncome"]
+    c["business_income"] = (
+        c["businessIncome"]
+        + apply_rate(c["turnover44AD"], basis_points(rules.PRESUMPTIVE_44AD_RATE))
+        + apply_rate(c["receipts44ADA"], basis_points(rules.PRESUMPTIVE_44ADA_RATE))
+    )
+    annual_value = np.maximum(c["rentalIncome"] - c["municipalTaxes"], 0)
+    c["let_out_income"] = (
+        annual_value - apply_rate(annual_value, basis_points(rules.HP_STANDARD_DEDUCTION_RATE))
+        - c["letOutLoanInterest"])
+    c["capital_gains"] = c["stcgOther"] + c["stcg111A"] + c["ltcg112A"] + c["ltcgOther"]
+    c["special_rate_gains"] = c["stcg111A"] + c["ltcg112A"] + c["ltcgOther"]
+    c["gross_total_income"] = (
+        c["gross_salary"] + c["other_income"] + c["business_income"] + c["let_out_income"] + c["capital_gains"])
+
+
+def old_deductions_stage(c):
+    senior = c["age"] >= rules.SENIOR_AGE
+    basic_da = c["basic"] + c["da"]
+    hra_rate = np.where(c["metroPolitanCity"] > 0, basis_points(rules.HRA_METRO_RATE), basis_points(rules.HRA_NON_METRO_RATE))
+    rent_excess = np.maximum(c["rentPaid"] - apply_rate(basic_da, basis_points(rules.HRA_RENT_EXCESS_RATE)), 0)
+
+    c["old_hra_exemption"] = np.minimum(np.minimum(c["hra"], apply_rate(basic_da, hra_rate)), rent_excess)
+    c["old_standard_deduction"] = np.minimum(c["gross_salary"], _p(rules.STANDARD_DEDUCTION_OLD))
+    c["old_80c"] = np.minimum(
+        c["ppf"] + c["elss"] + c["nsc"] + c["epf"] + c["homeLoanPrinciple80C"], _p(rules.LIMIT_80C))
+    c["old_80ccd_1b"] = np.minimum(c["nps"], _p(rules.LIMIT_80CCD_1B))
+    c["old_80d"] = np.minimum(c["medicalPremiums"], np.where(senior, _p(rules.LIMIT_80D_SENIOR), _p(rules.LIMIT_80D)))
+    c["old_80e"] = c["educationLoanInterest"]
+    c["old_80tta"] = np.minimum(
+        c["savingsAccountInterest"], np.where(senior, _p(rules.LIMIT_80TTB), _p(rules.LIMIT_80TTA)))
+
+    c["old_total_deductions"] = (
+        c["old_hra_exemption"] + c["old_standard_deduction"] + c["old_80c"] + c["old_80ccd_1b"]
+        + c["old_80d"] + c["old_80e"] + c["old_80tta"]
+    )
+
+
+def new_deductions_stage(c):
+    c["new_standard_deduction"] = np.minimum(c["gross_salary"], _p(rules.STANDARD_DEDUCTION_NEW))
+    c["new_total_deductions"] = c["new_standard_deduction"]
+
+
+def house_property_stage(c):
+    c["old_24b"] = np.minimum(c["homeLoanInterest24B"], _p(rules.LIMIT_24B_SELF_OCCUPIED))
+    c["old_house_property"] = np.maximum(c["let_out_income"] - c["old_24b"], -_p(rules.LIMIT_HP_LOSS_SETOFF))
+    c["new_house_property"] = np.maximum(c["let_out_income"], 0)
+
+
+def taxable_income_stage(c):
+    slab_heads = c["gross_salary"] + c["other_income"] + c["business_income"] + c["stcgOther"]
+    for regime in ("old", "new"):
+        normal = slab_heads + c[f"{regime}_house_property"] - c[f"{regime}_total_deductions"]
+        c[f"{regime}_normal_income"] = np.maximum(normal, 0)
+        c[f"{regime}_taxable_income"] = c[f"{regime}_normal_income"] + c["special_rate_gains"]
+
+
+def income_rounding_stage(c):
+    """Section 288A: total income rounded to the nearest Rs 10 (applied to slab-rate income)."""
+    for regime in ("old", "new"):
+        c[f"{regime}_normal_income"] = round_half_up(c[f"{regime}_normal_income"], ROUND_TO_TEN_RUPEES)
+        c[f"{regime}_taxable_income"] = c[f"{regime}_normal_income"] + c["special_rate_gains"]
+
+
+def slab_stage(c):
+    c["age_band"] = (c["age"] >= rules.SENIOR_AGE).astype(np.intp) + (c["age"] >= rules.SUPER_SENIOR_AGE)
+    c["old_tax_on_income"] = slab_tax_banded(c["old_normal_income"], c["age_band"], _OLD_SLABS)
+    c["new_tax_on_income"] = slab_tax(c["new_normal_income"], _NEW_SLABS)
+
+
+def special_rate_tax(normal_income, exemption, stcg_111a, ltcg_112a, ltcg_112):
+    """(total, 112A part) of tax on special-rate gains, as in engine.special_rate_tax()."""
+    unused = np.maximum(exemption - normal_income, 0)
+    taxes = []
+    for amount, rate_bp in (
+        (stcg_111a, basis_points(rules.STCG_111A_RATE)),
+        (np.maximum(ltcg_112a - _p(rules.LTCG_112A_EXEMPTION), 0), basis_points(rules.LTCG_112A_RATE)),
+        (ltcg_112, basis_points(rules.LTCG_112_RATE)),
+    ):
+        used = np.minimum(amount, unused)
+        unused = unused - used
+        taxes.append(apply_rate(amount - used, rate_bp))
+    return sum(taxes), taxes[1]
+
+
+def capital_gains_stage(c):
+    exemption = {"old": _OLD_EXEMPTION[c["age_band"]], "new": _NEW_EXEMPTION}
+    gains = [c[name] for name in SPECIAL_RATE_FIELDS]
+    for regime in ("old", "new"):
+        c[f"{regime}_special_rate_tax"], c[f"{regime}_ltcg_112a_tax"] = special_rate_tax(
+            c[f"{regime}_normal_income"], exemption[regime], *gains)
+
+
+def rebate_stage(c):
+    old_rebatable = c["old_tax_on_income"] + c["old_special_rate_tax"] - c["old_ltcg_112a_tax"]
+    c["old_rebate_87a"] = rebate(
+        old_rebatable, c["old_taxable_income"], _p(rules.REBATE_OLD_INCOME_LIMIT), _p(rules.REBATE_OLD_MAX))
+    c["old_marginal_relief"] = np.zeros_like(old_rebatable)
+
+    new_income, new_tax = c["new_taxable_income"], c["new_tax_on_income"]
+    limit = _p(rules.REBATE_NEW_INCOME_LIMIT)
+    c["new_rebate_87a"] = rebate(new_tax, new_income, limit, _p(rules.REBATE_NEW_MAX))
+    c["new_marginal_relief"] = np.where(new_income <= limit, 0, np.maximum(new_tax - (new_income - limit), 0))
+
+    for regime in ("old", "new"):
+        c[f"{regime}_tax_after_rebate"] = (
+            c[f"{regime}_tax_on_income"] + c[f"{regime}_special_rate_tax"]
+            - c[f"{regime}_rebate_87a"] - c[f"{regime}_marginal_relief"])
+
+
+def surcharge_stage(c):
+    for regime in ("old", "new"):
+        income, tax = c[f"{regime}_taxable_income"], c[f"{regime}_tax_after_rebate"]
+        special = c[f"{regime}_special_rate_tax"]
+        rates = _SURCHARGE_BP[regime]
+        band = np.maximum(np.searchsorted(_SURCHARGE_LOWER, income, side="left") - 1, 0)
+        amount = surcharge(tax, special, rates[band])
+
+        relief = np.zeros_like(tax)
+        above = np.flatnonzero(band > 0)
+        if above.size:
+            b = band[above]
+            excess = income[above] - _SURCHARGE_LOWER[b]
+            normal = c[f"{regime}_normal_income"][above]
+            cut = np.minimum(excess, normal)
+            normal, left = normal - cut, excess - cut
+            gains = []
+            for name in SPECIAL_RATE_FIELDS:
+                cut = np.minimum(c[name][above], left)
+                gains.append(c[name][above] - cut)
+                left = left - cut
+            if regime == "old":
+                age_band = c["age_band"][above]
+                slab_at_threshold = slab_tax_banded(normal, age_band, _OLD_SLABS)
+                special_at_threshold, _ = special_rate_tax(normal, _OLD_EXEMPTION[age_band], *gains)
+            else:
+                slab_at_threshold = slab_tax(normal, _NEW_SLABS)
+                special_at_threshold, _ = special_rate_tax(normal, _NEW_EXEMPTION, *gains)
+            tax_at_threshold = slab_at_threshold + special_at_threshold
+            limit = tax_at_threshold + surcharge(tax_at_threshold, special_at_threshold, rates[b - 1]) + excess
+            relief[above] = np.clip(tax[above] + amount[above] - limit, 0, amount[above])
+
+        c[f"{regime}_surcharge"] = amount
+        c[f"{regime}_surcharge_relief"] = relief
+
+
+def cess_stage(c):
+    for regime in ("old", "new"):
+        tax = c[f"{regime}_tax_after_rebate"] + c[f"{regime}_surcharge"] - c[f"{regime}_surcharge_relief"]
+        c[f"{regime}_cess"] = cess(tax)
+        c[f"{regime}_total_tax"] = tax + c[f"{regime}_cess"]
+
+
+def tax_rounding_stage(c):
+    """Section 288B: tax payable rounded to the nearest Rs 10."""
+    for regime in ("old", "new"):
+        c[f"{regime}_total_tax"] = round_half_up(c[f"{regime}_total_tax"], ROUND_TO_TEN_RUPEES)
+
+
+def summary_stage(c):
+    c["recommended_new"] = c["new_total_tax"] <= c["old_total_tax"]
+    c["savings"] = np.abs(c["old_total_tax"] - c["new_total_tax"])
+
+
+STAGES = [
+    income_stage,
+    old_deductions_stage,
+    new_deductions_stage,
+    house_property_stage,
+    taxable_income_stage,
+    slab_stage,
+    capital_gains_stage,
+    rebate_stage,
+    surcharge_stage,
+    cess_stage,
+    summary_stage,
+]
+STATUTORY_STAGES = [
+    income_stage,
+    old_deductions_stage,
+    new_deductions_stage,
+    house_property_stage,
+    taxable_income_stage,
+    income_rounding_stage,
+    slab_stage,
+    capital_gains_stage,
+    rebate_stage,
+    surcharge_stage,
+    cess_stage,
+    tax_rounding_stage,
+    summary_stage,
+]
+
+
+def columns_to_paise(columns):
+    """Rupee input columns (engine.columns_from_profiles) -> int64 paise columns.
+
+    Raises ValueError when a row's amounts add up to more than OPEN_END paise:
+    the stages multiply such totals by rates in basis points.
+    """
+    out = {name: to_paise_array(columns[name]) for name in INPUT_FIELDS if name not in ("age", "metroPolitanCity")}
+    if (sum(np.abs(column) for column in out.values()) > OPEN_END).any():
+        raise ValueError("amounts must add up to at most Rs 10 lakh crore")
+    out["age"] = np.asarray(columns["age"]).astype(np.int64)
+    out["metroPolitanCity"] = np.asarray(columns["metroPolitanCity"]).astype(np.int64)
+    return out
+
+
+def compute_columns(columns, statutory_rounding=False):
+    """Run every stage over rupee input columns; amounts in the result are int64 paise."""
+    c = columns_to_paise(columns)
+    for stage in (STATUTORY_STAGES if statutory_rounding else STAGES):
+        stage(c)
+    return c
+
+
+PAISE_FIELDS = [
+    "gross_salary", "gross_total_income",
+    "old_taxable_income", "old_tax_on_income", "old_rebate_87a", "old_cess", "old_total_tax",
+    "old_special_rate_tax", "old_surcharge", "old_surcharge_relief",
+    "new_taxable_income", "new_tax_on_income", "new_rebate_87a", "new_marginal_relief", "new_cess", "new_total_tax",
+    "new_special_rate_tax", "new_surcharge", "new_surcharge_relief",
+    "savings",
+]
+
+
+def compute(profile, statutory_rounding=False):
+    """Exact results for one profile: field -> int paise, plus recommended_regime."""
+    result = compute_columns(columns_from_profiles([normalize_profile(profile)]), statutory_rounding)
+    out = {name: int(result[name][0]) for name in PAISE_FIELDS}
+    out["recommended_regime"] = "new" if result["recommended_new"][0] else "old"
+    return out
+
+
+if __name__ == "__main__":
+    import decimal
+    import timeit
+
+    from tax_engine import engine
+
+    profile = {"basic": 1234567.89, "hra": 300000.01, "bonus": 99999.99, "elss": 150000, "rentPaid": 240000}
+    exact = compute(profile)
+    print({name: format_rupees(value) for name, value in exact.items() if name != "recommended_regime"})
+    print("statutory:", format_rupees(compute(profile, statutory_rounding=True)["new_total_tax"]))
+
+    amounts = np.random.default_rng(0).uniform(0, 5e6, 1_000_000).round(2)
+    columns = {name: np.zeros_like(amounts) for name in INPUT_FIELDS}
+    columns.update(basic=amounts, age=np.full_like(amounts, 30), metroPolitanCity=np.ones_like(amounts))
+    print("fixed   1M rows: %.3fs" % timeit.timeit(lambda: compute_columns(columns), number=1))
+    print("float   1M rows: %.3fs" % timeit.timeit(lambda: engine.compute_columns(columns), number=1))
+    paise = to_paise_array(amounts)
+    print("fixed   1M cess: %.3fs" % timeit.timeit(lambda: cess(paise), number=1))
+    sample = [decimal.Decimal(repr(float(a))) for a in amounts]
+    cent, rate = decimal.Decimal("0.01"), decimal.Decimal(str(rules.CESS_RATE))
+    print("Decimal 1M cess: %.3fs" % timeit.timeit(
+        lambda: [(d * rate).quantize(cent, rounding=decimal.ROUND_HALF_UP) for d in sample], number=1))
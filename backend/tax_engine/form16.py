@@ -0,0 +1,119 @@
+"""
+Pull tax profile fields out of the OCR text of a Form 16 or a salary slip.
+
+    split_inputs(extract_fields(text))
+    -> {"kind": "form16", "salary_inputs": {"basic": 1250000.0},
+        "deduction_inputs": {"epf": 150000.0, "medicalPremiums": 25000.0}}
+
+OCR keeps a table row on one line, so the text is read line by line. Each
+label takes the amount(s) between it and the next label on the same line,
+which keeps the two-column "Earnings | Deductions" layout of salary slips
+apart. On a Form 16 a deduction row reads "gross ... deductible"; the
+deductible (last) amount is used. On a slip, a row reads "this month ...
+year to date"; the monthly (first) amount is used, annualised.
+
+A Form 16 only reports total salary under section 17(1). As in chat facts,
+that is taxed as basic pay.
+"""
+import re
+
+from tax_engine.engine import DEDUCTION_FIELDS, SALARY_FIELDS
+
+FORM16_RE = re.compile(r"form\s*(?:no\.?\s*)?16\b|section\s*17\s*\(\s*1\s*\)|part\s*b\s*\(?\s*annexure", re.I)
+SLIP_RE = re.compile(r"pay\s*slip|salary\s*slip|pay\s*stub|earnings|net\s*pay|take\s*home", re.I)
+
+# label pattern -> engine field; more specific phrases first.
+SLIP_LABELS = [
+    (r"basic(?:\s+(?:salary|pay))?", "basic"),
+    (r"dearness\s+allowance|\bd\.?\s?a\b", "da"),
+    (r"house\s+rent\s+allowance|\bh\.?\s?r\.?\s?a\b", "hra"),
+    (r"leave\s+travel\s+(?:allowance|concession)|\bl\.?\s?t\.?\s?[ac]\b", "lta"),
+    (r"special\s+allowance|other\s+allowances?|conveyance(?:\s+allowance)?|flexi(?:ble)?\s+(?:pay|allowance)", "otherAllowances"),
+    (r"bonus|performance\s+(?:pay|incentive)|variable\s+pay|incentive", "bonus"),
+    (r"(?:employee(?:'?s)?\s+)?(?:provident\s+fund|\be\.?p\.?f\b|\bp\.?f\b)(?:\s+contribution)?", "epf"),
+    (r"\bnps\b|national\s+pension", "nps"),
+]
+FORM16_LABELS = [
+    (r"salary\s+as\s+per\s+provisions\s+contained\s+in\s+section\s*17\s*\(\s*1\s*\)|gross\s+salary", "basic"),
+    (r"80\s*ccd\s*\(\s*1\s*b\s*\)", "nps"),
+    # 80C total; the engine only uses the capped sum of the 80C fields.
+    (r"(?:under\s+)?section\s*80\s*c\b(?!c)|\b80\s*c\b(?!c)", "epf"),
+    (r"(?:under\s+)?section\s*80\s*d\b|health\s+insurance\s+premi", "medicalPremiums"),
+    (r"(?:under\s+)?section\s*80\s*e\b|interest\s+on\s+loan\s+taken\s+for\s+higher\s+education", "educationLoanInterest"),
+    (r"(?:under\s+)?section\s*80\s*tta\b|interest\s+on\s+deposits\s+in\s+savings", "savingsAccountInterest"),
+    (r"interest\s+on\s+(?:housing|home)\s+loan|section\s*24\s*\(?\s*b\s*\)?", "homeLoanInterest24B"),
+]
+
+
+def _compile(labels):
+    return re.compile("|".join(f"(?P<f{i}>{pattern})" for i, (pattern, _) in enumerate(labels)), re.I)
+
+
+_SLIP_RE = _compile(SLIP_LABELS)
+_FORM16_RE = _compile(FORM16_LABELS)
+# Amounts have at least three digits or a grouping comma, so section numbers
+# like "17(1)" and "10(13A)" are never read as money. A bare 1900-2099 (no
+# comma, no paise) is a year ("Payslip for April 2024"), not an amount.
+AMOUNT_RE = re.compile(
+    r"(?<![\w.])(?!(?:19|20)\d\d(?![\d,]|\.\d))(?:\d{1,3}(?:,\d{2,3})+|\d{3,})(?:\.\d{1,2})?(?![\w%])")
+
+
+def document_kind(text):
+    if FORM16_RE.search(text):
+        return "form16"
+    if SLIP_RE.search(text):
+        return "slip"
+    return None
+
+
+def extract_fields(text):
+    """Engine fields found in the OCR text, as {"kind": ..., field: annual amount}.
+
+    Text that is neither a Form 16 nor a salary slip yields no fields: without
+    the kind there is no telling monthly from annual amounts.
+    """
+    kind = document_kind(text)
+    if kind is None:
+        return {"kind": None}
+    labels, pattern = (FORM16_LABELS, _FORM16_RE) if kind == "form16" else (SLIP_LABELS, _SLIP_RE)
+    fields = {}
+    for line in text.splitlines():
+        matches = list(pattern.finditer(line))
+        for i, match in enumerate(matches):
+            field = labels[int(match.lastgroup[1:])][1]
+            if field in fields:
+                continue  # the first row wins ("Basic" before "Basic arrears")
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(line)
+            amounts = AMOUNT_RE.findall(line[match.end():end])
+            if not amounts:
+                continue
+            amount = float((amounts[-1] if kind == "form16" else amounts[0]).replace(",", ""))
+            fields[field] = amount * 12 if kind == "slip" else amount
+    return {"kind": kind, **fields}
+
+
+def split_inputs(fields):
+    """{"kind", "salary_inputs", "deduction_inputs"} in the calculator's shape."""
+    return {
+        "kind": fields.get("kind"),
+        "salary_inputs": {k: v for k, v in fields.items() if k in SALARY_FIELDS},
+        "deduction_inputs": {k: v for k, v in fields.items() if k in DEDUCTION_FIELDS},
+    }
+
+
+if __name__ == "__main__":
+    slip = """ACME PVT LTD   Pay Slip for March 2025
+Earnings            Amount     YTD        Deductions        Amount
+Basic Salary        50,000.00  600,000    Provident Fund    6,000.00
+House Rent Allowance 20,000.00 240,000    Professional Tax  200.00
+Special Allowance   15,000.00  180,000
+Net Pay 78,800.00"""
+    form16 = """FORM NO. 16  PART B (Annexure)
+1. Gross Salary
+(a) Salary as per provisions contained in section 17(1)     12,50,000.00
+10. Deductions under Chapter VI-A          Gross Amount   Deductible Amount
+(a) Deduction in respect of life insurance premia, contributions to provident fund etc. under section 80C   1,80,000.00  1,50,000.00
+(d) Deduction in respect of health insurance premia under section 80D   25,000.00   25,000.00
+(e) Deduction in respect of contribution by taxpayer to pension scheme under section 80CCD (1B)   50,000.00   50,000.00"""
+    for text in (slip, form16):
+        print(split_inputs(extract_fields(text)))
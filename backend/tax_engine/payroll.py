@@ -0,0 +1,208 @@
+"""
+Bounded-memory ingestion of payroll sheets (CSV or Excel) for bulk tax runs.
+
+Rows are read in chunks of `chunk_rows`, column names are normalized to the
+engine's fields (camelCase, snake_case and the aliases in engine.FIELD_ALIASES
+all work), each chunk is computed on a process pool, and results are written
+incrementally in input order. At most `2 * workers` chunks are in flight, so
+peak memory does not depend on the size of the file.
+
+Usage:
+    python -m tax_engine.payroll salaries.csv results.csv
+    python -m tax_engine.payroll salaries.xlsx results.parquet --workers 8
+"""
+import argparse
+import csv
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from tax_engine.batch import ID_FIELDS, compute_records
+from tax_engine.engine import ROW_FIELDS, canonical_field
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 20000
+OUTPUT_FIELDS = ["line", "id", *ROW_FIELDS, "error"]
+
+
+def normalize_header(header):
+    """Map raw column names to engine fields; unknown columns map to None."""
+    columns = []
+    for name in header:
+        name = (name or "").strip()
+        if name in ID_FIELDS:
+            columns.append("id")
+        else:
+            columns.append(canonical_field(name))
+    unknown = [raw for raw, field in zip(header, columns) if field is None]
+    if unknown:
+        logger.warning("ignoring unknown payroll columns: %s", ", ".join(map(str, unknown)))
+    if not any(field not in (None, "id") for field in columns):
+        raise ValueError("no recognised salary or deduction columns in header")
+    return columns
+
+
+# ---------------------------------- Readers ----------------------------------
+
+def iter_csv_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield (columns, line numbers, rows) chunks from a CSV file."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        columns = normalize_header(next(reader))
+        lines, chunk = [], []
+        for row in reader:
+            if not any(row):
+                continue
+            lines.append(reader.line_num)
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield columns, lines, chunk
+                lines, chunk = [], []
+        if chunk:
+            yield columns, lines, chunk
+
+
+def iter_excel_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield (columns, line numbers, rows) chunks from the first sheet of an .xlsx file."""
+    from openpyxl import load_workbook  # optional dependency, only for Excel input
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        columns = normalize_header([str(v) if v is not None else "" for v in next(rows)])
+        lines, chunk = [], []
+        for line, row in enumerate(rows, start=2):
+            if not any(v not in (None, "") for v in row):
+                continue
+            lines.append(line)
+            chunk.append(["" if v is None else v for v in row])
+            if len(chunk) >= chunk_rows:
+                yield columns, lines, chunk
+                lines, chunk = [], []
+        if chunk:
+            yield columns, lines, chunk
+    finally:
+        workbook.close()
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    suffix = Path(path).suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        return iter_excel_chunks(path, chunk_rows)
+    return iter_csv_chunks(path, chunk_rows)
+
+
+# ---------------------------------- Writers ----------------------------------
+
+class CsvResultWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """Appends one row group per chunk (requires pyarrow)."""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [("line", pa.int64()), ("id", pa.string())]
+            + [(name, pa.string() if name == "recommended_regime" else pa.float64()) for name in ROW_FIELDS]
+            + [("error", pa.string())]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        columns = {
+            name: [None if row.get(name) is None else (str(row[name]) if name == "id" else row[name]) for row in rows]
+            for name in self._schema.names
+        }
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(path):
+    if Path(path).suffix.lower() == ".parquet":
+        return ParquetResultWriter(path)
+    return CsvResultWriter(path)
+
+
+# ---------------------------------- Pipeline ----------------------------------
+
+def compute_chunk(columns, lines, rows):
+    """Worker entry point: compute one chunk of raw rows."""
+    records = [{field: value for field, value in zip(columns, row) if field is not None} for row in rows]
+    out = compute_records(records)
+    for row, line in zip(out, lines):
+        row["line"] = line
+    return out
+
+
+def ingest(input_path, output_path, workers=None, chunk_rows=CHUNK_ROWS):
+    """Compute taxes for every row of `input_path` and write them to `output_path`.
+
+    Returns a summary dict with row, error and timing counts.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    start = time.perf_counter()
+    summary = {"rows": 0, "errors": 0, "chunks": 0}
+
+    writer = open_writer(output_path)
+    in_flight = deque()
+
+    def drain_one():
+        rows = in_flight.popleft().result()
+        writer.write(rows)
+        summary["rows"] += len(rows)
+        summary["errors"] += sum(1 for row in rows if "error" in row)
+        summary["chunks"] += 1
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for columns, lines, rows in iter_chunks(input_path, chunk_rows):
+                if len(in_flight) >= max_in_flight:
+                    drain_one()
+                in_flight.append(pool.submit(compute_chunk, columns, lines, rows))
+            while in_flight:
+                drain_one()
+    finally:
+        for future in in_flight:
+            future.cancel()
+        writer.close()
+
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk tax computation for payroll CSV/Excel files")
+    parser.add_argument("input", help="CSV or .xlsx payroll sheet")
+    parser.add_argument("output", help="results file (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = ingest(args.input, args.output, args.workers, args.chunk_rows)
+    print(f"{summary['rows']} rows ({summary['errors']} errors) in {summary['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Tax rules for individuals, FY 2025-26 (AY 2026-27).
+
+Everything the engine needs to know about the law lives here as data: slab
+tables are lists of (lower bound, rate) pairs, limits are plain rupee amounts.
+Rates are fractions (0.05 == 5%).
+"""
+ASSESSMENT_YEAR = "2026-27"
+
+INF = float("inf")
+
+# ---------------------------------- Slabs ----------------------------------
+# (lower bound, rate); each slab runs up to the next lower bound.
+
+NEW_REGIME_SLABS = [
+    (0, 0.0),
+    (400000, 0.05),
+    (800000, 0.10),
+    (1200000, 0.15),
+    (1600000, 0.20),
+    (2000000, 0.25),
+    (2400000, 0.30),
+]
+
+OLD_REGIME_SLABS = {
+    # age band -> slabs
+    "below_60": [(0, 0.0), (250000, 0.05), (500000, 0.20), (1000000, 0.30)],
+    "senior": [(0, 0.0), (300000, 0.05), (500000, 0.20), (1000000, 0.30)],
+    "super_senior": [(0, 0.0), (500000, 0.20), (1000000, 0.30)],
+}
+
+SENIOR_AGE = 60
+SUPER_SENIOR_AGE = 80
+
+# ---------------------------- Standard deduction ----------------------------
+
+STANDARD_DEDUCTION_OLD = 50000
+STANDARD_DEDUCTION_NEW = 75000
+
+# -------------------------------- Rebate 87A --------------------------------
+
+REBATE_OLD_INCOME_LIMIT = 500000
+REBATE_OLD_MAX = 12500
+REBATE_NEW_INCOME_LIMIT = 1200000
+REBATE_NEW_MAX = 60000
+
+# ----------------------------------- Cess -----------------------------------
+
+CESS_RATE = 0.04
+
+# -------------------------------- Surcharge --------------------------------
+# (total income above, rate) on income tax, before cess.
+
+SURCHARGE_SLABS = [
+    (0, 0.0),
+    (5000000, 0.10),
+    (10000000, 0.15),
+    (20000000, 0.25),
+    (50000000, 0.37),
+]
+SURCHARGE_MAX_NEW = 0.25
+# Cap on the surcharge rate for tax on capital gains taxed at special rates.
+SURCHARGE_MAX_SPECIAL = 0.15
+
+# ------------------------------ Capital gains ------------------------------
+
+STCG_111A_RATE = 0.20
+LTCG_112A_RATE = 0.125
+LTCG_112A_EXEMPTION = 125000
+LTCG_112_RATE = 0.125
+
+# ------------------------------ House property ------------------------------
+
+HP_STANDARD_DEDUCTION_RATE = 0.30
+# Old regime: loss under house property set off against other heads, per year.
+LIMIT_HP_LOSS_SETOFF = 200000
+
+# ----------------------------- Business income -----------------------------
+# Presumptive income as a share of turnover / gross receipts (digital receipts).
+
+PRESUMPTIVE_44AD_RATE = 0.06
+PRESUMPTIVE_44ADA_RATE = 0.50
+
+# ------------------------- Old regime deduction caps -------------------------
+
+LIMIT_80C = 150000
+LIMIT_80CCD_1B = 50000
+LIMIT_80D = 25000
+LIMIT_80D_SENIOR = 50000
+LIMIT_80TTA = 10000
+LIMIT_80TTB = 50000
+LIMIT_24B_SELF_OCCUPIED = 200000
+
+HRA_METRO_RATE = 0.50
+HRA_NON_METRO_RATE = 0.40
+HRA_RENT_EXCESS_RATE = 0.10
@@ -0,0 +1,276 @@
+"""
+Scenario sweeps for tax planning: "what if bonus goes from 0 to 5L and ELSS
+from 0 to 1.5L?".
+
+A sweep starts from a base profile and varies any input fields over ranges,
+either as a full grid (cartesian product) or as `samples` random points. The
+points are never materialized up front: each chunk of CHUNK_POINTS rebuilds
+its own inputs from the point indices (or from a seeded generator), runs the
+vectorized engine and returns only the two regime totals. Large sweeps are
+spread over a shared process pool.
+
+Range specs, per field:
+    [0, 50000, 100000]                          explicit values
+    {"start": 0, "stop": 500000, "steps": 51}   evenly spaced, inclusive
+    {"start": 0, "stop": 150000, "step": 5000}  fixed increment, inclusive
+"""
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tax_engine.engine import (
+    FLAG_FIELDS, INPUT_FIELDS, canonical_field, compute_columns, normalize_profile,
+)
+
+CHUNK_POINTS = 65536
+PARALLEL_MIN_POINTS = 4 * CHUNK_POINTS
+MAX_POINTS = int(os.getenv("TAX_SWEEP_MAX_POINTS", 5_000_000))
+MAX_AXIS_VALUES = 100_000
+# The returned grid is strided down to about this many points; breakevens
+# are always found on the full grid.
+GRID_RETURN_LIMIT = 10_000
+BREAKEVEN_LIMIT = 1000
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=int(os.getenv("TAX_SWEEP_WORKERS", os.cpu_count() or 1)))
+    return _pool
+
+
+# ---------------------------------- Parsing ----------------------------------
+
+def _whole(value, name):
+    """int(value), with ValueError instead of OverflowError for JSON Infinity."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    return int(number)
+
+
+def parse_axis(field, spec):
+    """Turn one range spec into a sorted float64 array of values."""
+    # The value count is checked before anything is allocated.
+    if isinstance(spec, (list, tuple)):
+        if len(spec) > MAX_AXIS_VALUES:
+            raise ValueError(f"{field}: more than {MAX_AXIS_VALUES} values")
+        values = np.array([float(v) for v in spec], dtype=np.float64)
+    elif isinstance(spec, dict):
+        start, stop = float(spec.get("start", 0)), float(spec["stop"])
+        if not (math.isfinite(start) and math.isfinite(stop)):
+            raise ValueError(f"{field}: start and stop must be finite")
+        if "step" in spec:
+            step = float(spec["step"])
+            if not math.isfinite(step) or step <= 0:
+                raise ValueError(f"{field}: step must be a positive number")
+            # As np.arange(start, stop + step / 2, step): stop is included despite rounding.
+            count = math.ceil((stop - start) / step + 0.5) if stop >= start else 0
+        else:
+            count = _whole(spec.get("steps", 11), f"{field}: steps")
+        if count > MAX_AXIS_VALUES:
+            raise ValueError(f"{field}: more than {MAX_AXIS_VALUES} values")
+        if count < 1:
+            raise ValueError(f"{field}: range is empty")
+        values = start + step * np.arange(count) if "step" in spec else np.linspace(start, stop, count)
+    else:
+        raise ValueError(f"{field}: expected a list of values or a start/stop range")
+    if values.size == 0:
+        raise ValueError(f"{field}: range is empty")
+    if not np.isfinite(values).all():
+        raise ValueError(f"{field}: values must be finite")
+    if field not in FLAG_FIELDS and field != "age" and values.min() < 0:
+        raise ValueError(f"{field}: amounts must be non-negative")
+    return np.unique(values)
+
+
+def parse_ranges(ranges):
+    """Map raw field names to canonical fields and parse their ranges."""
+    if not isinstance(ranges, dict) or not ranges:
+        raise ValueError("ranges must be a non-empty object of field -> range")
+    axes = {}
+    for name, spec in ranges.items():
+        field = canonical_field(name)
+        if field is None:
+            raise ValueError(f"unknown field {name!r}")
+        try:
+            axes[field] = parse_axis(field, spec)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{name}: invalid range ({e})") from None
+    return axes
+
+
+# --------------------------------- Evaluation ---------------------------------
+
+def _evaluate(base, values):
+    """Old/new regime totals for a base profile with some fields replaced by arrays."""
+    n = len(next(iter(values.values())))
+    columns = {field: np.full(n, float(base[field])) for field in INPUT_FIELDS}
+    columns.update(values)
+    result = compute_columns(columns)
+    return result["old_total_tax"], result["new_total_tax"]
+
+
+def grid_chunk(base, axes, start, stop):
+    """Worker entry point: evaluate grid points [start, stop) in row-major order."""
+    shape = tuple(len(values) for values in axes.values())
+    index = np.unravel_index(np.arange(start, stop), shape)
+    return _evaluate(base, {field: values[i] for (field, values), i in zip(axes.items(), index)})
+
+
+def sample_chunk(base, bounds, seed, chunk, count):
+    """Worker entry point: evaluate `count` uniform random points for one chunk."""
+    rng = np.random.default_rng([seed, chunk])
+    values = {field: rng.uniform(low, high, count) for field, (low, high) in bounds.items()}
+    old, new = _evaluate(base, values)
+    return values, old, new
+
+
+def _run(fn, jobs, points):
+    if points < PARALLEL_MIN_POINTS or len(jobs) < 2:
+        return [fn(*job) for job in jobs]
+    return list(get_pool().map(fn, *zip(*jobs)))
+
+
+# ---------------------------------- Results ----------------------------------
+
+def find_breakevens(axes, diff, limit=BREAKEVEN_LIMIT):
+    """Points along each axis where the cheaper regime switches.
+
+    `diff` is new minus old total tax, shaped like the grid. The crossing value
+    is linearly interpolated between the two neighbouring grid points.
+    """
+    fields = list(axes)
+    found, truncated = [], False
+    old_cheaper = diff > 0  # ties go to the new regime
+    for a, field in enumerate(fields):
+        if diff.shape[a] < 2:
+            continue
+        lo = [slice(None)] * diff.ndim
+        hi = [slice(None)] * diff.ndim
+        lo[a], hi[a] = slice(None, -1), slice(1, None)
+        lo, hi = tuple(lo), tuple(hi)
+        positions = np.argwhere(old_cheaper[lo] != old_cheaper[hi])
+        if len(positions) > limit:
+            positions, truncated = positions[:limit], True
+        values = axes[field]
+        for pos in positions:
+            k = pos[a]
+            d0, d1 = diff[tuple(pos)], diff[tuple(pos[:a]) + (k + 1,) + tuple(pos[a + 1:])]
+            x0, x1 = values[k], values[k + 1]
+            crossing = x0 + (x1 - x0) * d0 / (d0 - d1) if d0 != d1 else x0
+            found.append({
+                "field": field,
+                "value": round(float(crossing), 2),
+                "fixed": {other: float(axes[other][pos[b]]) for b, other in enumerate(fields) if b != a},
+                "cheaper_below": "old" if d0 > 0 else "new",
+            })
+    return found, truncated
+
+
+def _strides(shape, limit):
+    """Per-axis strides that bring the grid down to about `limit` points."""
+    strides = [1] * len(shape)
+    while math.prod(-(-n // s) for n, s in zip(shape, strides)) > limit:
+        # Thin the axis that currently has the most returned values.
+        a = max(range(len(shape)), key=lambda i: -(-shape[i] // strides[i]))
+        strides[a] *= 2
+    return strides
+
+
+def _rupees(values):
+    return np.rint(values).astype(np.int64).ravel().tolist()
+
+
+def sweep_grid(base, axes):
+    shape = tuple(len(values) for values in axes.values())
+    points = math.prod(shape)  # Python ints: np.prod wraps around on int64
+    if points > MAX_POINTS:
+        raise ValueError(f"grid has {points} points (limit {MAX_POINTS}); pass `samples` to sample it instead")
+
+    jobs = [(base, axes, start, min(start + CHUNK_POINTS, points)) for start in range(0, points, CHUNK_POINTS)]
+    parts = _run(grid_chunk, jobs, points)
+    old = np.concatenate([old for old, _ in parts]).reshape(shape)
+    new = np.concatenate([new for _, new in parts]).reshape(shape)
+
+    breakevens, truncated = find_breakevens(axes, new - old)
+    view = tuple(slice(None, None, s) for s in _strides(shape, GRID_RETURN_LIMIT))
+    returned = {field: values[s].tolist() for (field, values), s in zip(axes.items(), view)}
+    return {
+        "mode": "grid",
+        "points": points,
+        "fields": list(axes),
+        "axes": returned,
+        "shape": [len(values) for values in returned.values()],
+        "old_total_tax": _rupees(old[view]),
+        "new_total_tax": _rupees(new[view]),
+        "breakevens": breakevens,
+        "breakevens_truncated": truncated,
+    }
+
+
+def sweep_samples(base, axes, samples, seed=0):
+    if samples > MAX_POINTS:
+        raise ValueError(f"at most {MAX_POINTS} samples")
+    bounds = {field: (float(values.min()), float(values.max())) for field, values in axes.items()}
+    jobs = [
+        (base, bounds, seed, chunk, min(CHUNK_POINTS, samples - start))
+        for chunk, start in enumerate(range(0, samples, CHUNK_POINTS))
+    ]
+    parts = _run(sample_chunk, jobs, samples)
+    values = {field: np.concatenate([part[0][field] for part in parts]) for field in bounds}
+    old = np.concatenate([part[1] for part in parts])
+    new = np.concatenate([part[2] for part in parts])
+
+    diff = new - old
+    nearest = np.argsort(np.abs(diff))[:BREAKEVEN_LIMIT // 10]
+    shown = slice(None, GRID_RETURN_LIMIT)
+    return {
+        "mode": "sample",
+        "points": samples,
+        "seed": seed,
+        "fields": list(bounds),
+        "samples": {field: np.round(v[shown], 2).tolist() for field, v in values.items()},
+        "old_total_tax": _rupees(old[shown]),
+        "new_total_tax": _rupees(new[shown]),
+        "new_cheaper_share": round(float(np.mean(diff <= 0)), 4),
+        # Samples where the regimes come closest to costing the same.
+        "near_breakeven": [
+            {**{field: round(float(values[field][i]), 2) for field in bounds}, "difference": round(float(diff[i]), 2)}
+            for i in nearest
+        ],
+    }
+
+
+def sweep(profile, ranges, samples=None, seed=0):
+    """Evaluate a base profile over ranges of any input fields.
+
+    Without `samples` the full grid is evaluated; with it, `samples` uniform
+    random points inside the ranges' bounds. Raises ValueError on bad input.
+    """
+    start = time.perf_counter()
+    base = normalize_profile(profile or {})
+    axes = parse_ranges(ranges)
+    if samples is None:
+        result = sweep_grid(base, axes)
+    else:
+        samples = _whole(samples, "samples")
+        if samples < 1:
+            raise ValueError("samples must be positive")
+        result = sweep_samples(base, axes, samples, _whole(seed, "seed"))
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+if __name__ == "__main__":
+    profile = {"salary_inputs": {"basic": 900000, "hra": 300000}, "deduction_inputs": {"rentPaid": 240000}}
+    ranges = {"bonus": {"start": 0, "stop": 500000, "steps": 1000}, "elss": {"start": 0, "stop": 150000, "steps": 1000}}
+    result = sweep(profile, ranges)
+    print(f"{result['points']} points in {result['seconds']}s, {len(result['breakevens'])} breakevens")
+    for point in result["breakevens"][:5]:
+        print(point)
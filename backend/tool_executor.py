@@ -0,0 +1,118 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentStep
+
+import metrics
+from store.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+# Tools whose output only depends on their input. Their results are memoized
+# for the lifetime of one agent session (one user question).
+PURE_TOOLS = {"add", "subtract", "multiply", "divide", "power", "check_system_time", "select_itr_form"}
+
+# Tools whose results are shared across sessions for a limited time (seconds).
+TTL_TOOLS = {
+    "duckduckgo_search": 15 * 60,
+    # Local price data changes only when the store is re-imported.
+    "get_historical_price": 60 * 60,
+    "get_current_price": 5 * 60,
+    "evaluate_returns": 5 * 60,
+}
+
+MAX_TTL_ENTRIES = 512
+
+_current_session = ContextVar("tool_session", default=None)
+
+
+# TTL tool results are shared by every worker on the host (see store/shared_cache.py).
+_ttl_cache = SharedCache("tool_results", local_entries=MAX_TTL_ENTRIES)
+
+
+def cache_key(tool_name, tool_input):
+    """Normalize a tool call into a hashable cache key."""
+    if isinstance(tool_input, dict):
+        normalized = json.dumps(tool_input, sort_keys=True, default=str)
+    else:
+        normalized = " ".join(str(tool_input).split())
+    if tool_name in TTL_TOOLS:
+        normalized = normalized.lower()
+    return tool_name, normalized
+
+
+class ToolSession:
+    """Per-question state: memoized results and timings."""
+
+    def __init__(self):
+        self.memo = {}
+        self.timings = []
+
+    def lookup(self, key):
+        tool_name = key[0]
+        if tool_name in PURE_TOOLS and key in self.memo:
+            return True, self.memo[key]
+        if tool_name in TTL_TOOLS:
+            value = _ttl_cache.get(key)
+            if value is not None:
+                return True, value
+        return False, None
+
+    def store(self, key, observation):
+        tool_name = key[0]
+        if tool_name in PURE_TOOLS:
+            self.memo[key] = observation
+        elif tool_name in TTL_TOOLS:
+            _ttl_cache.set(key, observation, TTL_TOOLS[tool_name])
+
+    def record(self, tool_name, elapsed, source):
+        self.timings.append((tool_name, elapsed, source))
+        metrics.stage_seconds.observe(elapsed, stage="tool", tool=tool_name, source=source)
+        logger.info("tool=%s source=%s took %.1f ms", tool_name, source, elapsed * 1000)
+
+
+def current_session():
+    return _current_session.get()
+
+
+@contextmanager
+def tool_session():
+    """Open a tool session for the duration of one agent invocation."""
+    session = ToolSession()
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+
+
+class CachingAgentExecutor(AgentExecutor):
+    """AgentExecutor that memoizes tool calls.
+
+    The ReAct text parser yields one action per step, so actions run one at a
+    time as in the base executor; only repeated calls are saved.
+    """
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        session = current_session()
+        if session is None or agent_action.tool not in name_to_tool_map:
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        key = cache_key(agent_action.tool, agent_action.tool_input)
+        hit, observation = session.lookup(key)
+        metrics.cache_result(f"tool:{agent_action.tool}", hit)
+        if hit:
+            if run_manager:
+                run_manager.on_agent_action(agent_action, color="green")
+            session.record(agent_action.tool, 0.0, "cache")
+            return AgentStep(action=agent_action, observation=observation)
+
+        start = time.perf_counter()
+        step = super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        session.store(key, step.observation)
+        session.record(agent_action.tool, time.perf_counter() - start, "run")
+        return step
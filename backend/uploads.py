@@ -0,0 +1,136 @@
+"""
+Content-addressed uploads of WhatsApp media to the Gemini File API.
+
+Users often resend the same Form 16 or screenshot. Without this, every
+resend was a fresh multi-MB upload on the hot path of an image message.
+The manager hashes the file in 1 MiB chunks (SHA-256) and looks the hash up
+in the shared cache (store/shared_cache.py) of remote file handles. It
+uploads only on a miss:
+
+    handle = get_uploads().upload("whatsapp-data/image-123.jpg")
+    model.generate_content([handle.part(), prompt])
+
+Gemini deletes uploaded files after 48 hours. A handle is only reused while
+it has at least REUSE_MARGIN_SECONDS left, so a request never refers to a
+file that expires mid-call. Concurrent uploads of the same content share
+one upload (singleflight), and all workers on the host share the handles.
+
+GEMINI_UPLOAD_BACKEND=stub swaps the File API for LocalStubBackend, which
+keeps "uploads" in memory and counts them, for tests and offline runs.
+"""
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+import metrics
+from singleflight import SingleFlight
+from store.shared_cache import SharedCache
+
+CHUNK_BYTES = 1024 * 1024
+FILE_LIFETIME_SECONDS = 48 * 3600
+REUSE_MARGIN_SECONDS = 3600
+BACKEND = os.getenv("GEMINI_UPLOAD_BACKEND", "gemini")
+
+
+@dataclass
+class FileHandle:
+    name: str
+    uri: str
+    mime_type: str
+    sha256: str
+    size: int
+    expires_at: float
+
+    def part(self):
+        """Content part referring to the uploaded file, for generate_content."""
+        return {"file_data": {"mime_type": self.mime_type, "file_uri": self.uri}}
+
+
+def hash_file(path, chunk_bytes=CHUNK_BYTES):
+    """(sha256 hex, size) of the file, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_bytes):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+# ---- Backends ----
+
+class GeminiFileBackend:
+    def upload(self, path, mime_type, sha256):
+        """Upload `path` as-is (binary); returns (name, uri, expires_at)."""
+        import google.generativeai as genai
+        from whatsapp_gemini import get_model
+
+        get_model()  # configures the SDK on first use
+        remote = genai.upload_file(path, mime_type=mime_type, display_name=sha256[:16])
+        expiration = getattr(remote, "expiration_time", None)
+        expires_at = expiration.timestamp() if expiration else time.time() + FILE_LIFETIME_SECONDS
+        return remote.name, remote.uri, expires_at
+
+
+class LocalStubBackend:
+    """In-memory stand-in for the File API: keeps the bytes and counts uploads."""
+
+    def __init__(self):
+        self.files = {}
+        self.uploads = 0
+        self._lock = threading.Lock()
+
+    def upload(self, path, mime_type, sha256):
+        with open(path, "rb") as f:
+            data = f.read()
+        with self._lock:
+            self.uploads += 1
+            name = f"files/stub-{self.uploads}"
+            self.files[name] = data
+        return name, f"stub://{name}", time.time() + FILE_LIFETIME_SECONDS
+
+
+# ---- Manager ----
+
+class UploadManager:
+    def __init__(self, backend):
+        self.backend = backend
+        self._handles = SharedCache("gemini_files", ttl=FILE_LIFETIME_SECONDS, local_entries=256)
+        self._flight = SingleFlight("gemini_upload")
+
+    def upload(self, path, mime_type=None):
+        """Handle for the file's content, uploading it only if no live handle exists."""
+        mime_type = mime_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        sha256, size = hash_file(path)
+        key = f"{sha256}:{mime_type}"
+        cached = self._handles.get(key)
+        hit = cached is not None and cached["expires_at"] - time.time() > REUSE_MARGIN_SECONDS
+        metrics.cache_result("gemini_upload", hit)
+        if hit:
+            return FileHandle(**cached)
+        return self._flight.do(key, self._upload, key, path, mime_type, sha256, size)
+
+    def _upload(self, key, path, mime_type, sha256, size):
+        with metrics.timed("gemini_upload"):
+            name, uri, expires_at = self.backend.upload(path, mime_type, sha256)
+        metrics.upload_bytes_total.inc(size)
+        handle = FileHandle(name, uri, mime_type, sha256, size, expires_at)
+        self._handles.set(key, asdict(handle), ttl=expires_at - time.time() - REUSE_MARGIN_SECONDS)
+        return handle
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_uploads():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                backend = LocalStubBackend() if BACKEND == "stub" else GeminiFileBackend()
+                _manager = UploadManager(backend)
+    return _manager
@@ -1,20 +1,23 @@
 import os
-import google.generativeai as genai
+import threading
 from dotenv import load_dotenv
 from prompt_manager.prompt import prompts
+from knowledge.retriever import build_context
 import json
+import metrics
 import base64
+from singleflight import SingleFlight, flight_key
+from store.shared_cache import SharedCache
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("Gemini_API_Key")
-genai.configure(api_key=GEMINI_API_KEY)
 
 def upload_to_gemini(path, mime_type=None):
-    with open(path, 'rb') as f:
-        content = f.read()
-    encoded = content.decode('utf-8', errors='ignore').encode('ascii', errors='ignore')
-    return genai.upload_file(encoded, mime_type=mime_type)
+    """FileHandle for the file, reusing an earlier upload of the same content (see uploads.py)."""
+    from uploads import get_uploads
+
+    return get_uploads().upload(path, mime_type)
 
 generation_config = {
     "temperature": 0.7,
@@ -24,40 +27,72 @@ generation_config = {
     "candidate_count": 1
 }
 
-model = genai.GenerativeModel(
-    name="gemini-pro",
-    generation_config=generation_config,
-    safety_settings={
-        "HARASSMENT": "BLOCK_MEDIUM_AND_ABOVE",
-        "HATE_SPEECH": "BLOCK_MEDIUM_AND_ABOVE", 
-        "SEXUALLY_EXPLICIT": "BLOCK_MEDIUM_AND_ABOVE",
-        "DANGEROUS_CONTENT": "BLOCK_MEDIUM_AND_ABOVE"
-    }
-)
+MODEL_NAME = "gemini-pro"
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Configure the Gemini SDK and build the model on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                _model = genai.GenerativeModel(
+                    name=MODEL_NAME,
+                    generation_config=generation_config,
+                    safety_settings={
+                        "HARASSMENT": "BLOCK_MEDIUM_AND_ABOVE",
+                        "HATE_SPEECH": "BLOCK_MEDIUM_AND_ABOVE", 
+                        "SEXUALLY_EXPLICIT": "BLOCK_MEDIUM_AND_ABOVE",
+                        "DANGEROUS_CONTENT": "BLOCK_MEDIUM_AND_ABOVE"
+                    }
+                )
+    return _model
 
-_message_cache = {}
+_message_cache = SharedCache("gemini_whatsapp")
+_message_flight = SingleFlight("gemini_whatsapp")
 
-def chat_with_gemini(message, media_file_path=None):
-    global _message_cache
-    cache_key = f"{message}:{media_file_path}:{len(_message_cache)}"
+def _generate_text(prompt):
+    cleaned_msg = json.loads(json.dumps(prompt))
+    response = get_model().generate_content(cleaned_msg)
+    return response.text if hasattr(response, 'text') else str(response)
+
+def chat_with_gemini(message, media_file_path=None, user_context=""):
+    try:
+        files = [upload_to_gemini(f) for f in media_file_path or []]
+    except Exception as e:
+        metrics.record_error("gemini_upload", e)
+        return "Processing your media..."
+    # Media is keyed by content, so a resent file can hit the answer cache too.
+    media_key = ",".join(f.sha256 for f in files)
+    cache_key = f"{prompts.version('context_prompt')}:{message}:{media_key}:{user_context}"
     
-    if cache_key in _message_cache:
-        return _message_cache[cache_key]
+    cached = _message_cache.get(cache_key)
+    metrics.cache_result("gemini_whatsapp", cached is not None)
+    if cached is not None:
+        return cached
         
     try:
-        if media_file_path:
-            files = [upload_to_gemini(f) for f in media_file_path]
-            if None in files:
-                return "Processing your media..."
-            response = model.generate_content(message, files)
+        # Only the sections relevant to this message are sent with it.
+        context = build_context(message)
+        if user_context:
+            context += "\n\n" + prompts.render("user_prompt", user_context=user_context)
+        message = prompts.render("context_prompt", context=context, message=message)
+        if files:
+            response = get_model().generate_content([*(f.part() for f in files), message])
+            result = response.text if hasattr(response, 'text') else str(response)
         else:
-            cleaned_msg = json.loads(json.dumps(message))
-            response = model.generate_content(cleaned_msg)
+            # Identical text messages arriving together share one Gemini call.
+            key = flight_key(MODEL_NAME, prompts.version('context_prompt'), message)
+            result = _message_flight.do(key, _generate_text, message)
             
-        result = response.text if hasattr(response, 'text') else str(response)
-        _message_cache[cache_key] = result
+        _message_cache.set(cache_key, result)
         return result
-    except:
+    except Exception as e:
+        metrics.record_error("gemini", e)
         return "Still working on it..."
 
 if __name__ == "__main__":
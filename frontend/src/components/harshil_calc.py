@@ -227,7 +227,7 @@ def calculate_tax_new_regime(gross_salary):
         return 0
     
     # New regime tax Slabs Same for all age groups
-    slabs = [400000, 800000, 12000000, 1600000, 2000000, 2400000]
+    slabs = [400000, 800000, 1200000, 1600000, 2000000, 2400000]
     rates = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3]
     
     tax = 0
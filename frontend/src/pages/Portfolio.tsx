@@ -20,6 +20,8 @@ import {
 } from '../data/portfolioData';
 import { motion } from 'framer-motion';
 import { useState, useEffect } from 'react';
+import axios from 'axios';
+import { API_ENDPOINTS } from '../utils';
 
 interface RiskMetrics {
   volatility: number;
@@ -53,6 +55,21 @@ interface RiskMetricsWithScore extends RiskMetrics {
   riskScore: number;
 }
 
+// One portfolio's result from /portfolio/analytics (percent values in percent)
+interface PortfolioAnalytics {
+  id: string;
+  version: string;
+  volatility: number;
+  sharpe_ratio: number;
+  max_drawdown: number;
+  beta: number;
+  alpha: number;
+  risk_score: number;
+}
+
+// Bump when performanceData changes so the backend cache is refreshed
+const PORTFOLIO_VERSION = '1';
+
 const Portfolio = () => {
   const liabilities = liabilitiesData as Liability[];
   const recentActivity = recentActivityData as Activity[];
@@ -105,15 +122,44 @@ const Portfolio = () => {
     return formatCurrency(displayValue);
   };
 
-  // Add riskScore calculation based on other metrics
-  const riskMetricsWithScore: RiskMetricsWithScore = {
-    volatility: riskMetrics.volatility,
-    sharpeRatio: riskMetrics.sharpeRatio,
-    maxDrawdown: riskMetrics.maxDrawdown,
-    beta: riskMetrics.beta,
-    alpha: riskMetrics.alpha,
+  // Risk metrics are computed by the backend (/portfolio/analytics); the
+  // static values are shown until the response arrives or if it fails.
+  const [riskMetricsWithScore, setRiskMetricsWithScore] = useState<RiskMetricsWithScore>({
+    ...riskMetrics,
     riskScore: Math.round((riskMetrics.volatility / 20 + riskMetrics.beta / 1.5) * 50)
-  };
+  });
+
+  useEffect(() => {
+    const controller = new AbortController();
+    axios.post<{ portfolios: PortfolioAnalytics[] }>(
+      API_ENDPOINTS.PORTFOLIO_ANALYTICS,
+      {
+        frequency: 'monthly',
+        benchmark: { values: performanceData.map((point) => point.benchmark) },
+        portfolios: [{
+          id: 'main',
+          version: PORTFOLIO_VERSION,
+          values: performanceData.map((point) => point.portfolio)
+        }]
+      },
+      { signal: controller.signal }
+    ).then((response) => {
+      const result = response.data.portfolios[0];
+      setRiskMetricsWithScore({
+        volatility: result.volatility,
+        sharpeRatio: result.sharpe_ratio,
+        maxDrawdown: result.max_drawdown,
+        beta: result.beta,
+        alpha: result.alpha,
+        riskScore: result.risk_score
+      });
+    }).catch((error) => {
+      if (!axios.isCancel(error)) {
+        console.error('Portfolio analytics failed:', error);
+      }
+    });
+    return () => controller.abort();
+  }, []);
 
   return (
     <motion.div 
@@ -1,5 +1,7 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
+import axios from 'axios';
 import { Calculator, IndianRupee, Info } from 'lucide-react';
+import { API_ENDPOINTS } from '../utils';
 
 interface SalaryInputs {
   basic: number;
@@ -25,6 +27,34 @@ interface DeductionInputs {
   rentPaid: number;
 }
 
+interface RegimeBreakdown {
+  house_property: number;
+  total_deductions: number;
+  normal_income: number;
+  taxable_income: number;
+  tax_on_income: number;
+  special_rate_tax: number;
+  rebate_87a: number;
+  marginal_relief: number;
+  tax_after_rebate: number;
+  surcharge: number;
+  surcharge_relief: number;
+  cess: number;
+  total_tax: number;
+}
+
+interface TaxBreakdown {
+  gross_salary: number;
+  gross_total_income: number;
+  old_regime: RegimeBreakdown;
+  new_regime: RegimeBreakdown;
+  recommended_regime: 'old' | 'new';
+  savings: number;
+}
+
+// Wait for the user to stop typing before asking the server to recompute
+const COMPUTE_DEBOUNCE_MS = 300;
+
 const TaxCalculator = () => {
   const [age, setAge] = useState<number>(30);
   const [salaryInputs, setSalaryInputs] = useState<SalaryInputs>({
@@ -51,105 +81,31 @@ const TaxCalculator = () => {
     rentPaid: 0
   });
 
-  // Tax calculation functions
-  const calculateGrossSalary = (): number => {
-    return Object.values(salaryInputs).reduce((sum, val) => sum + (Number(val) || 0), 0);
-  };
-
-  const calculate80CDeductions = (): number => {
-    const sum80C = deductionInputs.ppf + 
-                  deductionInputs.elss + 
-                  deductionInputs.nsc + 
-                  deductionInputs.epf + 
-                  deductionInputs.homeLoanPrinciple80C;
-    return Math.min(sum80C, 150000);
-  };
-
-  const calculateHRAExemption = (): number => {
-    const basicDa = salaryInputs.basic + salaryInputs.da;
-    const hra = salaryInputs.hra;
-    const rentPaid = deductionInputs.rentPaid;
-    const isMetro = deductionInputs.metroPolitanCity;
-
-    const hraLimit = basicDa * (isMetro ? 0.5 : 0.4);
-    const rentMinus10Percent = Math.max(rentPaid - (basicDa * 0.1), 0);
-
-    return Math.min(hra, hraLimit, rentMinus10Percent);
-  };
-
-  const calculateTotalDeductions = (): number => {
-    const standardDeduction = 50000;
-    const hraExemption = calculateHRAExemption();
-
-    return (calculate80CDeductions() +
-            standardDeduction +
-            deductionInputs.medicalPremiums +
-            deductionInputs.educationLoanInterest +
-            deductionInputs.nps +
-            deductionInputs.savingsAccountInterest +
-            deductionInputs.homeLoanInterest24B +
-            hraExemption);
-  };
-
-  const calculateTaxableIncome = (): number => {
-    return calculateGrossSalary() - calculateTotalDeductions();
-  };
-
-  const calculateTaxOldRegime = (taxableIncome: number): number => {
-    if (taxableIncome <= 500000) return 0;
-
-    let tax = 0;
-    const slabs = age < 60 ? [250000, 500000, 1000000] : 
-                 age < 80 ? [300000, 500000, 1000000] : 
-                           [500000, 1000000];
-    const rates = age < 80 ? [0.05, 0.2, 0.3] : [0.2, 0.3];
-
-    for (let i = 0; i < slabs.length; i++) {
-      if (taxableIncome > slabs[i]) {
-        const taxableAmount = Math.min(
-          taxableIncome - slabs[i],
-          i === 0 ? slabs[i] : slabs[i] - slabs[i - 1]
+  const [breakdown, setBreakdown] = useState<TaxBreakdown | null>(null);
+
+  // Tax is computed by the backend tax engine (/tax/compute)
+  useEffect(() => {
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.post<TaxBreakdown>(
+          API_ENDPOINTS.TAX_COMPUTE,
+          { age, salary_inputs: salaryInputs, deduction_inputs: deductionInputs },
+          { signal: controller.signal }
         );
-        tax += taxableAmount * rates[i];
+        setBreakdown(response.data);
+      } catch (error) {
+        if (!axios.isCancel(error)) {
+          console.error('Tax computation failed:', error);
+        }
       }
-    }
-
-    return tax;
-  };
-
-  const calculateTaxNewRegime = (grossSalary: number): number => {
-    const standardDeduction = 75000;
-    const taxableIncome = grossSalary - standardDeduction;
-    
-    if (taxableIncome <= 1200000) return 0;
-    
-    const slabs = [400000, 800000, 1200000, 1600000, 2000000, 2400000];
-    const rates = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3];
-    
-    let tax = 0;
-    let remainingIncome = taxableIncome;
+    }, COMPUTE_DEBOUNCE_MS);
 
-    for (let i = 0; i < slabs.length; i++) {
-      if (remainingIncome > slabs[i]) {
-        const taxableAmount = Math.min(
-          remainingIncome - slabs[i],
-          i === 0 ? slabs[i] : slabs[i] - slabs[i - 1]
-        );
-        tax += taxableAmount * rates[i];
-        remainingIncome -= taxableAmount;
-      }
-    }
-
-    if (taxableIncome - tax < 1200000) {
-      tax = taxableIncome - 1200000;
-    }
-
-    return tax;
-  };
-
-  const calculateEducationCess = (tax: number): number => {
-    return tax * 0.04;
-  };
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [age, salaryInputs, deductionInputs]);
 
   const formatCurrency = (amount: number) => {
     return new Intl.NumberFormat('en-IN', {
@@ -159,15 +115,17 @@ const TaxCalculator = () => {
     }).format(amount);
   };
 
-  // Calculate final values
-  const grossSalary = calculateGrossSalary();
-  const taxableIncome = calculateTaxableIncome();
-  const oldRegimeTax = calculateTaxOldRegime(taxableIncome);
-  const newRegimeTax = calculateTaxNewRegime(grossSalary);
-  const oldRegimeCess = calculateEducationCess(oldRegimeTax);
-  const newRegimeCess = calculateEducationCess(newRegimeTax);
-  const totalOldRegimeTax = oldRegimeTax + oldRegimeCess;
-  const totalNewRegimeTax = newRegimeTax + newRegimeCess;
+  // Final values from the latest server breakdown
+  const grossSalary = breakdown?.gross_total_income ?? 0;
+  const totalDeductions = breakdown?.old_regime.total_deductions ?? 0;
+  const taxableIncome = breakdown?.old_regime.taxable_income ?? 0;
+  // Tax before cess, including any surcharge.
+  const oldRegimeTax = (breakdown?.old_regime.total_tax ?? 0) - (breakdown?.old_regime.cess ?? 0);
+  const newRegimeTax = (breakdown?.new_regime.total_tax ?? 0) - (breakdown?.new_regime.cess ?? 0);
+  const oldRegimeCess = breakdown?.old_regime.cess ?? 0;
+  const newRegimeCess = breakdown?.new_regime.cess ?? 0;
+  const totalOldRegimeTax = breakdown?.old_regime.total_tax ?? 0;
+  const totalNewRegimeTax = breakdown?.new_regime.total_tax ?? 0;
 
   // Add this function near the other calculation functions
   const fillDemoData = () => {
@@ -360,7 +318,7 @@ const TaxCalculator = () => {
                   <div className="flex justify-between items-center mb-2">
                     <span className="text-sm text-gray-600 dark:text-gray-400">Total Deductions</span>
                     <span className="font-medium text-green-600 dark:text-green-400">
-                      - {formatCurrency(calculateTotalDeductions())}
+                      - {formatCurrency(totalDeductions)}
                     </span>
                   </div>
                 </div>
@@ -422,8 +380,8 @@ const TaxCalculator = () => {
                         Recommended Regime
                       </h4>
                       <p className="mt-1 text-sm text-green-700 dark:text-green-300">
-                        {totalNewRegimeTax < totalOldRegimeTax ? 'New' : 'Old'} regime is better for you.
-                        You can save {formatCurrency(Math.abs(totalNewRegimeTax - totalOldRegimeTax))}
+                        {breakdown?.recommended_regime === 'old' ? 'Old' : 'New'} regime is better for you.
+                        You can save {formatCurrency(breakdown?.savings ?? 0)}
                       </p>
                     </div>
                   </div>
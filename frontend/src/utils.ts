@@ -4,4 +4,6 @@ export const SERVER_URL = 'https://eveplora.com';
 // API endpoints
 export const API_ENDPOINTS = {
   PROCESS_QUERY: `${SERVER_URL}/process_query`,
+  TAX_COMPUTE: `${SERVER_URL}/tax/compute`,
+  PORTFOLIO_ANALYTICS: `${SERVER_URL}/portfolio/analytics`,
 } as const; 
\ No newline at end of file
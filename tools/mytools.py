@@ -1,4 +1,5 @@
 import datetime
+import json
 from langchain.agents import tool
 # import connect.send_whatsapp as send_whatsapp
 from dotenv import load_dotenv
@@ -69,6 +70,98 @@ repl_tool = Tool(
 
 
 # ======================================== TAX TOOLS ========================================
+@tool
+def select_itr_form(profile_json: str) -> str:
+    """Chooses the ITR form (ITR-1 to ITR-7) for a taxpayer. Input is a JSON object with income_sources (salary, business_or_profession, capital_gains, house_property, other_sources as true/false), total_income, foreign_income_or_assets, company_directorship, investment_in_unlisted_shares, agricultural_income, is_partner_in_firm, business_turnover, presumptive_taxation and entity flags such as is_company or is_firm. Returns the form and the reasons."""
+    from tax_engine.itr_selector import select_form
+
+    try:
+        profile = json.loads(profile_json)
+    except json.JSONDecodeError as e:
+        return f"Invalid JSON: {e.msg}"
+    if not isinstance(profile, dict):
+        return "Input must be a JSON object"
+    try:
+        result = select_form(profile)
+    except ValueError as e:
+        return f"Invalid profile: {e}"
+    return f"{result['form']}: " + "; ".join(result["reasons"])
+
+
+# ======================================== MARKET TOOLS ========================================
+# Answered from the local price store (backend/market/prices.py); no web search.
+HISTORY_ROWS_SHOWN = 31
+
+
+def _split_args(text, count):
+    parts = [part.strip() for part in text.split(",")]
+    return parts + [""] * (count - len(parts))
+
+
+@tool
+def get_historical_price(query: str) -> str:
+    """Daily closing prices of an Indian stock from local data. Input: "company or symbol, start date (YYYY-MM-DD), number of days", e.g. "Reliance Industries, 2021-01-01, 30". Returns the closes (or a summary for long ranges)."""
+    import numpy as np
+    from market.prices import find_symbol, get_store
+
+    name, start, days = _split_args(query, 3)
+    try:
+        symbol = find_symbol(name)
+        start = np.datetime64(start or "1900-01-01", "D")
+        end = start + np.timedelta64(int(days or 30) - 1, "D")
+        rows = get_store().history(symbol, start, end)
+    except (ValueError, FileNotFoundError) as e:
+        return f"Error: {e}"
+    if not len(rows["date"]):
+        return f"{symbol}: no trading days between {start} and {end}"
+    close = rows["close"]
+    summary = (
+        f"{symbol} {rows['date'][0]} to {rows['date'][-1]} ({len(close)} trading days): "
+        f"first close {close[0]:.2f}, last close {close[-1]:.2f}, high {rows['high'].max():.2f}, "
+        f"low {rows['low'].min():.2f}, change {(close[-1] / close[0] - 1) * 100:+.2f}%"
+    )
+    if len(close) > HISTORY_ROWS_SHOWN:
+        return summary
+    return summary + "\n" + "\n".join(f"{d}: {c:.2f}" for d, c in zip(rows["date"], close))
+
+
+@tool
+def get_current_price(company: str) -> str:
+    """Latest closing price of an Indian stock in the local data. Input: company name or symbol, e.g. "Cipla"."""
+    from market.prices import find_symbol, get_store
+
+    try:
+        symbol = find_symbol(company)
+        date, close = get_store().latest(symbol)
+    except (ValueError, FileNotFoundError) as e:
+        return f"Error: {e}"
+    return f"{symbol}: {close:.2f} (close on {date}, latest in local data)"
+
+
+@tool
+def evaluate_returns(query: str) -> str:
+    """Past performance of an Indian stock from local data: total return, CAGR, annual volatility and max drawdown. Input: "company or symbol, period", period one of 1W, 1M, 3M, 6M, 1Y, 3Y, 5Y, 10Y (omit it for all of them), e.g. "Cipla, 3Y"."""
+    from market.prices import PERIODS, find_symbol, get_store, period_returns
+
+    name, period = _split_args(query, 2)
+    labels = [period.upper()] if period else list(PERIODS)
+    if any(label not in PERIODS for label in labels):
+        return f"Error: period must be one of {', '.join(PERIODS)}"
+    try:
+        symbol = find_symbol(name)
+        rows = get_store().history(symbol)
+        result = period_returns(rows["date"], rows["close"], [PERIODS[label] for label in labels])
+    except (ValueError, FileNotFoundError) as e:
+        return f"Error: {e}"
+    lines = [f"{symbol} as of {result['end_date']} (close {result['end_close']:.2f}):"]
+    for i, label in enumerate(labels):
+        cagr = result["cagr"][i]
+        lines.append(
+            f"{label} from {result['start_date'][i]}: return {result['total_return'][i] * 100:+.2f}%, "
+            + (f"CAGR {cagr * 100:+.2f}%, " if cagr == cagr else "")
+            + f"volatility {result['volatility'][i] * 100:.1f}%, max drawdown {result['max_drawdown'][i] * 100:.1f}%"
+        )
+    return "\n".join(lines)
 
 
 
@@ -78,10 +171,10 @@ repl_tool = Tool(
 
 
 if __name__ == "__main__":
-    # print(get_historical_price("Reliance Industries, 2021-01-01, 30"))
-    # print(get_current_price("Reliance Industries"))
+    print(get_historical_price.invoke("Reliance Industries, 2021-01-01, 30"))
+    print(get_current_price.invoke("Reliance Industries"))
     # print(get_company_info("Reliance Industries"))
-    # print(evaluate_returns("Reliance Industries, 1Y"))
+    print(evaluate_returns.invoke("Reliance Industries, 1Y"))
     # send_whatsapp_message("Hello, this is a test message from the tool.")
     # schedule_task("Test Task, This is a test task, 14:40")
     pass
\ No newline at end of file